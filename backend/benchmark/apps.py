@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class BenchmarkConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'benchmark'
+    verbose_name = 'Benchmark'
@@ -0,0 +1,452 @@
+"""
+Base sintética para medir o desempenho da API e dos relatórios (comando
+gerar_dados_benchmark).
+
+Os registros são gravados com bulk_create, em lotes, sem passar pelos
+signals: ao fim, o resumo mensal, os totais dos clientes, o índice de busca
+e os caches das empresas geradas são reconstruídos de uma só vez. As
+distribuições imitam uma operação real:
+
+- datas: o movimento cresce ao longo do período, cai nos fins de semana e
+  sobe em novembro e dezembro;
+- valores: log-normais (muitas vendas pequenas e poucas grandes);
+- clientes e produtos: poucos concentram a maior parte das vendas (Zipf);
+- status: o histórico está quase todo pago; os últimos 30 dias e os
+  vencimentos futuros concentram as pendências.
+
+Com a mesma semente e a mesma data, a base gerada é a mesma. Os ids são
+atribuídos pelo gerador (a partir do maior id existente), então o comando
+não deve rodar junto com outras gravações.
+"""
+import math
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from busca.indice import normalizar_texto, reconstruir_indice
+from categorias.models import Categoria
+from despesas.models import Despesa
+from empresas.models import Empresa
+from receitas.models import Receita
+from relatorios.cache import invalidar_empresa
+from relatorios.resumo import reconstruir_resumo
+from usuarios.models import Usuario
+from vendas.autocomplete import FONTES_AUTOCOMPLETE, invalidar_autocomplete
+from vendas.models import Cliente, ItemVenda, MovimentoEstoque, Produto, Venda
+from vendas.totais import atualizar_totais_clientes
+
+
+TAMANHO_LOTE = 2000
+DOMINIO_EMAIL = 'benchmark.local'
+SENHA_PADRAO = 'benchmark'
+CENTAVO = Decimal('0.01')
+
+NOMES = [
+    'Ana', 'João', 'Maria', 'José', 'Antônio', 'Francisco', 'Carlos', 'Paulo', 'Pedro', 'Lucas',
+    'Luíza', 'Márcia', 'Fernanda', 'Patrícia', 'Aline', 'Sandra', 'Juliana', 'Camila', 'Bruno',
+    'Rafael', 'Sérgio', 'Cecília', 'Otávio', 'Letícia', 'Gustavo', 'Beatriz', 'Vitória', 'André',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+    'Gomes', 'Ribeiro', 'Carvalho', 'Araújo', 'Conceição', 'Gonçalves', 'Simões', 'Magalhães',
+    'Brandão', 'Falcão', 'Nogueira', 'Romão', 'Assunção', 'Barbosa', 'Mendonça',
+]
+CIDADES = [
+    ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'),
+    ('Porto Alegre', 'RS'), ('Salvador', 'BA'), ('Recife', 'PE'), ('Fortaleza', 'CE'),
+    ('Goiânia', 'GO'), ('Florianópolis', 'SC'), ('Belém', 'PA'), ('Manaus', 'AM'),
+]
+# (produto, preço mediano)
+PRODUTOS = [
+    ('Caderno', 25), ('Caneta', 4), ('Mochila', 180), ('Fone de Ouvido', 120), ('Teclado', 150),
+    ('Mouse', 80), ('Monitor', 1100), ('Notebook', 4200), ('Cadeira', 650), ('Mesa', 900),
+    ('Luminária', 110), ('Café em Grãos', 45), ('Garrafa Térmica', 70), ('Camiseta', 60),
+    ('Tênis', 320), ('Relógio', 450), ('Impressora', 950), ('Cabo USB', 30), ('Carregador', 90),
+    ('Câmera', 2300),
+]
+VARIACOES = ['Básico', 'Premium', 'Pro', 'Compacto', 'Econômico', 'Plus', 'Slim', 'Max']
+# (categoria, valor mediano, dispersão, peso na quantidade de lançamentos)
+CATEGORIAS_DESPESA = [
+    ('Aluguel', 4500, 0.15, 1), ('Salários', 18000, 0.25, 2), ('Energia Elétrica', 900, 0.3, 1),
+    ('Água', 250, 0.3, 1), ('Internet', 300, 0.1, 1), ('Fornecedores', 3500, 0.9, 6),
+    ('Marketing', 1500, 0.8, 2), ('Manutenção', 600, 0.9, 2), ('Impostos', 2800, 0.5, 1),
+]
+CATEGORIAS_RECEITA = [
+    ('Serviços', 2500, 0.8, 5), ('Aplicações Financeiras', 400, 0.5, 1),
+    ('Aluguéis Recebidos', 1800, 0.2, 1), ('Outras Receitas', 300, 1.0, 2),
+]
+FORMAS_VENDA = [
+    ('PIX', 35), ('CARTAO_CREDITO', 30), ('CARTAO_DEBITO', 15), ('DINHEIRO', 10), ('BOLETO', 7),
+    ('TRANSFERENCIA', 3),
+]
+FORMAS_DESPESA = [('BOLETO', 45), ('PIX', 25), ('TRANSFERENCIA', 20), ('CARTAO_CREDITO', 10)]
+FORMAS_RECEITA = [('PIX', 40), ('TRANSFERENCIA', 35), ('BOLETO', 20), ('DINHEIRO', 5)]
+# Vendas recebidas no ato; as demais formas são pagas em até 30 dias
+PAGAMENTO_IMEDIATO = {'PIX', 'DINHEIRO', 'CARTAO_DEBITO'}
+ITENS_POR_VENDA = [45, 25, 15, 10, 5]
+QUANTIDADES = [(1, 60), (2, 20), (3, 8), (4, 5), (5, 4), (10, 3)]
+
+
+class GeradorBenchmark:
+    """
+    Gera empresas com usuários, clientes, produtos, vendas com itens,
+    despesas e receitas. As quantidades de registros são por empresa.
+    """
+
+    def __init__(self, empresas=3, clientes=500, produtos=200, vendas=5000, itens_max=5,
+                 despesas=1000, receitas=500, meses=24, semente=42, hoje=None, log=None):
+        self.quantidades = {
+            'empresas': empresas, 'clientes': clientes, 'produtos': produtos, 'vendas': vendas,
+            'despesas': despesas, 'receitas': receitas,
+        }
+        self.itens_max = max(1, min(itens_max, len(ITENS_POR_VENDA)))
+        self.aleatorio = random.Random(semente)
+        self.hoje = hoje or date.today()
+        self.inicio = self.hoje - timedelta(days=round(meses * 30.44))
+        self.log = log or (lambda mensagem: None)
+
+        dias = (self.hoje - self.inicio).days + 1
+        self.dias = [self.inicio + timedelta(days=n) for n in range(dias)]
+        self.pesos_dias = list(accumulate(
+            self._peso_dia(posicao / dias, dia) for posicao, dia in enumerate(self.dias)
+        ))
+
+    # Distribuições
+
+    @staticmethod
+    def _peso_dia(posicao, dia):
+        """Crescimento de 2x ao longo do período, sazonalidade semanal e de fim de ano"""
+        peso = 1 + posicao
+        peso *= {5: 0.7, 6: 0.4}.get(dia.weekday(), 1.0)
+        peso *= {11: 1.2, 12: 1.5, 1: 0.85}.get(dia.month, 1.0)
+        return peso
+
+    def data_venda(self):
+        return self.aleatorio.choices(self.dias, cum_weights=self.pesos_dias)[0]
+
+    def data_conta(self, dias_futuros=45):
+        """Vencimentos uniformes no período, incluindo contas a vencer"""
+        return self.inicio + timedelta(
+            days=self.aleatorio.randint(0, len(self.dias) - 1 + dias_futuros)
+        )
+
+    def valor(self, mediana, dispersao):
+        bruto = self.aleatorio.lognormvariate(math.log(mediana), dispersao)
+        return max(Decimal(bruto).quantize(CENTAVO), CENTAVO)
+
+    def escolher(self, opcoes_pesos):
+        opcoes, pesos = zip(*opcoes_pesos)
+        return self.aleatorio.choices(opcoes, weights=pesos)[0]
+
+    def pesos_zipf(self, quantidade, expoente=0.9):
+        """Pesos acumulados em que o registro de posição n pesa 1/n^expoente"""
+        return list(accumulate(1 / (posicao + 1) ** expoente for posicao in range(quantidade)))
+
+    def nome_pessoa(self):
+        nome = self.aleatorio.choice(NOMES)
+        sobrenomes = self.aleatorio.sample(SOBRENOMES, self.aleatorio.choice([1, 2, 2, 3]))
+        return ' '.join([nome, *sobrenomes])
+
+    def digitos(self, quantidade):
+        return ''.join(self.aleatorio.choice('0123456789') for _ in range(quantidade))
+
+    # Gravação
+
+    def gerar(self):
+        """Gera a base e retorna a quantidade de registros de cada tipo"""
+        totais = dict.fromkeys(
+            ['empresas', 'usuarios', 'clientes', 'produtos', 'vendas', 'itens', 'despesas', 'receitas'], 0
+        )
+        categorias_despesa = self._categorias('DESPESA', CATEGORIAS_DESPESA)
+        categorias_receita = self._categorias('RECEITA', CATEGORIAS_RECEITA)
+        self._usuario_chefe()
+
+        empresa_ids = []
+        for indice in range(self.quantidades['empresas']):
+            empresa = self._empresa()
+            empresa_ids.append(empresa.pk)
+            usuario_ids = self._usuarios(empresa)
+            self.log(f'Empresa {indice + 1}/{self.quantidades["empresas"]}: {empresa.nome} (id {empresa.pk})')
+
+            cliente_ids = self._clientes(empresa)
+            produtos = self._produtos(empresa)
+            vendas, itens = self._vendas(empresa, cliente_ids, produtos, usuario_ids)
+            despesas = self._contas(empresa, usuario_ids, categorias_despesa, 'despesas')
+            receitas = self._contas(empresa, usuario_ids, categorias_receita, 'receitas')
+
+            totais['empresas'] += 1
+            totais['usuarios'] += len(usuario_ids)
+            totais['clientes'] += len(cliente_ids)
+            totais['produtos'] += len(produtos)
+            totais['vendas'] += vendas
+            totais['itens'] += itens
+            totais['despesas'] += despesas
+            totais['receitas'] += receitas
+
+        self._reiniciar_sequencias()
+        self._atualizar_derivados(empresa_ids)
+        return totais
+
+    def _categorias(self, tipo, definicoes):
+        """Categorias globais (compartilhadas por todas as empresas): (id, mediana, dispersão, peso)"""
+        categorias = []
+        for ordem, (nome, mediana, dispersao, peso) in enumerate(definicoes):
+            categoria, _ = Categoria.objects.get_or_create(
+                nome=nome, tipo=tipo, defaults={'ordem': ordem}
+            )
+            categorias.append((categoria.pk, mediana, dispersao, peso))
+        return categorias
+
+    def _usuario_chefe(self):
+        email = f'chefe@{DOMINIO_EMAIL}'
+        if not Usuario.objects.filter(email=email).exists():
+            Usuario.objects.create_user(
+                email=email, password=SENHA_PADRAO, first_name='Chefe', last_name='Benchmark',
+                tipo_usuario='ADMIN_CHEFE', is_staff=True,
+            )
+
+    def _empresa(self):
+        proximo = (Empresa.objects.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+        cidade, estado = self.aleatorio.choice(CIDADES)
+        sobrenome = self.aleatorio.choice(SOBRENOMES)
+        return Empresa.objects.create(
+            nome=f'{sobrenome} Comércio {proximo}',
+            razao_social=f'{sobrenome} Comércio e Serviços {proximo} LTDA',
+            cnpj=f'99{proximo:06d}000100',
+            email=f'empresa{proximo}@{DOMINIO_EMAIL}',
+            cidade=cidade,
+            estado=estado,
+            cep=self.digitos(8),
+        )
+
+    def _usuarios(self, empresa):
+        """Um administrador e dois usuários por empresa (senha SENHA_PADRAO)"""
+        usuario_ids = []
+        for prefixo, tipo in [('admin', 'ADMIN_EMPRESA'), ('usuario1', 'USUARIO_EMPRESA'),
+                              ('usuario2', 'USUARIO_EMPRESA')]:
+            usuario = Usuario.objects.create_user(
+                email=f'{prefixo}.empresa{empresa.pk}@{DOMINIO_EMAIL}', password=SENHA_PADRAO,
+                first_name=prefixo.capitalize(), last_name=f'Empresa {empresa.pk}',
+                tipo_usuario=tipo, empresa=empresa,
+            )
+            usuario_ids.append(usuario.pk)
+        return usuario_ids
+
+    def _proximo_id(self, model):
+        return (model.objects.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+
+    def _clientes(self, empresa):
+        proximo = self._proximo_id(Cliente)
+        clientes = []
+        for posicao in range(self.quantidades['clientes']):
+            nome = self.nome_pessoa()
+            cidade, estado = self.aleatorio.choice(CIDADES)
+            clientes.append(Cliente(
+                id=proximo + posicao,
+                empresa=empresa,
+                nome=nome,
+                email=f'{normalizar_texto(nome.split()[0])}.{proximo + posicao}@{DOMINIO_EMAIL}',
+                telefone=f'({self.digitos(2)}) 9{self.digitos(4)}-{self.digitos(4)}',
+                cpf_cnpj=self.digitos(11),
+                cidade=cidade,
+                estado=estado,
+                ativo=self.aleatorio.random() > 0.05,
+            ))
+        Cliente.objects.bulk_create(clientes, batch_size=TAMANHO_LOTE)
+        # Os clientes mais frequentes não são sempre os mais antigos
+        cliente_ids = [cliente.pk for cliente in clientes]
+        self.aleatorio.shuffle(cliente_ids)
+        return cliente_ids
+
+    def _produtos(self, empresa):
+        """Lista de (id, preço), com o livro de estoque aberto pelo saldo inicial"""
+        proximo = self._proximo_id(Produto)
+        produtos, movimentos = [], []
+        for posicao in range(self.quantidades['produtos']):
+            nome, mediana = self.aleatorio.choice(PRODUTOS)
+            variacao = self.aleatorio.choice(VARIACOES)
+            produto = Produto(
+                id=proximo + posicao,
+                empresa=empresa,
+                nome=f'{nome} {variacao} {posicao + 1}',
+                codigo=f'{nome[:3].upper()}-{proximo + posicao:06d}',
+                preco=self.valor(mediana, 0.35),
+                estoque=self.aleatorio.randint(0, 500),
+                ativo=self.aleatorio.random() > 0.05,
+            )
+            produtos.append(produto)
+            if produto.estoque:
+                movimentos.append(MovimentoEstoque(
+                    empresa=empresa, produto_id=produto.id, tipo='SALDO', quantidade=produto.estoque
+                ))
+        with transaction.atomic():
+            Produto.objects.bulk_create(produtos, batch_size=TAMANHO_LOTE)
+            MovimentoEstoque.objects.bulk_create(movimentos, batch_size=TAMANHO_LOTE)
+        lista = [(produto.pk, produto.preco) for produto in produtos]
+        self.aleatorio.shuffle(lista)
+        return lista
+
+    def _vendas(self, empresa, cliente_ids, produtos, usuario_ids):
+        """
+        Vendas históricas: não baixam o estoque (o saldo inicial dos produtos
+        já é o estoque atual). Retorna (vendas, itens) gravados.
+        """
+        if not cliente_ids or not produtos:
+            return 0, 0
+        pesos_clientes = self.pesos_zipf(len(cliente_ids), expoente=0.8)
+        pesos_produtos = self.pesos_zipf(len(produtos), expoente=1.1)
+        pesos_itens = list(accumulate(ITENS_POR_VENDA[:self.itens_max]))
+        proximo = self._proximo_id(Venda)
+        total_itens = 0
+
+        quantidade = self.quantidades['vendas']
+        for inicio in range(0, quantidade, TAMANHO_LOTE):
+            vendas, itens = [], []
+            for posicao in range(inicio, min(inicio + TAMANHO_LOTE, quantidade)):
+                venda_id = proximo + posicao
+                escolhidos = self.aleatorio.choices(
+                    produtos, cum_weights=pesos_produtos,
+                    k=self.aleatorio.choices(range(1, self.itens_max + 1), cum_weights=pesos_itens)[0]
+                )
+                valor_total = Decimal('0.00')
+                for produto_id, preco in dict(escolhidos).items():
+                    item = ItemVenda(
+                        venda_id=venda_id, produto_id=produto_id,
+                        quantidade=self.escolher(QUANTIDADES), preco_unitario=preco,
+                    )
+                    valor_total += item.subtotal
+                    itens.append(item)
+                vendas.append(self._venda(
+                    venda_id, empresa, self.aleatorio.choices(cliente_ids, cum_weights=pesos_clientes)[0],
+                    valor_total, usuario_ids,
+                ))
+            with transaction.atomic():
+                Venda.objects.bulk_create(vendas, batch_size=TAMANHO_LOTE)
+                ItemVenda.objects.bulk_create(itens, batch_size=TAMANHO_LOTE)
+            total_itens += len(itens)
+        return quantidade, total_itens
+
+    def _venda(self, venda_id, empresa, cliente_id, valor_total, usuario_ids):
+        data_venda = self.data_venda()
+        recente = (self.hoje - data_venda).days <= 30
+        status = self.escolher(
+            [('PAGA', 60), ('PENDENTE', 33), ('CANCELADA', 7)] if recente
+            else [('PAGA', 88), ('PENDENTE', 5), ('CANCELADA', 7)]
+        )
+        forma = self.escolher(FORMAS_VENDA)
+
+        desconto = Decimal('0.00')
+        if self.aleatorio.random() < 0.15:
+            desconto = (valor_total * Decimal(self.aleatorio.uniform(0.03, 0.15))).quantize(CENTAVO)
+
+        data_pagamento = chargeback = reversao = None
+        if status == 'PAGA':
+            prazo = 0 if forma in PAGAMENTO_IMEDIATO else self.aleatorio.randint(1, 30)
+            data_pagamento = min(data_venda + timedelta(days=prazo), self.hoje)
+            if forma == 'CARTAO_CREDITO' and self.aleatorio.random() < 0.02:
+                chargeback = valor_total - desconto
+                if self.aleatorio.random() < 0.3:
+                    reversao = chargeback
+
+        return Venda(
+            id=venda_id,
+            empresa=empresa,
+            cliente_id=cliente_id,
+            data_venda=data_venda,
+            data_pagamento=data_pagamento,
+            valor_total=valor_total,
+            desconto=desconto,
+            chargeback=chargeback or Decimal('0.00'),
+            reversao_chargeback=reversao or Decimal('0.00'),
+            forma_pagamento=forma,
+            status=status,
+            observacoes='Entrega agendada' if self.aleatorio.random() < 0.05 else '',
+            usuario_cadastro_id=self.aleatorio.choice(usuario_ids),
+        )
+
+    def _contas(self, empresa, usuario_ids, categorias, tipo):
+        """Despesas (tipo='despesas') ou receitas (tipo='receitas') da empresa"""
+        despesa = tipo == 'despesas'
+        pesos_categorias = list(accumulate(peso for *_, peso in categorias))
+        quantidade = self.quantidades[tipo]
+
+        for inicio in range(0, quantidade, TAMANHO_LOTE):
+            lote = []
+            for _ in range(min(TAMANHO_LOTE, quantidade - inicio)):
+                categoria_id, mediana, dispersao, _ = self.aleatorio.choices(
+                    categorias, cum_weights=pesos_categorias
+                )[0]
+                montar = self._despesa if despesa else self._receita
+                lote.append(montar(
+                    empresa, categoria_id, self.data_conta(), self.valor(mediana, dispersao), usuario_ids
+                ))
+            (Despesa if despesa else Receita).objects.bulk_create(lote, batch_size=TAMANHO_LOTE)
+        return quantidade
+
+    def _despesa(self, empresa, categoria_id, vencimento, valor, usuario_ids):
+        if vencimento > self.hoje:
+            status = self.escolher([('PENDENTE', 97), ('CANCELADA', 3)])
+        else:
+            status = self.escolher([('PAGA', 90), ('VENCIDA', 7), ('CANCELADA', 3)])
+        data_pagamento = None
+        if status == 'PAGA':
+            data_pagamento = vencimento - timedelta(days=self.aleatorio.randint(0, 5))
+        return Despesa(
+            empresa=empresa,
+            categoria_id=categoria_id,
+            descricao=f'Lançamento {vencimento:%m/%Y}',
+            valor=valor,
+            data_vencimento=vencimento,
+            data_pagamento=data_pagamento,
+            forma_pagamento=self.escolher(FORMAS_DESPESA),
+            status=status,
+            usuario_cadastro_id=self.aleatorio.choice(usuario_ids),
+        )
+
+    def _receita(self, empresa, categoria_id, prevista, valor, usuario_ids):
+        if prevista > self.hoje:
+            status = self.escolher([('PENDENTE', 97), ('CANCELADA', 3)])
+        else:
+            status = self.escolher([('RECEBIDA', 90), ('PENDENTE', 6), ('CANCELADA', 4)])
+        data_recebimento = None
+        if status == 'RECEBIDA':
+            data_recebimento = min(prevista + timedelta(days=self.aleatorio.randint(0, 10)), self.hoje)
+        return Receita(
+            empresa=empresa,
+            categoria_id=categoria_id,
+            descricao=f'Recebimento {prevista:%m/%Y}',
+            valor=valor,
+            data_prevista=prevista,
+            data_recebimento=data_recebimento,
+            forma_recebimento=self.escolher(FORMAS_RECEITA),
+            status=status,
+            usuario_cadastro_id=self.aleatorio.choice(usuario_ids),
+        )
+
+    def _reiniciar_sequencias(self):
+        """Ajusta as sequências (PostgreSQL) aos ids atribuídos pelo gerador"""
+        comandos = connection.ops.sequence_reset_sql(no_style(), [Cliente, Produto, Venda])
+        if comandos:
+            with connection.cursor() as cursor:
+                for comando in comandos:
+                    cursor.execute(comando)
+
+    def _atualizar_derivados(self, empresa_ids):
+        """Dados que os signals manteriam a cada gravação"""
+        if not empresa_ids:
+            return
+        self.log('Reconstruindo resumo mensal, totais dos clientes e indice de busca...')
+        reconstruir_resumo(empresa_ids=empresa_ids)
+        cliente_ids = list(Cliente.objects.filter(empresa_id__in=empresa_ids).values_list('id', flat=True))
+        for inicio in range(0, len(cliente_ids), TAMANHO_LOTE):
+            atualizar_totais_clientes(cliente_ids[inicio:inicio + TAMANHO_LOTE])
+        reconstruir_indice(empresa_ids=empresa_ids)
+        for origem in FONTES_AUTOCOMPLETE:
+            invalidar_autocomplete(origem, empresa_ids)
+        for empresa_id in empresa_ids:
+            invalidar_empresa(empresa_id)
@@ -0,0 +1,212 @@
+"""
+Tempos de resposta da API e dos relatórios (comando executar_benchmark).
+
+As requisições são feitas no próprio processo, com o APIClient do DRF e um
+token obtido pelo login, então passam por middlewares, autenticação JWT,
+views, serializers e banco, sem a rede. Cada endpoint é chamado uma vez
+para aquecer e depois N vezes. Antes de cada chamada de relatório o cache
+dos relatórios é limpo, para medir o cálculo e não a leitura do cache (a
+não ser com com_cache=True). Os PDFs ficam de fora: são guardados em disco
+pelo hash do conteúdo e só a primeira chamada os renderiza.
+
+O resultado de cada endpoint traz mediana, p95, mínimo e máximo em
+milissegundos, a quantidade de consultas e o tamanho da resposta. Gravado
+em JSON, serve de baseline para execuções futuras (comparar_baseline).
+"""
+import math
+import statistics
+import time
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from despesas.models import Despesa
+from empresas.models import Empresa
+from receitas.models import Receita
+from relatorios.cache import cache_relatorios
+from vendas.models import Cliente, Produto, Venda
+
+
+# (nome, perfil, url, relatório). Perfil 'empresa' usa o administrador da
+# empresa medida e 'chefe' o Admin Chefe; {campos} vêm de parametros_url()
+ENDPOINTS = [
+    ('empresas', 'chefe', '/api/empresas/', False),
+    ('empresa_dashboard', 'chefe', '/api/empresas/{empresa}/dashboard/', False),
+    ('usuarios', 'empresa', '/api/usuarios/', False),
+    ('usuarios_me', 'empresa', '/api/usuarios/me/', False),
+    ('categorias', 'empresa', '/api/categorias/', False),
+    ('clientes', 'empresa', '/api/vendas/clientes/', False),
+    ('clientes_ranking', 'empresa', '/api/vendas/clientes/?ordering=-valor_total_vendas', False),
+    ('clientes_busca', 'empresa', '/api/vendas/clientes/?search={busca}', False),
+    ('clientes_autocomplete', 'empresa', '/api/vendas/clientes/autocomplete/?q={prefixo}', False),
+    ('produtos', 'empresa', '/api/vendas/produtos/', False),
+    ('produtos_autocomplete', 'empresa', '/api/vendas/produtos/autocomplete/?q={prefixo}', False),
+    ('vendas', 'empresa', '/api/vendas/', False),
+    ('vendas_cursor', 'empresa', '/api/vendas/?paginacao=cursor', False),
+    ('vendas_busca', 'empresa', '/api/vendas/?search={busca}', False),
+    ('vendas_pendentes', 'empresa', '/api/vendas/?status=PENDENTE', False),
+    ('vendas_detalhe', 'empresa', '/api/vendas/{venda}/', False),
+    ('vendas_export_csv', 'empresa', '/api/vendas/export/?formato=csv', False),
+    ('despesas', 'empresa', '/api/despesas/', False),
+    ('despesas_cursor', 'empresa', '/api/despesas/?paginacao=cursor', False),
+    ('receitas', 'empresa', '/api/receitas/', False),
+    ('receitas_cursor', 'empresa', '/api/receitas/?paginacao=cursor', False),
+    (
+        'relatorio_financeiro', 'empresa',
+        '/api/relatorios/financeiro/?empresa_id={empresa}&data_inicio={data_inicio}&data_fim={data_fim}', True,
+    ),
+    (
+        'relatorio_consolidado', 'chefe',
+        '/api/relatorios/consolidado/?data_inicio={data_inicio}&data_fim={data_fim}', True,
+    ),
+    (
+        'analise_receita', 'empresa',
+        '/api/relatorios/analise-receita/?empresa_id={empresa}&data_inicio={data_inicio}'
+        '&data_fim={data_fim}&granularidade=mes', True,
+    ),
+    (
+        'analise_receita_diaria', 'empresa',
+        '/api/relatorios/analise-receita/?empresa_id={empresa}&data_inicio={data_inicio}'
+        '&data_fim={data_fim}&granularidade=dia', True,
+    ),
+    (
+        'dre', 'empresa',
+        '/api/relatorios/dre/?empresa_id={empresa}&data_inicio={data_inicio}&data_fim={data_fim}', True,
+    ),
+    (
+        'dashboard', 'empresa',
+        '/api/relatorios/dashboard/?empresa={empresa}&data_inicio={data_inicio}&data_fim={data_fim}', True,
+    ),
+]
+
+
+def percentil(valores, fracao):
+    """Percentil pelo posto mais próximo (valores ordenados)"""
+    return valores[max(math.ceil(fracao * len(valores)) - 1, 0)]
+
+
+def parametros_url(empresa_id, dias, busca, prefixo):
+    hoje = date.today()
+    ultima_venda = Venda.objects.filter(
+        empresa_id=empresa_id
+    ).order_by('-id').values_list('id', flat=True).first()
+    return {
+        'empresa': empresa_id,
+        'venda': ultima_venda or 0,
+        'data_inicio': (hoje - timedelta(days=dias)).isoformat(),
+        'data_fim': hoje.isoformat(),
+        'busca': quote(busca),
+        'prefixo': quote(prefixo),
+    }
+
+
+def contagem_dados(empresa_id):
+    """Tamanho da base medida (total e da empresa)"""
+    contagem = {'empresas': Empresa.objects.count()}
+    for nome, model in [('clientes', Cliente), ('produtos', Produto), ('vendas', Venda),
+                        ('despesas', Despesa), ('receitas', Receita)]:
+        contagem[nome] = model.objects.count()
+        contagem[f'{nome}_empresa'] = model.objects.filter(empresa_id=empresa_id).count()
+    return contagem
+
+
+def hosts_de_teste():
+    """Hosts permitidos mais o testserver, host das requisições do APIClient"""
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+
+
+def autenticar(email, senha):
+    """APIClient com o token de acesso obtido pelo login"""
+    cliente = APIClient()
+    with hosts_de_teste():
+        resposta = cliente.post('/api/usuarios/login/', {'email': email, 'password': senha}, format='json')
+    if resposta.status_code != 200:
+        raise ValueError(f'login de {email} recusado ({resposta.status_code})')
+    cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {resposta.data['access']}")
+    return cliente
+
+
+def medir_requisicao(cliente, url, limpar_cache):
+    """(status, milissegundos, consultas, bytes) de um GET"""
+    if limpar_cache:
+        cache_relatorios().clear()
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        resposta = cliente.get(url)
+        conteudo = b''.join(resposta.streaming_content) if resposta.streaming else resposta.content
+        duracao = (time.perf_counter() - inicio) * 1000
+    return resposta.status_code, duracao, len(consultas), len(conteudo)
+
+
+def executar_benchmark(clientes, parametros, repeticoes=5, com_cache=False, nomes=None, log=None):
+    """
+    Mede os endpoints (todos ou os de `nomes`). clientes é um dicionário
+    perfil -> APIClient autenticado. Retorna {nome: medição}.
+    """
+    log = log or (lambda nome, medicao: None)
+    resultados = {}
+    with hosts_de_teste():
+        for nome, perfil, url, relatorio in ENDPOINTS:
+            if nomes and nome not in nomes:
+                continue
+            url = url.format(**parametros)
+            limpar_cache = relatorio and not com_cache
+            medir_requisicao(clientes[perfil], url, limpar_cache)
+
+            tempos = []
+            for _ in range(repeticoes):
+                status, duracao, consultas, tamanho = medir_requisicao(clientes[perfil], url, limpar_cache)
+                tempos.append(duracao)
+            tempos.sort()
+            resultados[nome] = {
+                'url': url,
+                'status': status,
+                'mediana_ms': round(statistics.median(tempos), 2),
+                'p95_ms': round(percentil(tempos, 0.95), 2),
+                'min_ms': round(tempos[0], 2),
+                'max_ms': round(tempos[-1], 2),
+                'consultas': consultas,
+                'bytes': tamanho,
+            }
+            log(nome, resultados[nome])
+    return resultados
+
+
+def montar_baseline(resultados, parametros, repeticoes, com_cache, dados):
+    return {
+        'gerado_em': timezone.now().isoformat(),
+        'banco': connection.vendor,
+        'repeticoes': repeticoes,
+        'com_cache': com_cache,
+        'empresa_id': parametros['empresa'],
+        'periodo': {'data_inicio': parametros['data_inicio'], 'data_fim': parametros['data_fim']},
+        'dados': dados,
+        'endpoints': resultados,
+    }
+
+
+def comparar_baseline(resultados, baseline, tolerancia):
+    """
+    Regressões em relação a um baseline: mediana acima de
+    (1 + tolerancia) vezes a anterior, mais consultas ou um erro novo.
+    Retorna uma lista de (endpoint, descrição).
+    """
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = baseline.get('endpoints', {}).get(nome)
+        if anterior is None:
+            continue
+        if atual['status'] != anterior['status'] and atual['status'] >= 400:
+            regressoes.append((nome, f"status {anterior['status']} -> {atual['status']}"))
+        if atual['consultas'] > anterior['consultas']:
+            regressoes.append((nome, f"consultas {anterior['consultas']} -> {atual['consultas']}"))
+        if atual['mediana_ms'] > anterior['mediana_ms'] * (1 + tolerancia):
+            regressoes.append((
+                nome, f"mediana {anterior['mediana_ms']} ms -> {atual['mediana_ms']} ms"
+            ))
+    return regressoes
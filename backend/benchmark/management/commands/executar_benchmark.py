@@ -0,0 +1,112 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark.dados import DOMINIO_EMAIL, SENHA_PADRAO
+from benchmark.executor import (
+    ENDPOINTS, autenticar, comparar_baseline, contagem_dados, executar_benchmark, montar_baseline,
+    parametros_url,
+)
+from empresas.models import Empresa
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede os tempos de resposta dos endpoints da API e dos relatorios e grava um baseline '
+        'em JSON. Com --comparar, aponta as regressoes em relacao a um baseline anterior'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa', type=int,
+            help='ID da empresa medida. Padrao: a primeira gerada por gerar_dados_benchmark'
+        )
+        parser.add_argument(
+            '--email', help='Usuario da empresa. Padrao: admin.empresa<id> da base de benchmark'
+        )
+        parser.add_argument(
+            '--email-chefe', default=f'chefe@{DOMINIO_EMAIL}', help='Admin Chefe (relatorio consolidado)'
+        )
+        parser.add_argument('--senha', default=SENHA_PADRAO, help='Senha dos usuarios')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Medicoes por endpoint. Padrao: 5')
+        parser.add_argument(
+            '--dias', type=int, default=365, help='Periodo dos relatorios, ate hoje. Padrao: 365'
+        )
+        parser.add_argument('--busca', default='silva', help='Texto do ?search=. Padrao: silva')
+        parser.add_argument('--prefixo', default='ma', help='Texto do autocomplete. Padrao: ma')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=[nome for nome, *_ in ENDPOINTS],
+            help='Endpoint medido (pode ser repetido). Padrao: todos'
+        )
+        parser.add_argument(
+            '--com-cache', action='store_true', help='Nao limpa o cache dos relatorios entre as medicoes'
+        )
+        parser.add_argument(
+            '--saida', default='benchmark.json', help='Arquivo JSON gravado. Padrao: benchmark.json'
+        )
+        parser.add_argument('--comparar', help='Baseline JSON anterior para comparar as medianas')
+        parser.add_argument(
+            '--tolerancia', type=float, default=20,
+            help='Aumento da mediana (%%) aceito na comparacao. Padrao: 20'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticoes'] < 1:
+            raise CommandError('--repeticoes deve ser pelo menos 1')
+
+        empresa_id = options['empresa']
+        if empresa_id is None:
+            empresa_id = Empresa.objects.filter(
+                email__endswith=f'@{DOMINIO_EMAIL}'
+            ).order_by('id').values_list('id', flat=True).first()
+            if empresa_id is None:
+                raise CommandError('Nenhuma empresa de benchmark. Rode gerar_dados_benchmark ou use --empresa')
+        email = options['email'] or f'admin.empresa{empresa_id}@{DOMINIO_EMAIL}'
+
+        try:
+            clientes = {
+                'empresa': autenticar(email, options['senha']),
+                'chefe': autenticar(options['email_chefe'], options['senha']),
+            }
+        except ValueError as erro:
+            raise CommandError(str(erro))
+
+        parametros = parametros_url(empresa_id, options['dias'], options['busca'], options['prefixo'])
+        self.stdout.write(
+            f"Empresa {empresa_id}, {options['repeticoes']} repeticoes, "
+            f"periodo {parametros['data_inicio']} a {parametros['data_fim']}"
+        )
+        self.stdout.write(f"{'endpoint':<26}{'status':>7}{'mediana':>10}{'p95':>10}{'consultas':>11}{'bytes':>11}")
+        resultados = executar_benchmark(
+            clientes, parametros, repeticoes=options['repeticoes'], com_cache=options['com_cache'],
+            nomes=options['endpoint'], log=self.linha,
+        )
+
+        baseline = montar_baseline(
+            resultados, parametros, options['repeticoes'], options['com_cache'], contagem_dados(empresa_id)
+        )
+        with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+            json.dump(baseline, arquivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Baseline gravado em {options['saida']}."))
+
+        falhas = [nome for nome, medicao in resultados.items() if medicao['status'] >= 400]
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+            regressoes = comparar_baseline(resultados, anterior, options['tolerancia'] / 100)
+            for nome, descricao in regressoes:
+                self.stdout.write(self.style.ERROR(f'REGRESSAO  {nome}: {descricao}'))
+            if regressoes:
+                raise CommandError(f'{len(regressoes)} regressao(oes) em relacao a {options["comparar"]}')
+            self.stdout.write(self.style.SUCCESS(f"Sem regressoes em relacao a {options['comparar']}."))
+        if falhas:
+            raise CommandError(f"Endpoints com erro: {', '.join(falhas)}")
+
+    def linha(self, nome, medicao):
+        texto = (
+            f"{nome:<26}{medicao['status']:>7}{medicao['mediana_ms']:>8.1f}ms{medicao['p95_ms']:>8.1f}ms"
+            f"{medicao['consultas']:>11}{medicao['bytes']:>11}"
+        )
+        self.stdout.write(self.style.ERROR(texto) if medicao['status'] >= 400 else texto)
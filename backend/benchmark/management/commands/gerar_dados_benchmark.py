@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark.dados import DOMINIO_EMAIL, SENHA_PADRAO, GeradorBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera uma base sintetica para benchmark: empresas com usuarios, clientes, produtos, '
+        'vendas com itens, despesas e receitas (quantidades por empresa), gravadas com bulk_create. '
+        'Use um banco separado: os registros nao sao removidos depois'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresas', type=int, default=3, help='Empresas geradas. Padrao: 3')
+        parser.add_argument('--clientes', type=int, default=500, help='Clientes por empresa. Padrao: 500')
+        parser.add_argument('--produtos', type=int, default=200, help='Produtos por empresa. Padrao: 200')
+        parser.add_argument('--vendas', type=int, default=5000, help='Vendas por empresa. Padrao: 5000')
+        parser.add_argument(
+            '--itens-max', type=int, default=5, help='Maximo de itens por venda (1 a 5). Padrao: 5'
+        )
+        parser.add_argument('--despesas', type=int, default=1000, help='Despesas por empresa. Padrao: 1000')
+        parser.add_argument('--receitas', type=int, default=500, help='Receitas por empresa. Padrao: 500')
+        parser.add_argument(
+            '--meses', type=int, default=24, help='Meses de historico ate hoje. Padrao: 24'
+        )
+        parser.add_argument(
+            '--semente', type=int, default=42, help='Semente dos numeros aleatorios. Padrao: 42'
+        )
+
+    def handle(self, *args, **options):
+        quantidades = {
+            nome: options[nome]
+            for nome in ['empresas', 'clientes', 'produtos', 'vendas', 'despesas', 'receitas']
+        }
+        if any(valor < 0 for valor in quantidades.values()):
+            raise CommandError('As quantidades nao podem ser negativas')
+        if options['meses'] < 1:
+            raise CommandError('--meses deve ser pelo menos 1')
+
+        gerador = GeradorBenchmark(
+            itens_max=options['itens_max'],
+            meses=options['meses'],
+            semente=options['semente'],
+            log=self.stdout.write,
+            **quantidades,
+        )
+        totais = gerador.gerar()
+
+        resumo = ', '.join(f'{quantidade} {nome}' for nome, quantidade in totais.items())
+        self.stdout.write(self.style.SUCCESS(f'Gerados: {resumo}.'))
+        self.stdout.write(
+            f'Usuarios: chefe@{DOMINIO_EMAIL} e admin.empresa<id>@{DOMINIO_EMAIL} (senha "{SENHA_PADRAO}")'
+        )
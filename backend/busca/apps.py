@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BuscaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'busca'
+    verbose_name = 'Busca'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,55 @@
+"""
+Filtro de busca (?search=) apoiado no índice de busca (busca/indice.py).
+
+Substitui os LIKE '%termo%' do SearchFilter, que percorrem a tabela
+inteira, por consultas ao índice: cada palavra da busca precisa ser o
+início de alguma palavra do registro, sem diferenciar acentos e
+maiúsculas.
+"""
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import filters
+
+from usuarios.contexto import contexto_tenant
+from .indice import ids_por_prefixo, palavras
+
+
+# Limita o número de subconsultas de uma busca
+MAXIMO_PALAVRAS = 8
+
+
+class BuscaIndexadaFilter(filters.SearchFilter):
+    """
+    SearchFilter que usa o índice de busca. A view informa em `busca_fontes`
+    os pares (origem do índice, campo do queryset com o id do registro), ex.:
+    [('CLIENTE', 'cliente_id'), ('VENDA', 'pk')] busca vendas pelo cliente
+    ou pelas observações.
+
+    Views sem busca_fontes, ou com BUSCA_INDEXADA=False, usam o
+    SearchFilter com os search_fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fontes = getattr(view, 'busca_fontes', None)
+        if not fontes or not settings.BUSCA_INDEXADA:
+            return super().filter_queryset(request, queryset, view)
+
+        palavras_busca = []
+        for termo in self.get_search_terms(request):
+            for palavra in palavras(termo):
+                if palavra not in palavras_busca:
+                    palavras_busca.append(palavra)
+        if not palavras_busca:
+            # Só pontuação: o índice não tem palavras que correspondam
+            return queryset.none() if self.get_search_terms(request) else queryset
+
+        # O índice é consultado só na empresa do usuário
+        contexto = contexto_tenant(request)
+        empresa_id = None if contexto.admin_chefe else contexto.empresa_id
+
+        for palavra in palavras_busca[:MAXIMO_PALAVRAS]:
+            condicao = Q()
+            for origem, campo in fontes:
+                condicao |= Q(**{f'{campo}__in': ids_por_prefixo(origem, palavra, empresa_id)})
+            queryset = queryset.filter(condicao)
+        return queryset
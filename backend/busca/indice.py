@@ -0,0 +1,200 @@
+"""
+Índice de busca de clientes, produtos e vendas.
+
+Cada registro pesquisável tem:
+- um DocumentoBusca com as palavras normalizadas (minúsculas, sem acentos),
+  pesquisado com MATCH ... AGAINST no MySQL (índice FULLTEXT);
+- uma linha de TermoBusca por palavra, pesquisada por prefixo com uma faixa
+  termo >= 'jo' AND termo < 'jp' sobre o índice (empresa, origem, termo).
+  É o caminho usado nos demais bancos e, no MySQL, para palavras menores
+  que o tamanho mínimo do FULLTEXT.
+
+A busca é por prefixo de palavra e ignora acentos e pontuação: "jose sil"
+encontra "José da Silva" e "123.456" encontra o CPF "123.456.789-00".
+"""
+import re
+import unicodedata
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+
+TAMANHO_TERMO = 50
+TAMANHO_LOTE = 1000
+ALFABETO = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# Campos indexados de cada origem. Os campos de CAMPOS_COMPACTOS também são
+# indexados sem a pontuação ('123.456.789-00' -> '12345678900')
+FONTES_BUSCA = {
+    'CLIENTE': {'model': 'vendas.Cliente', 'campos': ['nome', 'email', 'cpf_cnpj']},
+    'PRODUTO': {'model': 'vendas.Produto', 'campos': ['nome', 'codigo', 'descricao']},
+    'VENDA': {'model': 'vendas.Venda', 'campos': ['observacoes']},
+}
+CAMPOS_COMPACTOS = {'cpf_cnpj', 'codigo'}
+ORIGEM_POR_MODEL = {fonte['model']: origem for origem, fonte in FONTES_BUSCA.items()}
+
+
+def normalizar_texto(texto):
+    """'José da Silva' -> 'jose da silva'"""
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    return texto.lower()
+
+
+def palavras(texto):
+    """Palavras normalizadas do texto: 'José-Maria' -> ['jose', 'maria']"""
+    return re.findall(r'[a-z0-9]+', normalizar_texto(texto))
+
+
+def termos_do_registro(origem, objeto):
+    """Conjunto de termos indexados de um registro"""
+    termos = set()
+    for campo in FONTES_BUSCA[origem]['campos']:
+        palavras_campo = palavras(getattr(objeto, campo))
+        termos.update(palavra[:TAMANHO_TERMO] for palavra in palavras_campo)
+        if campo in CAMPOS_COMPACTOS and len(palavras_campo) > 1:
+            termos.add(''.join(palavras_campo)[:TAMANHO_TERMO])
+    return termos
+
+
+def _linhas_indice(origem, objetos, DocumentoBusca, TermoBusca):
+    documentos, termos = [], []
+    for objeto in objetos:
+        termos_objeto = sorted(termos_do_registro(origem, objeto))
+        if not termos_objeto:
+            continue
+        documentos.append(DocumentoBusca(
+            empresa_id=objeto.empresa_id, origem=origem, objeto_id=objeto.pk, texto=' '.join(termos_objeto)
+        ))
+        termos += [
+            TermoBusca(empresa_id=objeto.empresa_id, origem=origem, objeto_id=objeto.pk, termo=termo)
+            for termo in termos_objeto
+        ]
+    return documentos, termos
+
+
+def indexar(origem, objetos):
+    """Grava (ou regrava) o índice dos registros. Registros sem texto ficam fora do índice."""
+    from .models import DocumentoBusca, TermoBusca
+
+    objetos = list(objetos)
+    if not objetos:
+        return
+    documentos, termos = _linhas_indice(origem, objetos, DocumentoBusca, TermoBusca)
+    with transaction.atomic():
+        remover(origem, [objeto.pk for objeto in objetos])
+        DocumentoBusca.objects.bulk_create(documentos, batch_size=TAMANHO_LOTE)
+        TermoBusca.objects.bulk_create(termos, batch_size=TAMANHO_LOTE)
+
+
+def indexar_registro(origem, objeto, criado=False):
+    """Atualiza o índice de um registro salvo, apenas se o texto mudou"""
+    from .models import DocumentoBusca
+
+    termos = termos_do_registro(origem, objeto)
+    if criado and not termos:
+        return
+    atual = DocumentoBusca.objects.filter(
+        origem=origem, objeto_id=objeto.pk
+    ).values_list('empresa_id', 'texto').first()
+    if atual == (objeto.empresa_id, ' '.join(sorted(termos))) or (atual is None and not termos):
+        return
+    indexar(origem, [objeto])
+
+
+def remover(origem, objeto_ids):
+    from .models import DocumentoBusca, TermoBusca
+
+    objeto_ids = list(objeto_ids)
+    for inicio in range(0, len(objeto_ids), TAMANHO_LOTE):
+        lote = objeto_ids[inicio:inicio + TAMANHO_LOTE]
+        DocumentoBusca.objects.filter(origem=origem, objeto_id__in=lote).delete()
+        TermoBusca.objects.filter(origem=origem, objeto_id__in=lote).delete()
+
+
+def reconstruir_indice(origens=None, empresa_ids=None, apps=django_apps):
+    """
+    Apaga e grava novamente o índice das origens (todas por padrão),
+    opcionalmente só das empresas informadas. Retorna o número de
+    registros indexados. `apps` permite o uso em migrações.
+    """
+    DocumentoBusca = apps.get_model('busca', 'DocumentoBusca')
+    TermoBusca = apps.get_model('busca', 'TermoBusca')
+    total = 0
+
+    for origem in origens or list(FONTES_BUSCA):
+        fonte = FONTES_BUSCA[origem]
+        registros = apps.get_model(fonte['model']).objects.only('empresa_id', *fonte['campos'])
+        documentos_antigos = DocumentoBusca.objects.filter(origem=origem)
+        termos_antigos = TermoBusca.objects.filter(origem=origem)
+        if empresa_ids:
+            registros = registros.filter(empresa_id__in=empresa_ids)
+            documentos_antigos = documentos_antigos.filter(empresa_id__in=empresa_ids)
+            termos_antigos = termos_antigos.filter(empresa_id__in=empresa_ids)
+
+        with transaction.atomic():
+            documentos_antigos.delete()
+            termos_antigos.delete()
+            lote = []
+            for objeto in registros.order_by('pk').iterator(chunk_size=TAMANHO_LOTE):
+                lote.append(objeto)
+                if len(lote) == TAMANHO_LOTE:
+                    total += _gravar_lote(origem, lote, DocumentoBusca, TermoBusca)
+                    lote = []
+            total += _gravar_lote(origem, lote, DocumentoBusca, TermoBusca)
+
+    return total
+
+
+def _gravar_lote(origem, objetos, DocumentoBusca, TermoBusca):
+    documentos, termos = _linhas_indice(origem, objetos, DocumentoBusca, TermoBusca)
+    DocumentoBusca.objects.bulk_create(documentos, batch_size=TAMANHO_LOTE)
+    TermoBusca.objects.bulk_create(termos, batch_size=TAMANHO_LOTE)
+    return len(documentos)
+
+
+def proximo_prefixo(prefixo):
+    """
+    Menor texto maior que todos os que começam com o prefixo, no alfabeto
+    dos termos ('jo' -> 'jp', 'az' -> 'b'); None se não houver ('zz').
+    """
+    while prefixo:
+        posicao = ALFABETO.index(prefixo[-1])
+        if posicao + 1 < len(ALFABETO):
+            return prefixo[:-1] + ALFABETO[posicao + 1]
+        prefixo = prefixo[:-1]
+    return None
+
+
+def usar_fulltext(palavra):
+    return (
+        settings.BUSCA_FULLTEXT
+        and connection.vendor == 'mysql'
+        and len(palavra) >= settings.BUSCA_FULLTEXT_MIN_TERMO
+    )
+
+
+def ids_por_prefixo(origem, palavra, empresa_id=None):
+    """
+    Subquery com os ids dos registros da origem que têm alguma palavra
+    começando por `palavra` (já normalizada).
+    """
+    from .models import DocumentoBusca, TermoBusca
+
+    palavra = palavra[:TAMANHO_TERMO]
+    if usar_fulltext(palavra):
+        linhas = DocumentoBusca.objects.filter(
+            origem=origem
+        ).filter(RawSQL(
+            'MATCH (texto) AGAINST (%s IN BOOLEAN MODE)', [f'{palavra}*'], output_field=BooleanField()
+        ))
+    else:
+        linhas = TermoBusca.objects.filter(origem=origem, termo__gte=palavra)
+        limite = proximo_prefixo(palavra)
+        if limite:
+            linhas = linhas.filter(termo__lt=limite)
+    if empresa_id:
+        linhas = linhas.filter(empresa_id=empresa_id)
+    return linhas.values('objeto_id')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from busca.indice import FONTES_BUSCA, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Reconstroi o indice de busca de clientes, produtos e vendas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--origem',
+            action='append',
+            choices=list(FONTES_BUSCA),
+            help='Origem a reconstruir (pode ser repetido). Padrao: todas'
+        )
+        parser.add_argument(
+            '--empresa',
+            action='append',
+            type=int,
+            help='ID da empresa a reconstruir (pode ser repetido). Padrao: todas'
+        )
+
+    def handle(self, *args, **options):
+        origens = options['origem'] or list(FONTES_BUSCA)
+        self.stdout.write(f"Reconstruindo indice de busca: {', '.join(origens)}...")
+
+        total = reconstruir_indice(origens=origens, empresa_ids=options['empresa'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total} registros indexados.'))
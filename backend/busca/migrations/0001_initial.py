@@ -0,0 +1,74 @@
+# Generated by Django 5.0 on 2026-10-18 06:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def criar_fulltext(apps, schema_editor):
+    """Índice FULLTEXT do texto dos documentos (somente MySQL)"""
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX busca_documento_texto_ft ON busca_documentobusca (texto)'
+        )
+
+
+def remover_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX busca_documento_texto_ft ON busca_documentobusca')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origem', models.CharField(choices=[('CLIENTE', 'Cliente'), ('PRODUTO', 'Produto'), ('VENDA', 'Venda')], max_length=10, verbose_name='Origem')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID do Registro')),
+                ('texto', models.TextField(verbose_name='Texto')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Documento de Busca',
+                'verbose_name_plural': 'Documentos de Busca',
+            },
+        ),
+        migrations.CreateModel(
+            name='TermoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origem', models.CharField(choices=[('CLIENTE', 'Cliente'), ('PRODUTO', 'Produto'), ('VENDA', 'Venda')], max_length=10, verbose_name='Origem')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID do Registro')),
+                ('termo', models.CharField(max_length=50, verbose_name='Termo')),
+                ('empresa', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Termo de Busca',
+                'verbose_name_plural': 'Termos de Busca',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentobusca',
+            constraint=models.UniqueConstraint(fields=('origem', 'objeto_id'), name='busca_documento_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='termobusca',
+            index=models.Index(fields=['empresa', 'origem', 'termo'], name='busca_termo_empresa_1837da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='termobusca',
+            index=models.Index(fields=['origem', 'termo'], name='busca_termo_origem_3c7ab5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='termobusca',
+            index=models.Index(fields=['origem', 'objeto_id'], name='busca_termo_origem_f610ff_idx'),
+        ),
+        migrations.RunPython(criar_fulltext, remover_fulltext),
+    ]
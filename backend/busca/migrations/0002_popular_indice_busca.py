@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def popular_indice(apps, schema_editor):
+    """Indexa os clientes, produtos e vendas já existentes"""
+    from busca.indice import reconstruir_indice
+
+    reconstruir_indice(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busca', '0001_initial'),
+        ('vendas', '0006_popular_totais_clientes'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_indice, migrations.RunPython.noop),
+    ]
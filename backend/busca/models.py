@@ -0,0 +1,67 @@
+from django.db import models
+
+
+ORIGEM_CHOICES = [
+    ('CLIENTE', 'Cliente'),
+    ('PRODUTO', 'Produto'),
+    ('VENDA', 'Venda'),
+]
+
+
+class DocumentoBusca(models.Model):
+    """
+    Texto pesquisável de um cliente, produto ou venda, normalizado (minúsculo
+    e sem acentos). No MySQL a coluna texto tem um índice FULLTEXT.
+
+    Mantido pelos signals de busca/signals.py; pode ser reconstruído com
+    `python manage.py reconstruir_indice_busca`.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Empresa'
+    )
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, verbose_name='Origem')
+    objeto_id = models.PositiveBigIntegerField(verbose_name='ID do Registro')
+    texto = models.TextField(verbose_name='Texto')
+
+    class Meta:
+        verbose_name = 'Documento de Busca'
+        verbose_name_plural = 'Documentos de Busca'
+        constraints = [
+            models.UniqueConstraint(fields=['origem', 'objeto_id'], name='busca_documento_unico'),
+        ]
+
+    def __str__(self):
+        return f'{self.origem} #{self.objeto_id}'
+
+
+class TermoBusca(models.Model):
+    """
+    Uma palavra normalizada de um registro. A busca por prefixo é uma faixa
+    (termo >= 'jo' AND termo < 'jp') sobre o índice (empresa, origem, termo),
+    usada em qualquer banco e para termos curtos no MySQL.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,
+        verbose_name='Empresa'
+    )
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, verbose_name='Origem')
+    objeto_id = models.PositiveBigIntegerField(verbose_name='ID do Registro')
+    termo = models.CharField(max_length=50, verbose_name='Termo')
+
+    class Meta:
+        verbose_name = 'Termo de Busca'
+        verbose_name_plural = 'Termos de Busca'
+        indexes = [
+            models.Index(fields=['empresa', 'origem', 'termo']),
+            models.Index(fields=['origem', 'termo']),
+            models.Index(fields=['origem', 'objeto_id']),
+        ]
+
+    def __str__(self):
+        return f'{self.origem} #{self.objeto_id}: {self.termo}'
@@ -0,0 +1,36 @@
+"""
+Signals que mantêm o índice de busca atualizado a cada gravação ou exclusão
+de Cliente, Produto e Venda.
+
+Gravações que não alteram os campos indexados (como a baixa de estoque com
+update_fields) não consultam o índice; as demais só o regravam se o texto
+normalizado mudou.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from relatorios.signals import sinais_suspensos
+from vendas.models import Cliente, Produto, Venda
+from .indice import FONTES_BUSCA, ORIGEM_POR_MODEL, indexar_registro, remover
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Produto)
+@receiver(post_save, sender=Venda)
+def indexar_apos_salvar(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or sinais_suspensos():
+        return
+    origem = ORIGEM_POR_MODEL[sender._meta.label]
+    campos = FONTES_BUSCA[origem]['campos']
+    if update_fields and not set(update_fields) & {'empresa', 'empresa_id', *campos}:
+        return
+    indexar_registro(origem, instance, criado=created)
+
+
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Produto)
+@receiver(post_delete, sender=Venda)
+def remover_apos_excluir(sender, instance, **kwargs):
+    if sinais_suspensos():
+        return
+    remover(ORIGEM_POR_MODEL[sender._meta.label], [instance.pk])
@@ -6,6 +6,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Categoria
 from .serializers import CategoriaSerializer, CategoriaListSerializer
+from usuarios.contexto import contexto_tenant
 from usuarios.permissions import IsAdminChefe
 
 
@@ -42,9 +43,7 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         Retorna todas as categorias para Admin Chefe.
         Para outros usuários, retorna apenas categorias ativas.
         """
-        user = self.request.user
-
-        if user.tipo_usuario == 'ADMIN_CHEFE':
+        if contexto_tenant(self.request).admin_chefe:
             return Categoria.objects.all()
 
         return Categoria.objects.filter(ativa=True)
@@ -84,7 +83,7 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         Endpoint: POST /api/categorias/reordenar/
         Body: { "ordem": [id1, id2, id3, ...] }
         """
-        if request.user.tipo_usuario != 'ADMIN_CHEFE':
+        if not contexto_tenant(request).admin_chefe:
             return Response(
                 {'detail': 'Apenas Admin Chefe pode reordenar categorias.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+    verbose_name = 'Core'
+
+    def ready(self):
+        # Instrumentação dos serializers feita uma vez, com os apps carregados,
+        # e não como efeito da importação de core.metricas
+        if settings.METRICAS_ATIVAS:
+            from .metricas import instrumentar_serializers
+            instrumentar_serializers()
@@ -0,0 +1,20 @@
+"""
+Utilitários de cache comuns aos apps.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# Backends locais a cada processo: uma gravação em um worker não é vista pelos demais
+BACKENDS_LOCAIS = (LocMemCache, DummyCache)
+
+
+def cache_compartilhado(alias='default'):
+    """
+    True se o cache é visto por todos os processos (banco, arquivo, Redis,
+    Memcached). Versões guardadas em um cache local ficam desatualizadas nos
+    demais workers até expirarem, então quem depende delas para invalidar
+    dados deve consultar o banco quando esta função retorna False.
+    """
+    return not isinstance(caches[alias], BACKENDS_LOCAIS)
@@ -0,0 +1,121 @@
+"""
+Sparse fieldsets (?fields=) e serializers compactos para as listagens.
+
+- CamposDinamicosMixin (serializers): restringe os campos serializados aos
+  informados em ?fields=id,nome,...
+- CamposEsparsosMixin (viewsets): usa o serializer compacto na listagem,
+  troca para o serializer completo quando ?fields= é informado e limita o
+  queryset com .only() aos campos do model realmente usados.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+def campos_solicitados(request):
+    """Campos informados em ?fields= (None quando não informado)"""
+    if request is None or request.method != 'GET':
+        return None
+    valor = request.query_params.get('fields')
+    if not valor:
+        return None
+    return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+
+class CamposDinamicosMixin:
+    """
+    Serializer que aceita ?fields= para retornar apenas alguns campos.
+    Campos inexistentes são ignorados; só o serializer raiz é afetado.
+
+    Campos calculados (properties) podem declarar em Meta.campos_dependentes
+    os campos do model de que dependem, usados pelo .only() do viewset.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Serializers aninhados são instanciados sem contexto (sem request)
+        campos = campos_solicitados(self.context.get('request'))
+        if campos:
+            for nome in set(self.fields) - campos:
+                self.fields.pop(nome)
+
+
+class CamposEsparsosMixin:
+    """
+    Mixin de ViewSet para listagens enxutas.
+
+    O ViewSet define list_serializer_class (serializer compacto usado na
+    listagem sem ?fields=). Em list e retrieve, o queryset é limitado com
+    .only() aos campos do model usados pelos campos serializados.
+    """
+    list_serializer_class = None
+    # Campos sempre carregados: a empresa é lida pelo MultiTenantPermission
+    campos_obrigatorios = ['empresa']
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if (
+            self.action == 'list'
+            and self.list_serializer_class is not None
+            and campos_solicitados(self.request) is None
+        ):
+            return self.list_serializer_class
+        return serializer_class
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in ['list', 'retrieve']:
+            queryset = self.limitar_campos(queryset)
+        return queryset
+
+    def limitar_campos(self, queryset):
+        """Aplica .only() e descarta joins e prefetches não usados pelo serializer"""
+        serializer = self.get_serializer()
+        model = queryset.model
+        dependentes = getattr(getattr(serializer, 'Meta', None), 'campos_dependentes', {})
+        relacionados = queryset.query.select_related
+        if not isinstance(relacionados, dict):
+            relacionados = {}
+
+        campos_model = {model._meta.pk.name}
+        for nome in self.campos_obrigatorios:
+            try:
+                model._meta.get_field(nome)
+                campos_model.add(nome)
+            except FieldDoesNotExist:
+                pass
+        usados = set()
+        for nome, campo in serializer.fields.items():
+            if nome in dependentes:
+                campos_model.update(dependentes[nome])
+                continue
+            if campo.source == '*':
+                continue
+            caminho = campo.source.split('.')
+            usados.add(caminho[0])
+            try:
+                campo_model = model._meta.get_field(caminho[0])
+            except FieldDoesNotExist:
+                continue
+            if campo_model.one_to_many or campo_model.many_to_many:
+                continue  # relação reversa, carregada por prefetch
+            campos_model.add(caminho[0])
+
+            # Campo da relação carregada por select_related: limita as colunas
+            if campo_model.is_relation and len(caminho) > 1 and caminho[0] in relacionados:
+                try:
+                    campo_model.related_model._meta.get_field(caminho[1])
+                    campos_model.add(f'{caminho[0]}__{caminho[1]}')
+                except FieldDoesNotExist:
+                    pass  # método do model relacionado: carrega o objeto inteiro
+
+        # Mantém apenas os joins e prefetches usados pelos campos serializados
+        usados_relacionados = [relacao for relacao in relacionados if relacao in usados]
+        queryset = queryset.select_related(None)
+        if usados_relacionados:
+            queryset = queryset.select_related(*usados_relacionados)
+        prefetches = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0] in usados
+        ]
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+
+        return queryset.only(*campos_model)
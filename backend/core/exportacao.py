@@ -0,0 +1,147 @@
+"""
+Exportação das listagens em CSV e XLSX.
+
+As linhas são lidas em páginas keyset de export_chunk_size registros: cada
+página é uma consulta com LIMIT que continua depois da última linha lida
+(WHERE (campo, pk) > (valor, id), na ordenação da listagem). Ao contrário
+de iterator(chunk_size), que no MySQL carrega todo o resultado no cliente,
+a memória usada não depende da quantidade de registros exportados.
+"""
+import csv
+import tempfile
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+class Echo:
+    """Pseudo-buffer: csv.writer escreve e a linha é devolvida ao gerador"""
+
+    def write(self, value):
+        return value
+
+
+def chaves_keyset(queryset):
+    """
+    [(campo, decrescente)] da ordenação do queryset, terminando no pk, que
+    desempata. Só campos do próprio model e não nulos entram na chave; com
+    outra ordenação (relacionados, expressões, aleatória), as linhas saem
+    na ordem do pk.
+    """
+    ordenacao = queryset.query.order_by or queryset.model._meta.ordering
+    chaves = []
+    for item in ordenacao:
+        if not isinstance(item, str) or item == '?':
+            return [('pk', False)]
+        nome = item.lstrip('-')
+        if nome == 'pk':
+            chaves.append(('pk', item.startswith('-')))
+            break
+        try:
+            campo = queryset.model._meta.get_field(nome)
+        except FieldDoesNotExist:
+            return [('pk', False)]
+        if not campo.concrete or campo.null or campo.is_relation:
+            return [('pk', False)]
+        chaves.append((nome, item.startswith('-')))
+    if not chaves or chaves[-1][0] != 'pk':
+        chaves.append(('pk', False))
+    return chaves
+
+
+def depois_de(chaves, posicao):
+    """Filtro das linhas posteriores à posição (valores das chaves) na ordenação"""
+    condicoes = []
+    iguais = {}
+    for (campo, decrescente), valor in zip(chaves, posicao):
+        condicoes.append(Q(**iguais, **{f"{campo}__{'lt' if decrescente else 'gt'}": valor}))
+        iguais[campo] = valor
+    return reduce(or_, condicoes)
+
+
+def linhas_keyset(queryset, campos, chunk_size):
+    """values_list(*campos) do queryset inteiro, lido em páginas keyset de chunk_size"""
+    chaves = chaves_keyset(queryset)
+    queryset = queryset.order_by(*[f'-{campo}' if decrescente else campo for campo, decrescente in chaves])
+    colunas = len(campos)
+    posicao = None
+    while True:
+        pagina = queryset if posicao is None else queryset.filter(depois_de(chaves, posicao))
+        linhas = list(pagina.values_list(*campos, *[campo for campo, _ in chaves])[:chunk_size])
+        for linha in linhas:
+            yield linha[:colunas]
+        if len(linhas) < chunk_size:
+            return
+        posicao = linhas[-1][colunas:]
+
+
+class ExportacaoMixin:
+    """
+    Adiciona a action `export` (GET .../export/?formato=csv|xlsx) a um
+    ViewSet. Usa os mesmos filtros, busca, ordenação e escopo de empresa da
+    listagem (filter_queryset(get_queryset())).
+
+    O ViewSet define:
+    - export_campos: lista de (campo, cabeçalho); aceita campos relacionados
+      (ex.: 'cliente__nome')
+    - export_nome: prefixo do nome do arquivo
+    """
+    export_campos = []
+    export_nome = 'exportacao'
+    export_chunk_size = 2000
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # "format" é reservado pelo DRF para a negociação de conteúdo
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in ('csv', 'xlsx'):
+            return Response({'error': 'formato invalido. Use: csv, xlsx'}, status=400)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        campos = [campo for campo, _ in self.export_campos]
+        cabecalho = [titulo for _, titulo in self.export_campos]
+        linhas = linhas_keyset(queryset, campos, self.export_chunk_size)
+
+        nome_arquivo = f"{self.export_nome}_{timezone.now():%Y%m%d_%H%M%S}.{formato}"
+        if formato == 'xlsx':
+            return self.exportar_xlsx(cabecalho, linhas, nome_arquivo)
+        return self.exportar_csv(cabecalho, linhas, nome_arquivo)
+
+    def exportar_csv(self, cabecalho, linhas, nome_arquivo):
+        writer = csv.writer(Echo())
+
+        def gerar():
+            # BOM para o Excel reconhecer o arquivo como UTF-8
+            yield '\ufeff' + writer.writerow(cabecalho)
+            for linha in linhas:
+                yield writer.writerow(linha)
+
+        response = StreamingHttpResponse(gerar(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        return response
+
+    def exportar_xlsx(self, cabecalho, linhas, nome_arquivo):
+        # Modo write-only: as linhas são gravadas em disco à medida que chegam
+        workbook = Workbook(write_only=True)
+        planilha = workbook.create_sheet(title=self.export_nome[:31])
+        planilha.append(cabecalho)
+        for linha in linhas:
+            planilha.append(linha)
+
+        arquivo = tempfile.TemporaryFile()
+        workbook.save(arquivo)
+        arquivo.seek(0)
+
+        return FileResponse(
+            arquivo,
+            as_attachment=True,
+            filename=nome_arquivo,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
@@ -0,0 +1,123 @@
+"""
+Registros usados pelos testes das apps (empresas, usuários, clientes,
+produtos, vendas, despesas e receitas) e clientes da API autenticados.
+"""
+import itertools
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APIClient
+
+from categorias.models import Categoria
+from despesas.models import Despesa
+from empresas.models import Empresa
+from receitas.models import Receita
+from usuarios.models import Usuario
+from usuarios.serializers import CustomTokenObtainPairSerializer
+from vendas.models import Cliente, ItemVenda, Produto, Venda
+
+
+_sequencia = itertools.count(1)
+
+
+def criar_empresa(**campos):
+    numero = next(_sequencia)
+    dados = {
+        'nome': f'Empresa {numero}',
+        'razao_social': f'Empresa {numero} LTDA',
+        'cnpj': f'{numero:014d}',
+        'email': f'empresa{numero}@teste.com',
+    }
+    dados.update(campos)
+    return Empresa.objects.create(**dados)
+
+
+def criar_usuario(empresa=None, tipo_usuario='ADMIN_EMPRESA', **campos):
+    numero = next(_sequencia)
+    dados = {
+        'email': f'usuario{numero}@teste.com',
+        'password': 'senha-teste',
+        'first_name': 'Usuario',
+        'last_name': str(numero),
+        'tipo_usuario': tipo_usuario,
+        'empresa': empresa,
+    }
+    dados.update(campos)
+    return Usuario.objects.create_user(**dados)
+
+
+def criar_chefe(**campos):
+    return criar_usuario(tipo_usuario='ADMIN_CHEFE', **campos)
+
+
+def criar_cliente(empresa, nome='Cliente', **campos):
+    return Cliente.objects.create(empresa=empresa, nome=nome, **campos)
+
+
+def criar_produto(empresa, nome='Produto', preco='10.00', estoque=100, **campos):
+    return Produto.objects.create(empresa=empresa, nome=nome, preco=Decimal(preco), estoque=estoque, **campos)
+
+
+def criar_venda(empresa, cliente, usuario, itens=(), valor_total='100.00', status='PAGA',
+                data_venda=None, **campos):
+    """Venda com itens [(produto, quantidade)], sem baixar estoque"""
+    venda = Venda.objects.create(
+        empresa=empresa,
+        cliente=cliente,
+        usuario_cadastro=usuario,
+        valor_total=Decimal(valor_total),
+        status=status,
+        data_venda=data_venda or date.today(),
+        forma_pagamento=campos.pop('forma_pagamento', 'PIX'),
+        **campos,
+    )
+    for produto, quantidade in itens:
+        ItemVenda.objects.create(venda=venda, produto=produto, quantidade=quantidade, preco_unitario=produto.preco)
+    return venda
+
+
+def criar_categoria(nome='Categoria', tipo='DESPESA', **campos):
+    return Categoria.objects.create(nome=nome, tipo=tipo, **campos)
+
+
+def criar_despesa(empresa, categoria, usuario, valor='50.00', status='PENDENTE', data_vencimento=None, **campos):
+    return Despesa.objects.create(
+        empresa=empresa,
+        categoria=categoria,
+        usuario_cadastro=usuario,
+        descricao=campos.pop('descricao', 'Despesa'),
+        valor=Decimal(valor),
+        status=status,
+        data_vencimento=data_vencimento or date.today(),
+        forma_pagamento=campos.pop('forma_pagamento', 'PIX'),
+        **campos,
+    )
+
+
+def criar_receita(empresa, categoria, usuario, valor='80.00', status='PENDENTE', data_prevista=None, **campos):
+    return Receita.objects.create(
+        empresa=empresa,
+        categoria=categoria,
+        usuario_cadastro=usuario,
+        descricao=campos.pop('descricao', 'Receita'),
+        valor=Decimal(valor),
+        status=status,
+        data_prevista=data_prevista or date.today(),
+        forma_recebimento=campos.pop('forma_recebimento', 'PIX'),
+        **campos,
+    )
+
+
+def cliente_api(usuario):
+    """APIClient autenticado com force_authenticate (sem token)"""
+    cliente = APIClient()
+    cliente.force_authenticate(user=usuario)
+    return cliente
+
+
+def cliente_jwt(usuario):
+    """APIClient com um token de acesso emitido como no login"""
+    cliente = APIClient()
+    token = CustomTokenObtainPairSerializer.get_token(usuario).access_token
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return cliente
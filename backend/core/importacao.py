@@ -0,0 +1,484 @@
+"""
+Importação de despesas e receitas a partir de arquivos CSV e XLSX.
+
+O arquivo é lido linha a linha (csv.reader ou openpyxl em modo
+read-only) e gravado em lotes com bulk_create, então a memória usada não
+depende do tamanho do arquivo. As categorias são resolvidas pelo nome com um
+único dicionário carregado no início. Linhas inválidas não interrompem a
+importação: são gravadas em um relatório de erros CSV (número da linha,
+erros e os valores originais) que pode ser corrigido e importado de novo.
+
+Os cabeçalhos aceitos são os nomes dos campos do model ou os seus
+verbose_name (ex.: "data_vencimento" ou "Data de Vencimento"), sem
+diferenciar acentos e maiúsculas; o arquivo gerado pela exportação
+(core/exportacao.py) pode ser importado diretamente. Arquivos CSV podem
+estar em UTF-8 ou, como os salvos pelo Excel no Windows, em Windows-1252.
+"""
+import codecs
+import csv
+import io
+import re
+import unicodedata
+import uuid
+import zipfile
+from datetime import date, datetime
+from xml.etree.ElementTree import ParseError
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.http import FileResponse, Http404
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+from categorias.models import Categoria
+from empresas.models import Empresa
+from relatorios.resumo import FONTES, atualizar_resumo
+from usuarios.contexto import contexto_tenant
+from usuarios.models import Usuario
+
+
+TAMANHO_LOTE = 1000
+
+# Quantidade de erros devolvidos na resposta (o relatório traz todos)
+AMOSTRA_ERROS = 20
+
+# Blocos lidos ao conferir a codificação do CSV
+TAMANHO_BLOCO = 64 * 1024
+
+# Erros do openpyxl com arquivos que não são XLSX válidos (zip corrompido,
+# partes ausentes ou XML truncado)
+ERROS_XLSX = (zipfile.BadZipFile, InvalidFileException, KeyError, ValueError, ParseError)
+
+# DD/MM/AAAA, DD/MM/AA ou DD-MM-AAAA
+DATA_BR = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{2}|\d{4})')
+
+
+class ErroImportacao(Exception):
+    """Arquivo que não pode ser importado (formato ou cabeçalho inválido)"""
+
+
+def normalizar(texto):
+    """'Data de Vencimento' -> 'data_de_vencimento' (sem acentos)"""
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', texto.lower()).strip('_')
+
+
+def ler_linhas(arquivo, nome):
+    """
+    Itera as linhas do arquivo como listas de valores; a primeira é o
+    cabeçalho. Linhas vazias são ignoradas. Arquivos que não podem ser
+    lidos (codificação inválida, XLSX corrompido) levantam ErroImportacao.
+    """
+    extensao = Path(nome).suffix.lower()
+    if extensao == '.csv':
+        yield from _ler_csv(arquivo)
+    elif extensao == '.xlsx':
+        yield from _ler_xlsx(arquivo)
+    else:
+        raise ErroImportacao('Formato de arquivo invalido. Use: csv, xlsx')
+
+
+def codificacao_csv(arquivo):
+    """
+    'utf-8-sig' se o arquivo inteiro é UTF-8 válido (com ou sem BOM), senão
+    'cp1252'. O arquivo é lido em blocos, sem carregá-lo na memória, e volta
+    para o início.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b''):
+            decodificador.decode(bloco)
+        decodificador.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp1252'
+    finally:
+        arquivo.seek(0)
+
+
+def _ler_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao_csv(arquivo), newline='')
+    try:
+        primeira = texto.readline()
+        # Planilhas em português costumam exportar CSV com ";"
+        delimitador = ';' if primeira.count(';') > primeira.count(',') else ','
+        for linha in csv.reader(_reencadear(primeira, texto), delimiter=delimitador):
+            if any(valor.strip() for valor in linha):
+                yield linha
+    except UnicodeDecodeError:
+        raise ErroImportacao('Codificacao do arquivo CSV invalida. Use UTF-8 ou Windows-1252')
+    except csv.Error as exc:
+        raise ErroImportacao(f'Arquivo CSV invalido: {exc}')
+
+
+def _ler_xlsx(arquivo):
+    try:
+        workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    except ERROS_XLSX:
+        raise ErroImportacao('Arquivo XLSX invalido ou corrompido')
+    try:
+        for linha in workbook.active.iter_rows(values_only=True):
+            if any(valor not in (None, '') for valor in linha):
+                yield list(linha)
+    except ERROS_XLSX:
+        raise ErroImportacao('Arquivo XLSX invalido ou corrompido')
+    finally:
+        workbook.close()
+
+
+def _reencadear(primeira, resto):
+    yield primeira
+    yield from resto
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.importadas = 0
+        self.total_erros = 0
+        self.amostra_erros = []
+        self.relatorio_erros = None
+
+    def como_dict(self):
+        return {
+            'importadas': self.importadas,
+            'total_erros': self.total_erros,
+            'erros': self.amostra_erros,
+        }
+
+
+class Importador:
+    """
+    Importa linhas de um arquivo para um model com empresa, categoria e
+    usuario_cadastro (Despesa, Receita).
+
+    - campos: campos do model aceitos no arquivo; obrigatoriedade, choices
+      e validadores vêm da definição do model
+    - tipo_categoria: tipo das categorias aceitas ('DESPESA' ou 'RECEITA')
+    - origem: origem do resumo mensal (relatorios.resumo.FONTES)
+    """
+
+    def __init__(self, model, campos, tipo_categoria, origem):
+        self.model = model
+        self.campos = [model._meta.get_field(campo) for campo in campos]
+        self.tipo_categoria = tipo_categoria
+        self.origem = origem
+        self.campo_data = FONTES[origem]['campo_data']
+
+        # Cabeçalho normalizado -> campo: aceita o nome e o verbose_name
+        self.cabecalhos = {}
+        for campo in self.campos:
+            self.cabecalhos[normalizar(campo.name)] = campo
+            self.cabecalhos[normalizar(campo.verbose_name)] = campo
+
+        # Choices aceitas pelo código ou pelo rótulo
+        self.escolhas = {
+            campo.name: {
+                normalizar(texto): codigo
+                for codigo, rotulo in campo.choices
+                for texto in (codigo, rotulo)
+            }
+            for campo in self.campos if campo.choices
+        }
+
+    def obrigatorio(self, campo):
+        return not (campo.blank or campo.null or campo.has_default())
+
+    def categorias(self):
+        """Nome normalizado -> id das categorias ativas do tipo importado"""
+        return {
+            normalizar(nome): categoria_id
+            for categoria_id, nome in Categoria.objects.filter(
+                tipo=self.tipo_categoria, ativa=True
+            ).values_list('id', 'nome')
+        }
+
+    def mapear_cabecalho(self, cabecalho):
+        """Índice da coluna de cada campo; colunas desconhecidas são ignoradas"""
+        colunas = {}
+        for indice, titulo in enumerate(cabecalho):
+            campo = self.cabecalhos.get(normalizar(titulo))
+            if campo is not None and campo.name not in colunas:
+                colunas[campo.name] = indice
+
+        ausentes = [
+            campo.name for campo in self.campos
+            if self.obrigatorio(campo) and campo.name not in colunas
+        ]
+        if ausentes:
+            raise ErroImportacao(f"Colunas obrigatorias ausentes: {', '.join(ausentes)}")
+        return colunas
+
+    def converter_valor(self, campo, valor, categorias):
+        """Converte o valor lido do arquivo para o tipo do campo"""
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor in (None, ''):
+            if self.obrigatorio(campo):
+                raise DjangoValidationError('Este campo é obrigatório.')
+            return campo.get_default() if campo.has_default() else (None if campo.null else '')
+
+        if isinstance(campo, models.ForeignKey):
+            categoria_id = categorias.get(normalizar(valor))
+            if categoria_id is None:
+                raise DjangoValidationError(f'Categoria "{valor}" não encontrada.')
+            return categoria_id
+
+        if campo.choices:
+            codigo = self.escolhas[campo.name].get(normalizar(valor))
+            if codigo is None:
+                raise DjangoValidationError(f'Opção "{valor}" inválida.')
+            return codigo
+
+        if isinstance(campo, models.DecimalField):
+            valor = converter_decimal(valor)
+        elif isinstance(campo, models.DateField):
+            valor = converter_data(valor)
+        else:
+            valor = str(valor)
+
+        campo.run_validators(valor)
+        return valor
+
+    def converter_linha(self, linha, colunas, categorias):
+        """Retorna (dados, erros) de uma linha do arquivo"""
+        dados, erros = {}, {}
+        for campo in self.campos:
+            indice = colunas.get(campo.name)
+            valor = linha[indice] if indice is not None and indice < len(linha) else None
+            try:
+                dados[campo.attname] = self.converter_valor(campo, valor, categorias)
+            except DjangoValidationError as exc:
+                erros[campo.name] = exc.messages
+        return dados, erros
+
+    def importar(self, arquivo, nome, empresa_id, usuario, destino_erros):
+        """
+        Importa o arquivo para a empresa. As linhas válidas são gravadas em
+        lotes de TAMANHO_LOTE; as inválidas vão para o CSV destino_erros
+        (criado somente se houver erros).
+        """
+        linhas = ler_linhas(arquivo, nome)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            raise ErroImportacao('Arquivo vazio')
+        colunas = self.mapear_cabecalho(cabecalho)
+        categorias = self.categorias()
+
+        resultado = ResultadoImportacao()
+        relatorio = RelatorioErros(destino_erros, cabecalho)
+        meses = set()
+
+        with transaction.atomic(), relatorio:
+            lote = []
+            # A linha 1 é o cabeçalho
+            for numero, linha in enumerate(linhas, start=2):
+                dados, erros = self.converter_linha(linha, colunas, categorias)
+                if erros:
+                    resultado.total_erros += 1
+                    if len(resultado.amostra_erros) < AMOSTRA_ERROS:
+                        resultado.amostra_erros.append({'linha': numero, 'erros': erros})
+                    relatorio.adicionar(numero, erros, linha)
+                    continue
+
+                lote.append(self.model(empresa_id=empresa_id, usuario_cadastro=usuario, **dados))
+                meses.add(dados[self.campo_data].replace(day=1))
+                if len(lote) >= TAMANHO_LOTE:
+                    resultado.importadas += len(self.model.objects.bulk_create(lote))
+                    lote = []
+
+            if lote:
+                resultado.importadas += len(self.model.objects.bulk_create(lote))
+
+            # bulk_create não dispara os signals do resumo mensal
+            atualizar_resumo(self.origem, {(empresa_id, mes) for mes in meses})
+
+        resultado.relatorio_erros = relatorio.caminho if resultado.total_erros else None
+        return resultado
+
+
+def converter_decimal(valor):
+    """Aceita números do XLSX e textos como '1234.56', '1.234,56' ou 'R$ 10,00'"""
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor))
+    texto = str(valor).replace('R$', '').replace(' ', '')
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise DjangoValidationError(f'Valor "{valor}" inválido.')
+
+
+def converter_data(valor):
+    """Aceita datas do XLSX e textos em AAAA-MM-DD ou DD/MM/AAAA"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor)
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        pass
+    # strptime é lento para centenas de milhares de linhas
+    encontrado = DATA_BR.fullmatch(texto)
+    if encontrado:
+        dia, mes, ano = (int(parte) for parte in encontrado.groups())
+        try:
+            return date(ano + 2000 if ano < 100 else ano, mes, dia)
+        except ValueError:
+            pass
+    raise DjangoValidationError(f'Data "{valor}" inválida. Use AAAA-MM-DD ou DD/MM/AAAA.')
+
+
+class RelatorioErros:
+    """
+    CSV com as linhas rejeitadas: número da linha, erros e os valores
+    originais. O arquivo só é criado no primeiro erro.
+    """
+
+    def __init__(self, caminho, cabecalho):
+        self.caminho = Path(caminho)
+        self.cabecalho = cabecalho
+        self.arquivo = None
+        self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.arquivo is not None:
+            self.arquivo.close()
+
+    def adicionar(self, numero, erros, linha):
+        if self.writer is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self.arquivo = open(self.caminho, 'w', encoding='utf-8-sig', newline='')
+            self.writer = csv.writer(self.arquivo)
+            self.writer.writerow(['linha', 'erros', *self.cabecalho])
+
+        mensagens = '; '.join(
+            f"{campo}: {' '.join(textos)}" for campo, textos in erros.items()
+        )
+        self.writer.writerow([numero, mensagens, *linha])
+
+
+def caminho_relatorio_erros(empresa_id, token):
+    return Path(settings.IMPORTACAO_ERROS_DIR) / f'{empresa_id}_{token}.csv'
+
+
+class ImportacaoMixin:
+    """
+    Adiciona ao ViewSet:
+    - POST .../importar/ (multipart: arquivo, e empresa para o Admin Chefe)
+    - GET .../importar/erros/{token}/: download do relatório de erros
+
+    O ViewSet define `importador` (instância de Importador).
+    """
+    importador = None
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        arquivo = request.FILES.get('arquivo')
+        if arquivo is None:
+            return Response({'error': 'Envie o arquivo no campo "arquivo"'}, status=400)
+
+        contexto = contexto_tenant(request)
+        if contexto.admin_chefe:
+            empresa_id = request.data.get('empresa')
+            if not empresa_id:
+                return Response({'error': 'empresa e obrigatorio'}, status=400)
+            try:
+                empresa_id = int(empresa_id)
+            except (TypeError, ValueError):
+                return Response({'error': 'empresa invalida'}, status=400)
+            if not Empresa.objects.filter(pk=empresa_id).exists():
+                return Response({'error': 'empresa invalida'}, status=400)
+        else:
+            empresa_id = contexto.empresa_id
+
+        token = uuid.uuid4().hex
+        try:
+            resultado = self.importador.importar(
+                arquivo, arquivo.name, empresa_id, request.user, caminho_relatorio_erros(empresa_id, token)
+            )
+        except ErroImportacao as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        dados = resultado.como_dict()
+        dados['relatorio_erros'] = None
+        if resultado.relatorio_erros:
+            dados['relatorio_erros'] = request.build_absolute_uri(f'erros/{token}/')
+        return Response(dados)
+
+    @action(detail=False, methods=['get'], url_path=r'importar/erros/(?P<token>[0-9a-f]{32})')
+    def erros_importacao(self, request, token):
+        contexto = contexto_tenant(request)
+        if contexto.admin_chefe:
+            caminhos = list(Path(settings.IMPORTACAO_ERROS_DIR).glob(f'*_{token}.csv'))
+        else:
+            caminhos = [caminho_relatorio_erros(contexto.empresa_id, token)]
+
+        caminho = next((caminho for caminho in caminhos if caminho.exists()), None)
+        if caminho is None:
+            raise Http404
+
+        return FileResponse(
+            open(caminho, 'rb'),
+            as_attachment=True,
+            filename=f'erros_importacao_{token[:8]}.csv',
+            content_type='text/csv; charset=utf-8',
+        )
+
+
+class ImportacaoCommand(BaseCommand):
+    """
+    Base dos comandos de importação. A subclasse define `importador`.
+    """
+    importador = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo CSV ou XLSX')
+        parser.add_argument('--empresa', type=int, required=True, help='ID da empresa')
+        parser.add_argument(
+            '--usuario',
+            required=True,
+            help='Email do usuario registrado como responsavel pelo cadastro'
+        )
+        parser.add_argument(
+            '--erros',
+            help='Arquivo CSV do relatorio de erros. Padrao: <arquivo>.erros.csv'
+        )
+
+    def handle(self, *args, **options):
+        if not Empresa.objects.filter(pk=options['empresa']).exists():
+            raise CommandError(f"Empresa {options['empresa']} nao encontrada")
+        try:
+            usuario = Usuario.objects.get(email=options['usuario'])
+        except Usuario.DoesNotExist:
+            raise CommandError(f"Usuario {options['usuario']} nao encontrado")
+
+        caminho = Path(options['arquivo'])
+        destino_erros = options['erros'] or caminho.with_name(caminho.name + '.erros.csv')
+
+        self.stdout.write(f'Importando {caminho}...')
+        try:
+            with open(caminho, 'rb') as arquivo:
+                resultado = self.importador.importar(
+                    arquivo, caminho.name, options['empresa'], usuario, destino_erros
+                )
+        except (ErroImportacao, OSError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f'{resultado.importadas} linhas importadas.'))
+        if resultado.total_erros:
+            self.stdout.write(self.style.WARNING(
+                f'{resultado.total_erros} linhas com erro. Relatorio: {resultado.relatorio_erros}'
+            ))
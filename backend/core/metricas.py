@@ -0,0 +1,294 @@
+"""
+Métricas por rota: duração, consultas SQL, tempo de banco, tempo de
+serialização e tamanho das respostas.
+
+MetricasMiddleware mede cada requisição:
+- consultas e tempo de banco: connection.execute_wrapper em todas as
+  conexões, durante toda a requisição (middlewares, view e renderização);
+- serialização: tempo gasto em serializer.data dos serializers do DRF
+  (só o serializer mais externo conta) e as consultas feitas nesse
+  intervalo, que apontam N+1 em campos relacionados;
+- tamanho: bytes do corpo (Content-Length nas respostas em streaming, que
+  não são lidas pelo middleware).
+
+Nas respostas em streaming (exportações), as consultas e o tempo de envio
+do corpo ficam fora da medição: acontecem depois que o middleware retorna.
+
+Os valores são acumulados em memória, por rota (método e nome da URL), em
+histogramas de faixas fixas, e expostos em GET /api/metrics/ (Admin Chefe).
+Cada processo tem as próprias métricas; a resposta traz o pid. Com
+METRICAS_SERVER_TIMING, as medidas da requisição também vão no cabeçalho
+Server-Timing, exibido nas ferramentas de desenvolvedor do navegador, só
+nas respostas do Admin Chefe (ou de todos, com DEBUG).
+
+A medição de serializer.data é instalada por CoreConfig.ready()
+(core/apps.py) quando METRICAS_ATIVAS está ligado.
+"""
+import os
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+from usuarios.contexto import contexto_tenant
+from usuarios.permissions import IsAdminChefe
+
+
+# Limites superiores das faixas dos histogramas (a última é "+Inf")
+FAIXAS_DURACAO_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+FAIXAS_CONSULTAS = [0, 1, 2, 5, 10, 20, 50, 100, 200]
+ROTA_NAO_RESOLVIDA = '<nao resolvida>'
+
+_medicao_atual = ContextVar('medicao_requisicao', default=None)
+
+
+class MedicaoRequisicao:
+    """Medidas de uma requisição; também é o execute_wrapper das conexões"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.tempo_serializacao = 0.0
+        self.consultas_serializacao = 0
+        self.serializando = False
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_banco += time.perf_counter() - inicio
+            self.consultas += 1
+            if self.serializando:
+                self.consultas_serializacao += 1
+
+
+_data_original = BaseSerializer.data
+
+
+def _data_medido(serializer):
+    medicao = _medicao_atual.get()
+    if medicao is None or medicao.serializando:
+        return _data_original.fget(serializer)
+    medicao.serializando = True
+    inicio = time.perf_counter()
+    try:
+        return _data_original.fget(serializer)
+    finally:
+        medicao.tempo_serializacao += time.perf_counter() - inicio
+        medicao.serializando = False
+
+
+def instrumentar_serializers():
+    """
+    Mede serializer.data de todos os serializers. Serializer.data e
+    ListSerializer.data delegam a BaseSerializer.data, que é substituído
+    uma única vez por processo.
+    """
+    if BaseSerializer.data.fget is not _data_medido:
+        BaseSerializer.data = property(_data_medido)
+
+
+class Histograma:
+    """Contagem por faixa, soma e máximo de uma medida"""
+
+    def __init__(self, faixas):
+        self.faixas = faixas
+        self.contagens = [0] * (len(faixas) + 1)
+        self.soma = 0
+        self.maximo = 0
+
+    def registrar(self, valor):
+        posicao = next((i for i, limite in enumerate(self.faixas) if valor <= limite), len(self.faixas))
+        self.contagens[posicao] += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def percentil(self, fracao):
+        """Limite superior da faixa que contém o percentil, limitado ao máximo"""
+        total = sum(self.contagens)
+        acumulado = 0
+        for posicao, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if total and acumulado >= fracao * total:
+                return min(self.faixas[posicao], self.maximo) if posicao < len(self.faixas) else self.maximo
+        return 0
+
+    def resumo(self, total):
+        return {
+            'media': round(self.soma / total, 2) if total else 0,
+            'max': round(self.maximo, 2),
+            'p50': round(self.percentil(0.5), 2),
+            'p95': round(self.percentil(0.95), 2),
+            'histograma': {
+                **{str(limite): contagem for limite, contagem in zip(self.faixas, self.contagens)},
+                '+Inf': self.contagens[-1],
+            },
+        }
+
+
+class MetricasRota:
+    def __init__(self):
+        self.requisicoes = 0
+        self.erros = 0
+        self.duracao_ms = Histograma(FAIXAS_DURACAO_MS)
+        self.consultas = Histograma(FAIXAS_CONSULTAS)
+        self.consultas_serializacao = Histograma(FAIXAS_CONSULTAS)
+        self.banco_ms = Histograma(FAIXAS_DURACAO_MS)
+        self.serializacao_ms = Histograma(FAIXAS_DURACAO_MS)
+        self.respostas_medidas = 0
+        self.bytes_soma = 0
+        self.bytes_maximo = 0
+
+    def registrar(self, medicao, duracao_ms, status, tamanho):
+        self.requisicoes += 1
+        if status >= 500:
+            self.erros += 1
+        self.duracao_ms.registrar(duracao_ms)
+        self.consultas.registrar(medicao.consultas)
+        self.consultas_serializacao.registrar(medicao.consultas_serializacao)
+        self.banco_ms.registrar(medicao.tempo_banco * 1000)
+        self.serializacao_ms.registrar(medicao.tempo_serializacao * 1000)
+        if tamanho is not None:
+            self.respostas_medidas += 1
+            self.bytes_soma += tamanho
+            self.bytes_maximo = max(self.bytes_maximo, tamanho)
+
+    def resumo(self, rota):
+        total = self.requisicoes
+        return {
+            'rota': rota,
+            'requisicoes': total,
+            'erros': self.erros,
+            'tempo_total_ms': round(self.duracao_ms.soma, 2),
+            'duracao_ms': self.duracao_ms.resumo(total),
+            'consultas': self.consultas.resumo(total),
+            'consultas_serializacao': self.consultas_serializacao.resumo(total),
+            'banco_ms': self.banco_ms.resumo(total),
+            'serializacao_ms': self.serializacao_ms.resumo(total),
+            'bytes': {
+                'media': round(self.bytes_soma / self.respostas_medidas) if self.respostas_medidas else 0,
+                'max': self.bytes_maximo,
+            },
+        }
+
+
+class RegistroMetricas:
+    """Métricas do processo, por rota"""
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        with self.trava:
+            self.rotas = {}
+            self.desde = timezone.now()
+
+    def registrar(self, rota, medicao, duracao_ms, status, tamanho):
+        with self.trava:
+            metricas = self.rotas.get(rota)
+            if metricas is None:
+                metricas = self.rotas[rota] = MetricasRota()
+            metricas.registrar(medicao, duracao_ms, status, tamanho)
+
+    def resumo(self):
+        """Rotas da que consumiu mais tempo no total para a que consumiu menos"""
+        with self.trava:
+            rotas = [metricas.resumo(rota) for rota, metricas in self.rotas.items()]
+            desde = self.desde
+        rotas.sort(key=lambda rota: rota['tempo_total_ms'], reverse=True)
+        return {'processo': os.getpid(), 'desde': desde.isoformat(), 'rotas': rotas}
+
+
+registro = RegistroMetricas()
+
+
+def nome_rota(request):
+    """'GET venda-list': método e nome da URL, sem os parâmetros (ids)"""
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return f'{request.method} {ROTA_NAO_RESOLVIDA}'
+    return f'{request.method} {resolver_match.view_name or resolver_match.route}'
+
+
+def tamanho_resposta(response):
+    if response.streaming:
+        tamanho = response.get('Content-Length')
+        return int(tamanho) if tamanho else None
+    return len(response.content)
+
+
+def server_timing(medicao, duracao_ms):
+    return ', '.join([
+        f'db;dur={medicao.tempo_banco * 1000:.1f};desc="{medicao.consultas} consultas"',
+        f'ser;dur={medicao.tempo_serializacao * 1000:.1f};desc="serializacao"',
+        f'total;dur={duracao_ms:.1f}',
+    ])
+
+
+def mostrar_server_timing(request):
+    """Os tempos internos só vão para o Admin Chefe, ou para todos com DEBUG"""
+    if not settings.METRICAS_SERVER_TIMING:
+        return False
+    if settings.DEBUG:
+        return True
+    if not hasattr(request, 'user'):
+        return False
+    contexto = contexto_tenant(request)
+    return contexto.autenticado and contexto.admin_chefe
+
+
+class MetricasMiddleware:
+    """
+    Mede cada requisição e acumula as métricas da rota. Fica no início de
+    MIDDLEWARE para incluir o tempo e as consultas dos demais middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICAS_ATIVAS:
+            return self.get_response(request)
+
+        medicao = MedicaoRequisicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(medicao))
+                response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        registro.registrar(
+            nome_rota(request), medicao, duracao_ms, response.status_code, tamanho_resposta(response)
+        )
+        if mostrar_server_timing(request):
+            response['Server-Timing'] = server_timing(medicao, duracao_ms)
+        return response
+
+
+class MetricasView(APIView):
+    """
+    GET /api/metrics/: métricas por rota deste processo.
+    DELETE /api/metrics/: zera as métricas deste processo.
+    """
+    permission_classes = [IsAdminChefe]
+
+    def get(self, request):
+        return Response(registro.resumo())
+
+    def delete(self, request):
+        registro.limpar()
+        return Response(status=204)
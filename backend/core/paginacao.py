@@ -0,0 +1,164 @@
+"""
+Paginação por cursor (keyset) opcional para as listagens.
+
+A paginação padrão (?page=) faz um COUNT(*) e um OFFSET a cada página, que
+ficam mais lentos quanto mais fundo no histórico. Com ?paginacao=cursor a
+listagem usa a posição do último registro da página (data, id) como
+cursor: a próxima página é lida com WHERE (data, id) < (d, i) pelo índice
+(empresa, data_*), então qualquer página custa o mesmo que a primeira.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+MODOS_PAGINACAO = ('pagina', 'cursor')
+
+
+class PaginacaoKeyset(BasePagination):
+    """
+    Paginação keyset pela ordenação (campo, pk), ambos decrescentes.
+
+    A ordenação do ?ordering= é ignorada neste modo: o cursor só é válido
+    para a ordenação da qual foi gerado.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def __init__(self, campo):
+        self.campo = campo
+        self.page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        model_campo = queryset.model._meta.get_field(self.campo)
+
+        posicao, reverso = self.decodificar_cursor(request, model_campo)
+
+        # A posição dos registros precisa estar carregada mesmo com .only()
+        campos_carregados, defer = queryset.query.deferred_loading
+        if campos_carregados and not defer:
+            queryset = queryset.only(*campos_carregados, self.campo)
+
+        if reverso:
+            ordenacao = (self.campo, 'pk')
+        else:
+            ordenacao = (f'-{self.campo}', '-pk')
+        queryset = queryset.order_by(*ordenacao)
+
+        if posicao is not None:
+            valor, pk = posicao
+            maior, menor = ('gt', 'gte') if reverso else ('lt', 'lte')
+            # (campo, pk) < (valor, pk), escrito com o range campo <= valor
+            # para o banco usar o índice (empresa, campo)
+            queryset = queryset.filter(
+                Q(**{f'{self.campo}__{menor}': valor}),
+                Q(**{f'{self.campo}__{maior}': valor}) | Q(**{f'pk__{maior}': pk}),
+            )
+
+        registros = list(queryset[:page_size + 1])
+        tem_mais = len(registros) > page_size
+        registros = registros[:page_size]
+
+        if reverso:
+            registros.reverse()
+            self.tem_anterior = tem_mais
+            self.tem_proxima = posicao is not None
+        else:
+            self.tem_anterior = posicao is not None
+            self.tem_proxima = tem_mais
+
+        self.registros = registros
+        return registros
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def posicao(self, registro):
+        return [getattr(registro, self.campo).isoformat(), registro.pk]
+
+    def decodificar_cursor(self, request, model_campo):
+        """Retorna ((valor, pk), reverso) ou (None, False) sem cursor"""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            valor, pk = dados['p']
+            return (model_campo.to_python(valor), int(pk)), bool(dados.get('r'))
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound('Cursor invalido.')
+
+    def codificar_cursor(self, registro, reverso):
+        dados = {'p': self.posicao(registro)}
+        if reverso:
+            dados['r'] = 1
+        cursor = base64.urlsafe_b64encode(json.dumps(dados).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.tem_proxima or not self.registros:
+            return None
+        return self.codificar_cursor(self.registros[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.tem_anterior:
+            return None
+        if not self.registros:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.codificar_cursor(self.registros[0], reverso=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PaginacaoCursorMixin:
+    """
+    Mixin de ViewSet: ?paginacao=cursor troca a paginação da listagem pela
+    PaginacaoKeyset no campo `cursor_campo`. Sem o parâmetro (ou com
+    ?paginacao=pagina) a paginação padrão por número de página é mantida.
+    """
+    cursor_campo = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            modo = self.request.query_params.get('paginacao', 'pagina') if self.request else 'pagina'
+            if modo not in MODOS_PAGINACAO:
+                raise ValidationError({'error': 'paginacao invalida. Use: pagina, cursor'})
+            if modo == 'cursor' and self.cursor_campo:
+                self._paginator = PaginacaoKeyset(self.cursor_campo)
+            else:
+                self._paginator = None if self.pagination_class is None else self.pagination_class()
+        return self._paginator
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django_filters',
 
     # Local apps
+    'core',
     'empresas',
     'usuarios',
     'despesas',
@@ -37,15 +38,19 @@ INSTALLED_APPS = [
     'receitas',
     'relatorios',
     'categorias',
+    'busca',
+    'benchmark',
 ]
 
 MIDDLEWARE = [
+    'core.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'usuarios.contexto.ContextoTenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -125,7 +130,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.autenticacao.JWTAutenticacaoTenant',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -139,6 +144,109 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Relatórios
+# Lê os relatórios da tabela pré-agregada ResumoMensal quando os filtros permitem.
+# Após a carga inicial, reconstrua com: python manage.py reconstruir_resumo_mensal
+RELATORIOS_USAR_RESUMO = config('RELATORIOS_USAR_RESUMO', default=True, cast=bool)
+
+# PDFs dos relatórios (?format=pdf): renderizados em um pool de processos e
+# guardados em disco pelo hash do conteúdo. Ao gravar um PDF, os arquivos sem
+# download há mais de RELATORIOS_PDF_MAX_DIAS dias e os mais antigos além de
+# RELATORIOS_PDF_MAX_ARQUIVOS são removidos
+RELATORIOS_PDF_DIR = config('RELATORIOS_PDF_DIR', default=str(BASE_DIR / 'cache' / 'relatorios_pdf'))
+RELATORIOS_PDF_WORKERS = config('RELATORIOS_PDF_WORKERS', default=2, cast=int)
+RELATORIOS_PDF_TIMEOUT = config('RELATORIOS_PDF_TIMEOUT', default=60, cast=int)
+RELATORIOS_PDF_MAX_DIAS = config('RELATORIOS_PDF_MAX_DIAS', default=7, cast=int)
+RELATORIOS_PDF_MAX_ARQUIVOS = config('RELATORIOS_PDF_MAX_ARQUIVOS', default=1000, cast=int)
+
+# Vendas
+# Quantidade máxima de vendas por requisição em POST /api/vendas/bulk/
+VENDAS_BULK_MAX_LINHAS = config('VENDAS_BULK_MAX_LINHAS', default=5000, cast=int)
+# Recusa vendas sem estoque suficiente. Desativado por padrão porque produtos
+# de serviço não controlam estoque; nesse caso o estoque pode ficar negativo
+VENDAS_BLOQUEAR_ESTOQUE_INSUFICIENTE = config('VENDAS_BLOQUEAR_ESTOQUE_INSUFICIENTE', default=False, cast=bool)
+
+# Importação de despesas e receitas (CSV/XLSX): relatórios com as linhas rejeitadas
+IMPORTACAO_ERROS_DIR = config('IMPORTACAO_ERROS_DIR', default=str(BASE_DIR / 'cache' / 'importacoes'))
+
+# Cache
+# O cache "default" guarda as versões que invalidam os demais caches (relatórios,
+# usuários autenticados por JWT e autocomplete) e precisa ser visto por todos os
+# processos: com vários workers, use um backend compartilhado (banco, arquivo em
+# um diretório comum, Redis ou Memcached) em CACHE_BACKEND/CACHE_LOCATION.
+# O cache "relatorios" guarda os resultados dos relatórios (ver relatorios/cache.py).
+# O backend em memória é local a cada processo e descarta as entradas menos usadas
+# ao atingir MAX_ENTRIES (LRU). Com vários workers, use o backend em arquivo
+# (django.core.cache.backends.filebased.FileBasedCache) com um diretório em LOCATION.
+# Com o "default" local (o padrão), os relatórios não são guardados em cache e
+# a autenticação JWT confere o usuário no banco (ver core/cache.py).
+# CACHE_MAX_ENTRIES vale para os backends em memória, arquivo e banco: versões
+# descartadas ao atingir o limite voltam com um valor novo e invalidam os
+# resultados que dependiam delas, então o limite deve cobrir todas as versões
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+BACKENDS_CACHE_COM_LIMITE = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default=''),
+        # Redis e Memcached repassam OPTIONS ao cliente e descartam pela memória
+        'OPTIONS': (
+            {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=50000, cast=int)}
+            if CACHE_BACKEND in BACKENDS_CACHE_COM_LIMITE else {}
+        ),
+    },
+    'relatorios': {
+        'BACKEND': config(
+            'RELATORIOS_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('RELATORIOS_CACHE_LOCATION', default='relatorios'),
+        'TIMEOUT': config('RELATORIOS_CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('RELATORIOS_CACHE_MAX_ENTRIES', default=1000, cast=int),
+        },
+    },
+}
+
+# Totalizadores das listagens de vendas, despesas e receitas no admin:
+# segundos em que os totais de cada filtro ficam em cache
+ADMIN_TOTALIZADORES_TIMEOUT = config('ADMIN_TOTALIZADORES_TIMEOUT', default=30, cast=int)
+
+# Segundos em que o usuário autenticado por JWT fica em cache (evita buscar o
+# usuário no banco a cada requisição). Só vale com o cache "default"
+# compartilhado; com cache local, is_active e a versão do usuário são lidos
+# do banco a cada requisição (ver usuarios/autenticacao.py)
+USUARIOS_CACHE_TIMEOUT = config('USUARIOS_CACHE_TIMEOUT', default=60, cast=int)
+
+# Busca (?search=) de clientes, produtos e vendas pelo índice de busca (app
+# busca). No MySQL, palavras com pelo menos BUSCA_FULLTEXT_MIN_TERMO letras
+# usam o índice FULLTEXT (deve ser >= innodb_ft_min_token_size; palavras da
+# lista de stopwords do InnoDB só são encontradas com
+# innodb_ft_enable_stopword=OFF)
+BUSCA_INDEXADA = config('BUSCA_INDEXADA', default=True, cast=bool)
+BUSCA_FULLTEXT = config('BUSCA_FULLTEXT', default=True, cast=bool)
+BUSCA_FULLTEXT_MIN_TERMO = config('BUSCA_FULLTEXT_MIN_TERMO', default=3, cast=int)
+
+# Autocomplete de clientes e produtos (índice em memória por empresa, em cada
+# processo): resultados por busca, segundos até o índice ser remontado e
+# número máximo de índices mantidos por processo
+VENDAS_AUTOCOMPLETE_LIMITE = config('VENDAS_AUTOCOMPLETE_LIMITE', default=10, cast=int)
+VENDAS_AUTOCOMPLETE_LIMITE_MAXIMO = config('VENDAS_AUTOCOMPLETE_LIMITE_MAXIMO', default=50, cast=int)
+VENDAS_AUTOCOMPLETE_TIMEOUT = config('VENDAS_AUTOCOMPLETE_TIMEOUT', default=300, cast=int)
+VENDAS_AUTOCOMPLETE_MAX_INDICES = config('VENDAS_AUTOCOMPLETE_MAX_INDICES', default=100, cast=int)
+
+# Métricas por rota (consultas, tempo de banco, serialização e tamanho das
+# respostas) em memória, expostas em /api/metrics/ (ver core/metricas.py).
+# METRICAS_SERVER_TIMING envia as medidas de cada resposta no cabeçalho
+# Server-Timing. Os tempos internos ajudam a medir ataques de temporização, então
+# o cabeçalho vai só para o Admin Chefe (ou para todos com DEBUG) e é desativado
+# por padrão
+METRICAS_ATIVAS = config('METRICAS_ATIVAS', default=True, cast=bool)
+METRICAS_SERVER_TIMING = config('METRICAS_SERVER_TIMING', default=False, cast=bool)
+
 # JWT Settings
 # ACCESS_TOKEN_LIFETIME: Tempo de vida do token de acesso (padrão: 5 minutos para segurança)
 # REFRESH_TOKEN_LIFETIME: Tempo de vida do refresh token (padrão: 1 dia)
@@ -0,0 +1,20 @@
+"""
+Configurações dos testes: SQLite em memória, sem depender do MySQL.
+
+    python manage.py test --settings=core.settings_test
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Hash de senha rápido: os testes criam muitos usuários
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+MEDIA_ROOT = BASE_DIR / 'cache' / 'testes' / 'media'  # noqa: F405
+RELATORIOS_PDF_DIR = str(BASE_DIR / 'cache' / 'testes' / 'relatorios_pdf')  # noqa: F405
+IMPORTACAO_ERROS_DIR = str(BASE_DIR / 'cache' / 'testes' / 'importacoes')  # noqa: F405
@@ -0,0 +1,46 @@
+from django.test import TestCase, override_settings
+from rest_framework.serializers import BaseSerializer
+
+from .fabricas import cliente_api, cliente_jwt, criar_chefe, criar_empresa, criar_usuario
+from .metricas import _data_medido, registro
+
+
+class MetricasTest(TestCase):
+    """Métricas por rota só para o Admin Chefe; Server-Timing desativado por padrão"""
+
+    URL = '/api/metrics/'
+
+    def setUp(self):
+        registro.limpar()
+        self.usuario = cliente_jwt(criar_usuario(criar_empresa()))
+        self.chefe = cliente_jwt(criar_chefe())
+
+    def test_serializers_instrumentados_pelo_app(self):
+        self.assertIs(BaseSerializer.data.fget, _data_medido)
+
+    def test_metricas_do_processo(self):
+        self.usuario.get('/api/vendas/clientes/')
+        self.assertEqual(self.usuario.get(self.URL).status_code, 403)
+
+        resposta = self.chefe.get(self.URL)
+        self.assertEqual(resposta.status_code, 200)
+        rota = next(rota for rota in resposta.data['rotas'] if rota['rota'] == 'GET cliente-list')
+        self.assertEqual(rota['requisicoes'], 1)
+        self.assertGreater(rota['consultas']['max'], 0)
+
+        self.assertEqual(self.chefe.delete(self.URL).status_code, 204)
+        # Só resta o próprio DELETE, registrado depois de zerar
+        self.assertEqual([rota['rota'] for rota in registro.resumo()['rotas']], ['DELETE metricas'])
+
+    def test_server_timing(self):
+        self.assertNotIn('Server-Timing', self.chefe.get('/api/vendas/clientes/'))
+
+        with override_settings(METRICAS_SERVER_TIMING=True):
+            self.assertNotIn('Server-Timing', self.usuario.get('/api/vendas/clientes/'))
+            self.assertIn('db;dur=', self.chefe.get('/api/vendas/clientes/')['Server-Timing'])
+            # force_authenticate, sem a autenticação JWT
+            chefe = cliente_api(criar_chefe())
+            self.assertIn('Server-Timing', chefe.get('/api/vendas/clientes/'))
+
+            with override_settings(DEBUG=True):
+                self.assertIn('Server-Timing', self.usuario.get('/api/vendas/clientes/'))
@@ -0,0 +1,104 @@
+"""
+Totalizadores das listagens do admin (vendas, despesas e receitas).
+
+O total geral, o total por status e a quantidade de registros filtrados são
+calculados com um único aggregate condicional (Sum(..., filter=Q(status=...)))
+e guardados no cache por alguns segundos, pela querystring da listagem:
+reabrir a mesma página ou trocar de página não refaz a soma.
+
+Alterações feitas pelo próprio admin (ações, edição e exclusão) trocam a
+versão dos totalizadores do model; gravações feitas pela API aparecem ao
+fim do TTL (ADMIN_TOTALIZADORES_TIMEOUT).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+
+class TotalizadoresAdminMixin:
+    """
+    Mixin de ModelAdmin que adiciona ao contexto da listagem total_geral,
+    total_<status> (para cada status de `totalizador_status`) e quantidade.
+    """
+    totalizador_campo = 'valor'
+    totalizador_status = []
+
+    def _chave_versao(self):
+        return f'admin:totalizadores:versao:{self.opts.label_lower}'
+
+    def invalidar_totalizadores(self):
+        cache.set(self._chave_versao(), time.time_ns(), timeout=None)
+
+    def _chave_totalizadores(self, request):
+        versao = cache.get(self._chave_versao())
+        if versao is None:
+            versao = time.time_ns()
+            cache.set(self._chave_versao(), versao, timeout=None)
+        # A listagem pode depender do usuário (get_queryset/permissões)
+        assinatura = repr((request.user.pk, sorted(request.GET.lists()), versao)).encode()
+        return 'admin:totalizadores:{}:{}'.format(
+            self.opts.label_lower, hashlib.md5(assinatura).hexdigest()
+        )
+
+    def get_changelist_instance(self, request):
+        # Reaproveita no changelist_view do Django a ChangeList montada para
+        # os totalizadores (evita repetir os COUNTs e as opções dos filtros)
+        changelists = request.__dict__.setdefault('_changelists_totalizadores', {})
+        if self.opts.label_lower not in changelists:
+            changelists[self.opts.label_lower] = super().get_changelist_instance(request)
+        return changelists[self.opts.label_lower]
+
+    def calcular_totalizadores(self, queryset):
+        somas = {
+            f'total_{status.lower()}': Sum(self.totalizador_campo, filter=Q(status=status))
+            for status in self.totalizador_status
+        }
+        totais = queryset.order_by().aggregate(
+            total_geral=Sum(self.totalizador_campo), quantidade=Count('pk'), **somas
+        )
+        contexto = {'quantidade': totais.pop('quantidade')}
+        for nome, valor in totais.items():
+            contexto[nome] = f'R$ {valor or 0:,.2f}'
+        return contexto
+
+    def changelist_view(self, request, extra_context=None):
+        """Adiciona os totalizadores na parte superior da lista"""
+        extra_context = extra_context or {}
+        # Em um POST (ação ou edição em massa) os totais são calculados
+        # antes da alteração: não vão para o cache, e a versão é trocada
+        # depois, para o redirect seguinte mostrar os novos totais
+        post = request.method == 'POST'
+
+        chave = self._chave_totalizadores(request)
+        totalizadores = None if post else cache.get(chave)
+        if totalizadores is None:
+            try:
+                cl = self.get_changelist_instance(request)
+            except IncorrectLookupParameters:
+                # Filtro inválido: o changelist_view do Django redireciona
+                return super().changelist_view(request, extra_context=extra_context)
+            totalizadores = self.calcular_totalizadores(cl.get_queryset(request))
+            if not post:
+                cache.set(chave, totalizadores, timeout=settings.ADMIN_TOTALIZADORES_TIMEOUT)
+
+        extra_context.update(totalizadores)
+        response = super().changelist_view(request, extra_context=extra_context)
+        if post:
+            self.invalidar_totalizadores()
+        return response
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.invalidar_totalizadores()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.invalidar_totalizadores()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        self.invalidar_totalizadores()
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from core.metricas import MetricasView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -22,6 +24,9 @@ urlpatterns = [
     path('api/receitas/', include('receitas.urls')),
     path('api/relatorios/', include('relatorios.urls')),
     path('api/categorias/', include('categorias.urls')),
+
+    # Métricas por rota (Admin Chefe)
+    path('api/metrics/', MetricasView.as_view(), name='metricas'),
 ]
 
 if settings.DEBUG:
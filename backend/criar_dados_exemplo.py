@@ -5,8 +5,9 @@ Execute: python manage.py shell < criar_dados_exemplo.py
 
 from empresas.models import Empresa
 from usuarios.models import Usuario
-from despesas.models import CategoriaDespesa, Despesa
-from receitas.models import CategoriaReceita, Receita
+from categorias.models import Categoria
+from despesas.models import Despesa
+from receitas.models import Receita
 from vendas.models import Cliente, Produto, Venda, ItemVenda
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -27,7 +28,7 @@ empresa1, created = Empresa.objects.get_or_create(
         'endereco': 'Av. Paulista, 1000',
         'cidade': 'São Paulo',
         'estado': 'SP',
-        'cep': '01310-100',
+        'cep': '01310100',
         'ativa': True
     }
 )
@@ -43,7 +44,7 @@ empresa2, created = Empresa.objects.get_or_create(
         'endereco': 'Rua das Flores, 500',
         'cidade': 'Rio de Janeiro',
         'estado': 'RJ',
-        'cep': '20000-000',
+        'cep': '20000000',
         'ativa': True
     }
 )
@@ -59,7 +60,7 @@ empresa3, created = Empresa.objects.get_or_create(
         'endereco': 'Av. Amazonas, 2000',
         'cidade': 'Belo Horizonte',
         'estado': 'MG',
-        'cep': '30000-000',
+        'cep': '30000000',
         'ativa': True
     }
 )
@@ -130,14 +131,14 @@ categorias_despesas = [
     ('Material de Escritório', 'Compras de material'),
 ]
 
-for empresa in [empresa1, empresa2, empresa3]:
-    for nome, desc in categorias_despesas:
-        CategoriaDespesa.objects.get_or_create(
-            nome=nome,
-            empresa=empresa,
-            defaults={'descricao': desc, 'ativa': True}
-        )
-print(f"   ✓ {len(categorias_despesas)} categorias de despesa por empresa")
+# Categorias são globais (compartilhadas por todas as empresas)
+for nome, desc in categorias_despesas:
+    Categoria.objects.get_or_create(
+        nome=nome,
+        tipo='DESPESA',
+        defaults={'descricao': desc, 'ativa': True}
+    )
+print(f"   ✓ {len(categorias_despesas)} categorias de despesa")
 
 categorias_receitas = [
     ('Vendas', 'Receitas de vendas'),
@@ -145,14 +146,14 @@ categorias_receitas = [
     ('Investimentos', 'Retorno de investimentos'),
 ]
 
-for empresa in [empresa1, empresa2, empresa3]:
-    for nome, desc in categorias_receitas:
-        CategoriaReceita.objects.get_or_create(
-            nome=nome,
-            empresa=empresa,
-            defaults={'descricao': desc, 'ativa': True}
-        )
-print(f"   ✓ {len(categorias_receitas)} categorias de receita por empresa")
+# Categorias são globais (compartilhadas por todas as empresas)
+for nome, desc in categorias_receitas:
+    Categoria.objects.get_or_create(
+        nome=nome,
+        tipo='RECEITA',
+        defaults={'descricao': desc, 'ativa': True}
+    )
+print(f"   ✓ {len(categorias_receitas)} categorias de receita")
 
 # 4. CRIAR DESPESAS
 print("\n[4/6] Criando Despesas...")
@@ -161,9 +162,9 @@ hoje = datetime.now().date()
 count_despesas = 0
 
 # Despesas da Tech Solutions
-cat_aluguel = CategoriaDespesa.objects.filter(nome='Aluguel', empresa=empresa1).first()
-cat_energia = CategoriaDespesa.objects.filter(nome='Energia', empresa=empresa1).first()
-cat_salarios = CategoriaDespesa.objects.filter(nome='Salários', empresa=empresa1).first()
+cat_aluguel = Categoria.objects.filter(nome='Aluguel', tipo='DESPESA').first()
+cat_energia = Categoria.objects.filter(nome='Energia', tipo='DESPESA').first()
+cat_salarios = Categoria.objects.filter(nome='Salários', tipo='DESPESA').first()
 
 despesas_tech = [
     ('Aluguel Janeiro 2026', cat_aluguel, 5000.00, hoje + timedelta(days=5), 'PENDENTE'),
@@ -189,8 +190,8 @@ for desc, cat, valor, venc, status in despesas_tech:
     count_despesas += 1
 
 # Despesas do Comércio ABC
-cat_aluguel2 = CategoriaDespesa.objects.filter(nome='Aluguel', empresa=empresa2).first()
-cat_energia2 = CategoriaDespesa.objects.filter(nome='Energia', empresa=empresa2).first()
+cat_aluguel2 = Categoria.objects.filter(nome='Aluguel', tipo='DESPESA').first()
+cat_energia2 = Categoria.objects.filter(nome='Energia', tipo='DESPESA').first()
 
 despesas_abc = [
     ('Aluguel Janeiro 2026', cat_aluguel2, 3500.00, hoje + timedelta(days=10), 'PENDENTE'),
@@ -219,8 +220,8 @@ print(f"   ✓ {count_despesas} despesas criadas")
 # 5. CRIAR RECEITAS
 print("\n[5/6] Criando Receitas...")
 
-cat_vendas = CategoriaReceita.objects.filter(nome='Vendas', empresa=empresa1).first()
-cat_servicos = CategoriaReceita.objects.filter(nome='Serviços', empresa=empresa1).first()
+cat_vendas = Categoria.objects.filter(nome='Vendas', tipo='RECEITA').first()
+cat_servicos = Categoria.objects.filter(nome='Serviços', tipo='RECEITA').first()
 
 count_receitas = 0
 receitas = [
@@ -257,12 +258,11 @@ cliente1, _ = Cliente.objects.get_or_create(
     empresa=empresa1,
     defaults={
         'nome': 'Empresa Cliente A LTDA',
-        'cpf_cnpj': '11.111.111/0001-11',
+        'cpf_cnpj': '11111111000111',
         'telefone': '(11) 91111-1111',
         'endereco': 'Rua A, 100',
         'cidade': 'São Paulo',
         'estado': 'SP',
-        'cep': '01000-000',
         'ativo': True
     }
 )
@@ -272,12 +272,11 @@ cliente2, _ = Cliente.objects.get_or_create(
     empresa=empresa1,
     defaults={
         'nome': 'João da Silva',
-        'cpf_cnpj': '123.456.789-00',
+        'cpf_cnpj': '12345678900',
         'telefone': '(11) 92222-2222',
         'endereco': 'Rua B, 200',
         'cidade': 'São Paulo',
         'estado': 'SP',
-        'cep': '02000-000',
         'ativo': True
     }
 )
@@ -330,9 +329,10 @@ venda1, created = Venda.objects.get_or_create(
     empresa=empresa1,
     data_venda=hoje - timedelta(days=10),
     defaults={
-        'status': 'ENTREGUE',
+        'valor_total': Decimal('10000.00'),
+        'status': 'PAGA',
         'forma_pagamento': 'BOLETO',
-        'desconto': Decimal('0.00'),
+        'desconto': Decimal('500.00'),
         'observacoes': 'Primeira venda do cliente',
         'usuario_cadastro': user1
     }
@@ -342,8 +342,7 @@ if created:
         venda=venda1,
         produto=produto1,
         quantidade=2,
-        preco_unitario=produto1.preco,
-        desconto=Decimal('500.00')
+        preco_unitario=produto1.preco
     )
     count_vendas += 1
 
@@ -353,7 +352,8 @@ venda2, created = Venda.objects.get_or_create(
     empresa=empresa1,
     data_venda=hoje - timedelta(days=2),
     defaults={
-        'status': 'CONFIRMADA',
+        'valor_total': Decimal('8000.00'),
+        'status': 'PAGA',
         'forma_pagamento': 'PIX',
         'desconto': Decimal('0.00'),
         'observacoes': '',
@@ -365,8 +365,7 @@ if created:
         venda=venda2,
         produto=produto2,
         quantidade=4,
-        preco_unitario=produto2.preco,
-        desconto=Decimal('0.00')
+        preco_unitario=produto2.preco
     )
     count_vendas += 1
 
@@ -376,6 +375,7 @@ venda3, created = Venda.objects.get_or_create(
     empresa=empresa1,
     data_venda=hoje,
     defaults={
+        'valor_total': Decimal('12000.00'),
         'status': 'PENDENTE',
         'forma_pagamento': 'CARTAO_CREDITO',
         'desconto': Decimal('100.00'),
@@ -388,8 +388,7 @@ if created:
         venda=venda3,
         produto=produto3,
         quantidade=10,
-        preco_unitario=produto3.preco,
-        desconto=Decimal('100.00')
+        preco_unitario=produto3.preco
     )
     count_vendas += 1
 
@@ -400,8 +399,8 @@ print("RESUMO DA CRIAÇÃO DE DADOS")
 print("=" * 60)
 print(f"✓ Empresas: {Empresa.objects.count()}")
 print(f"✓ Usuários: {Usuario.objects.count()}")
-print(f"✓ Categorias de Despesas: {CategoriaDespesa.objects.count()}")
-print(f"✓ Categorias de Receitas: {CategoriaReceita.objects.count()}")
+print(f"✓ Categorias de Despesas: {Categoria.objects.filter(tipo='DESPESA').count()}")
+print(f"✓ Categorias de Receitas: {Categoria.objects.filter(tipo='RECEITA').count()}")
 print(f"✓ Despesas: {Despesa.objects.count()}")
 print(f"✓ Receitas: {Receita.objects.count()}")
 print(f"✓ Clientes: {Cliente.objects.count()}")
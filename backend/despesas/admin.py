@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Sum
 from django.utils import timezone
 from .models import Despesa
+from core.totalizadores import TotalizadoresAdminMixin
+from relatorios.resumo import atualizar_resumo, buckets_do_queryset
 
 
 @admin.register(Despesa)
-class DespesaAdmin(admin.ModelAdmin):
+class DespesaAdmin(TotalizadoresAdminMixin, admin.ModelAdmin):
     list_display = ['descricao', 'empresa', 'categoria', 'valor_formatado',
                     'data_vencimento', 'status_badge', 'dias_para_vencimento']
     list_filter = ['status', 'forma_pagamento', 'empresa', 'categoria',
@@ -15,6 +16,8 @@ class DespesaAdmin(admin.ModelAdmin):
     date_hierarchy = 'data_vencimento'
     readonly_fields = ['criado_em', 'atualizado_em']
     list_per_page = 50
+    totalizador_campo = 'valor'
+    totalizador_status = ['PENDENTE', 'PAGA', 'VENCIDA']
     list_select_related = ['empresa', 'categoria', 'usuario_cadastro']
 
     fieldsets = (
@@ -40,8 +43,8 @@ class DespesaAdmin(admin.ModelAdmin):
     def valor_formatado(self, obj):
         """Formata o valor em reais"""
         return format_html(
-            '<strong style="color: #d32f2f;">R$ {:,.2f}</strong>',
-            obj.valor
+            '<strong style="color: #d32f2f;">R$ {}</strong>',
+            f'{obj.valor:,.2f}'
         )
     valor_formatado.short_description = 'Valor'
     valor_formatado.admin_order_field = 'valor'
@@ -90,38 +93,22 @@ class DespesaAdmin(admin.ModelAdmin):
     actions = ['marcar_como_paga', 'marcar_como_pendente', 'marcar_como_cancelada']
 
     def marcar_como_paga(self, request, queryset):
+        buckets = buckets_do_queryset('DESPESA', queryset)
         updated = queryset.update(status='PAGA', data_pagamento=timezone.now().date())
+        atualizar_resumo('DESPESA', buckets)
         self.message_user(request, f'{updated} despesa(s) marcada(s) como PAGA.')
     marcar_como_paga.short_description = 'Marcar como PAGA'
 
     def marcar_como_pendente(self, request, queryset):
+        buckets = buckets_do_queryset('DESPESA', queryset)
         updated = queryset.update(status='PENDENTE', data_pagamento=None)
+        atualizar_resumo('DESPESA', buckets)
         self.message_user(request, f'{updated} despesa(s) marcada(s) como PENDENTE.')
     marcar_como_pendente.short_description = 'Marcar como PENDENTE'
 
     def marcar_como_cancelada(self, request, queryset):
+        buckets = buckets_do_queryset('DESPESA', queryset)
         updated = queryset.update(status='CANCELADA')
+        atualizar_resumo('DESPESA', buckets)
         self.message_user(request, f'{updated} despesa(s) CANCELADA(S).')
     marcar_como_cancelada.short_description = 'Marcar como CANCELADA'
-
-    def changelist_view(self, request, extra_context=None):
-        """Adiciona totalizadores na parte superior da lista"""
-        extra_context = extra_context or {}
-
-        # Filtra despesas de acordo com os filtros aplicados
-        cl = self.get_changelist_instance(request)
-        queryset = cl.get_queryset(request)
-
-        # Calcula totais
-        total_geral = queryset.aggregate(total=Sum('valor'))['total'] or 0
-        total_pendente = queryset.filter(status='PENDENTE').aggregate(total=Sum('valor'))['total'] or 0
-        total_paga = queryset.filter(status='PAGA').aggregate(total=Sum('valor'))['total'] or 0
-        total_vencida = queryset.filter(status='VENCIDA').aggregate(total=Sum('valor'))['total'] or 0
-
-        extra_context['total_geral'] = f'R$ {total_geral:,.2f}'
-        extra_context['total_pendente'] = f'R$ {total_pendente:,.2f}'
-        extra_context['total_paga'] = f'R$ {total_paga:,.2f}'
-        extra_context['total_vencida'] = f'R$ {total_vencida:,.2f}'
-        extra_context['quantidade'] = queryset.count()
-
-        return super().changelist_view(request, extra_context=extra_context)
@@ -0,0 +1,13 @@
+from core.importacao import Importador
+from .models import Despesa
+
+
+importador_despesas = Importador(
+    Despesa,
+    campos=[
+        'descricao', 'categoria', 'valor', 'data_vencimento', 'data_pagamento',
+        'forma_pagamento', 'status', 'observacoes',
+    ],
+    tipo_categoria='DESPESA',
+    origem='DESPESA',
+)
@@ -0,0 +1,7 @@
+from core.importacao import ImportacaoCommand
+from despesas.importacao import importador_despesas
+
+
+class Command(ImportacaoCommand):
+    help = 'Importa despesas de um arquivo CSV ou XLSX, gerando um relatorio com as linhas rejeitadas'
+    importador = importador_despesas
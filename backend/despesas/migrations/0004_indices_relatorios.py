@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categorias', '0001_initial'),
+        ('despesas', '0003_alter_despesa_categoria_delete_categoriadespesa'),
+        ('empresas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='despesa',
+            index=models.Index(fields=['empresa', 'status', 'data_vencimento', 'categoria', 'valor'], name='despesas_de_empresa_a22ddd_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='despesa',
+            name='despesas_de_empresa_ae5ad9_idx',
+        ),
+    ]
@@ -83,7 +83,10 @@ class Despesa(models.Model):
         ordering = ['-data_vencimento']
         indexes = [
             models.Index(fields=['empresa', 'data_vencimento']),
-            models.Index(fields=['empresa', 'status']),
+            # Relatórios: empresa + status + período, agrupando por categoria
+            # e somando valor sem ler as linhas da tabela (índice de cobertura).
+            # Começa por (empresa, status), então também atende os filtros só por eles
+            models.Index(fields=['empresa', 'status', 'data_vencimento', 'categoria', 'valor']),
         ]
 
     def __str__(self):
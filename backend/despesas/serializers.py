@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.campos import CamposDinamicosMixin
 from .models import Despesa
 
 
-class DespesaSerializer(serializers.ModelSerializer):
+class DespesaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
     usuario_cadastro_nome = serializers.CharField(source='usuario_cadastro.get_full_name', read_only=True)
     esta_vencida = serializers.ReadOnlyField()
@@ -11,7 +12,25 @@ class DespesaSerializer(serializers.ModelSerializer):
         model = Despesa
         fields = '__all__'
         read_only_fields = ['usuario_cadastro', 'criado_em', 'atualizado_em']
+        campos_dependentes = {
+            'esta_vencida': ['status', 'data_vencimento'],
+        }
 
     def create(self, validated_data):
         validated_data['usuario_cadastro'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class DespesaListSerializer(serializers.ModelSerializer):
+    """
+    Serializer compacto para a listagem de despesas (sem observações e anexo).
+    """
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
+    esta_vencida = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Despesa
+        fields = [
+            'id', 'empresa', 'categoria', 'categoria_nome', 'descricao', 'valor',
+            'data_vencimento', 'data_pagamento', 'forma_pagamento', 'status', 'esta_vencida'
+        ]
@@ -0,0 +1,132 @@
+import csv
+import io
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.fabricas import cliente_api, criar_categoria, criar_despesa, criar_empresa, criar_usuario
+from relatorios.models import ResumoMensal
+from .models import Despesa
+
+
+class CamposEsparsosDespesasTest(TestCase):
+    """?fields= devolve só os campos pedidos e lê do banco só as colunas necessárias"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        self.despesa = criar_despesa(
+            self.empresa, criar_categoria(nome='Aluguel'), self.usuario, observacoes='Texto longo'
+        )
+
+    def test_listagem_compacta_sem_fields(self):
+        resposta = self.api.get('/api/despesas/')
+        despesa = resposta.data['results'][0]
+        self.assertIn('categoria_nome', despesa)
+        self.assertNotIn('observacoes', despesa)
+
+    def test_fields_na_listagem(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.api.get('/api/despesas/?fields=id,valor,esta_vencida,inexistente')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(set(resposta.data['results'][0]), {'id', 'valor', 'esta_vencida'})
+
+        pagina = consultas.captured_queries[-1]['sql']
+        self.assertIn('"data_vencimento"', pagina)
+        self.assertNotIn('"observacoes"', pagina)
+        self.assertNotIn('categorias_categoria', pagina)
+
+    def test_fields_com_relacionado(self):
+        resposta = self.api.get('/api/despesas/?fields=id,categoria_nome')
+        self.assertEqual(resposta.data['results'][0], {'id': self.despesa.pk, 'categoria_nome': 'Aluguel'})
+
+    def test_fields_no_detalhe(self):
+        resposta = self.api.get(f'/api/despesas/{self.despesa.pk}/?fields=id,observacoes')
+        self.assertEqual(resposta.data, {'id': self.despesa.pk, 'observacoes': 'Texto longo'})
+
+
+class ImportacaoDespesasTest(TestCase):
+    """Linhas inválidas vão para o relatório de erros; arquivos ilegíveis respondem 400"""
+
+    CABECALHO = 'Descrição;Categoria;Valor;Data de Vencimento;Forma de Pagamento;Status\n'
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        criar_categoria(nome='Manutenção')
+
+    def importar(self, nome, conteudo):
+        return self.api.post(
+            '/api/despesas/importar/', {'arquivo': SimpleUploadedFile(nome, conteudo)}, format='multipart'
+        )
+
+    def test_linhas_com_erro(self):
+        conteudo = (
+            self.CABECALHO
+            + 'Troca de peças;Manutenção;1.234,56;10/06/2026;PIX;Paga\n'
+            + 'Sem categoria;Inexistente;10,00;2026-06-11;PIX;PENDENTE\n'
+            + 'Data errada;manutencao;5;31/02/2026;Boleto;PENDENTE\n'
+            + '\n'
+            + 'Revisão;MANUTENÇÃO;R$ 80,00;2026-06-20;Dinheiro;PENDENTE\n'
+        ).encode('utf-8')
+        resposta = self.importar('despesas.csv', conteudo)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data['importadas'], 2)
+        self.assertEqual(resposta.data['total_erros'], 2)
+        self.assertEqual(
+            [(erro['linha'], list(erro['erros'])) for erro in resposta.data['erros']],
+            [(3, ['categoria']), (4, ['data_vencimento'])],
+        )
+        self.assertEqual(
+            sorted(Despesa.objects.values_list('valor', flat=True)), [Decimal('80.00'), Decimal('1234.56')]
+        )
+        # bulk_create não dispara signals: o resumo é atualizado pela importação
+        self.assertEqual(ResumoMensal.objects.get(origem='DESPESA', status='PAGA').valor, Decimal('1234.56'))
+
+        relatorio = self.api.get(resposta.data['relatorio_erros'])
+        self.assertEqual(relatorio.status_code, 200)
+        conteudo = b''.join(relatorio.streaming_content).decode('utf-8-sig')
+        linhas = list(csv.reader(io.StringIO(conteudo)))
+        self.assertEqual([linha[0] for linha in linhas], ['linha', '3', '4'])
+        self.assertEqual(linhas[1][1], 'categoria: Categoria "Inexistente" não encontrada.')
+        self.assertEqual(linhas[1][2:], ['Sem categoria', 'Inexistente', '10,00', '2026-06-11', 'PIX', 'PENDENTE'])
+
+    def test_csv_em_windows_1252(self):
+        conteudo = self.CABECALHO + 'Manutenção do ar;Manutenção;150,00;2026-06-10;PIX;PENDENTE\n'
+        resposta = self.importar('despesas.csv', conteudo.encode('cp1252'))
+        self.assertEqual(resposta.status_code, 200, resposta.data)
+        self.assertEqual(resposta.data['importadas'], 1)
+        self.assertEqual(Despesa.objects.get().descricao, 'Manutenção do ar')
+
+    def test_arquivos_ilegiveis(self):
+        # 0x81 não é UTF-8 válido nem existe no Windows-1252
+        csv_invalido = (self.CABECALHO + 'Conta;Manutenção;10;2026-06-10;PIX;PENDENTE\n').encode('cp1252')
+        csv_invalido += b'\x81\n'
+        for nome, conteudo in [
+            ('despesas.csv', csv_invalido),
+            ('despesas.xlsx', b'PK\x03\x04 arquivo truncado'),
+            ('despesas.txt', b'texto'),
+        ]:
+            resposta = self.importar(nome, conteudo)
+            self.assertEqual(resposta.status_code, 400, nome)
+            self.assertIn('error', resposta.data)
+        self.assertFalse(Despesa.objects.exists())
+
+    def test_comando_com_xlsx_corrompido(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = Path(diretorio) / 'despesas.xlsx'
+            caminho.write_bytes(b'nao e um zip')
+            with self.assertRaisesMessage(CommandError, 'XLSX invalido'):
+                call_command(
+                    'importar_despesas', str(caminho), empresa=self.empresa.pk, usuario=self.usuario.email,
+                    stdout=io.StringIO(),
+                )
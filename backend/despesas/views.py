@@ -2,23 +2,50 @@ from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
 
+from .importacao import importador_despesas
 from .models import Despesa
-from .serializers import DespesaSerializer
+from .serializers import DespesaSerializer, DespesaListSerializer
+from usuarios.contexto import contexto_tenant
 from usuarios.permissions import MultiTenantPermission
+from core.campos import CamposEsparsosMixin
+from core.paginacao import PaginacaoCursorMixin
+from core.exportacao import ExportacaoMixin
+from core.importacao import ImportacaoMixin
 
 
-class DespesaViewSet(viewsets.ModelViewSet):
+class DespesaViewSet(ExportacaoMixin, ImportacaoMixin, CamposEsparsosMixin, PaginacaoCursorMixin, viewsets.ModelViewSet):
     queryset = Despesa.objects.all()
     serializer_class = DespesaSerializer
+    list_serializer_class = DespesaListSerializer
     permission_classes = [IsAuthenticated, MultiTenantPermission]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['empresa', 'categoria', 'status', 'forma_pagamento', 'data_vencimento']
     search_fields = ['descricao', 'observacoes']
     ordering_fields = ['data_vencimento', 'valor', 'criado_em']
     ordering = ['-data_vencimento']
+    cursor_campo = 'data_vencimento'
+    importador = importador_despesas
+    export_nome = 'despesas'
+    export_campos = [
+        ('id', 'ID'),
+        ('empresa__nome', 'Empresa'),
+        ('categoria__nome', 'Categoria'),
+        ('descricao', 'Descrição'),
+        ('valor', 'Valor'),
+        ('data_vencimento', 'Data de Vencimento'),
+        ('data_pagamento', 'Data de Pagamento'),
+        ('forma_pagamento', 'Forma de Pagamento'),
+        ('status', 'Status'),
+        ('observacoes', 'Observações'),
+    ]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.tipo_usuario == 'ADMIN_CHEFE':
-            return Despesa.objects.all()
-        return Despesa.objects.filter(empresa=user.empresa)
+        contexto = contexto_tenant(self.request)
+        if contexto.admin_chefe:
+            queryset = Despesa.objects.all()
+        else:
+            queryset = Despesa.objects.filter(empresa_id=contexto.empresa_id)
+
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.select_related('categoria', 'usuario_cadastro')
+        return queryset
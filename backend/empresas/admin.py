@@ -1,7 +1,24 @@
+from decimal import Decimal
+
+from django.conf import settings
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Count, Sum
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from .models import Empresa
+from despesas.models import Despesa
+from relatorios.models import ResumoMensal
+from usuarios.models import Usuario
+from vendas.models import Venda
+
+
+def _agregado(queryset, expressao, output_field, padrao):
+    """Subquery com um agregado das linhas da empresa (OuterRef) no queryset"""
+    linhas = queryset.filter(empresa=OuterRef('pk')).order_by().values('empresa')
+    return Coalesce(
+        Subquery(linhas.annotate(valor=expressao).values('valor'), output_field=output_field),
+        Value(padrao),
+    )
 
 
 @admin.register(Empresa)
@@ -13,6 +30,31 @@ class EmpresaAdmin(admin.ModelAdmin):
     readonly_fields = ['criado_em', 'atualizado_em']
     list_per_page = 25
 
+    def get_queryset(self, request):
+        """
+        Anota os totais de usuários, despesas e vendas com subqueries na
+        própria consulta da listagem. Quantidades e valores de despesas e
+        vendas vêm da tabela ResumoMensal (algumas linhas por mês), não das
+        despesas e vendas em si.
+        """
+        queryset = super().get_queryset(request)
+        decimal = DecimalField(max_digits=16, decimal_places=2)
+        zero = Decimal('0.00')
+        anotacoes = {
+            '_total_usuarios': _agregado(Usuario.objects.all(), Count('pk'), IntegerField(), 0),
+        }
+        fontes = [('despesas', 'DESPESA', Despesa, 'valor'), ('vendas', 'VENDA', Venda, 'valor_total')]
+        for nome, origem, model, campo_valor in fontes:
+            if settings.RELATORIOS_USAR_RESUMO:
+                lancamentos = ResumoMensal.objects.filter(origem=origem)
+                quantidade, valor = Sum('quantidade'), Sum('valor')
+            else:
+                lancamentos = model.objects.all()
+                quantidade, valor = Count('pk'), Sum(campo_valor)
+            anotacoes[f'_quantidade_{nome}'] = _agregado(lancamentos, quantidade, IntegerField(), 0)
+            anotacoes[f'_valor_{nome}'] = _agregado(lancamentos, valor, decimal, zero)
+        return queryset.annotate(**anotacoes)
+
     fieldsets = (
         ('Informações Básicas', {
             'fields': ('nome', 'razao_social', 'cnpj', 'email', 'telefone')
@@ -37,32 +79,30 @@ class EmpresaAdmin(admin.ModelAdmin):
 
     def total_usuarios(self, obj):
         """Mostra total de usuários da empresa"""
-        count = obj.usuarios.count()
         return format_html(
             '<strong style="color: #1976d2;">{} usuário(s)</strong>',
-            count
+            obj._total_usuarios
         )
     total_usuarios.short_description = 'Usuários'
+    total_usuarios.admin_order_field = '_total_usuarios'
 
     def total_despesas(self, obj):
         """Mostra total de despesas da empresa"""
-        count = obj.despesas.count()
-        valor = obj.despesas.aggregate(total=Sum('valor'))['total'] or 0
         return format_html(
             '<span style="color: #d32f2f;">{} | R$ {}</span>',
-            count, f'{valor:,.2f}'
+            obj._quantidade_despesas, f'{obj._valor_despesas:,.2f}'
         )
     total_despesas.short_description = 'Despesas (Qtd | Valor)'
+    total_despesas.admin_order_field = '_valor_despesas'
 
     def total_vendas(self, obj):
         """Mostra total de vendas da empresa"""
-        count = obj.vendas.count()
-        valor = obj.vendas.aggregate(total=Sum('valor_total'))['total'] or 0
         return format_html(
             '<span style="color: #388e3c;">{} | R$ {}</span>',
-            count, f'{valor:,.2f}'
+            obj._quantidade_vendas, f'{obj._valor_vendas:,.2f}'
         )
     total_vendas.short_description = 'Vendas (Qtd | Valor)'
+    total_vendas.admin_order_field = '_valor_vendas'
 
     def status_badge(self, obj):
         """Exibe status com badge colorido"""
@@ -19,7 +19,13 @@ class EmpresaSerializer(serializers.ModelSerializer):
         read_only_fields = ['criado_em', 'atualizado_em']
 
     def get_total_usuarios(self, obj):
-        """Retorna o total de usuários da empresa"""
+        """
+        Retorna o total de usuários da empresa. O EmpresaViewSet anota o
+        total na consulta (total_usuarios_anotado); sem a anotação, conta.
+        """
+        total = getattr(obj, 'total_usuarios_anotado', None)
+        if total is not None:
+            return total
         return obj.usuarios.count()
 
 
@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from core.fabricas import cliente_api, criar_chefe, criar_empresa, criar_usuario
+
+
+class ListagemEmpresasCondicionalTest(TestCase):
+    """A listagem de empresas responde 304 enquanto empresas e usuários não mudam"""
+
+    URL = '/api/empresas/'
+
+    def setUp(self):
+        self.empresa = criar_empresa(nome='Alfa')
+        criar_empresa(nome='Beta')
+        self.chefe = cliente_api(criar_chefe())
+
+    def etag(self, api=None):
+        resposta = (api or self.chefe).get(self.URL)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta['ETag']
+
+    def test_304_com_etag_valida(self):
+        resposta = self.chefe.get(self.URL)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        self.assertIn('private', resposta['Cache-Control'])
+        self.assertIn('Authorization', resposta['Vary'])
+        self.assertIn('Last-Modified', resposta)
+
+        # Só as duas consultas da versão: a listagem não é montada
+        with self.assertNumQueries(2):
+            condicional = self.chefe.get(self.URL, HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(condicional.status_code, 304)
+        self.assertEqual(condicional.content, b'')
+        self.assertEqual(condicional['ETag'], resposta['ETag'])
+
+    def test_alteracoes_trocam_a_etag(self):
+        inicial = self.etag()
+
+        self.empresa.nome = 'Alfa Comercio'
+        self.empresa.save()
+        alterada = self.etag()
+        self.assertNotEqual(alterada, inicial)
+
+        criar_usuario(self.empresa)
+        com_usuario = self.etag()
+        self.assertNotEqual(com_usuario, alterada)
+
+        criar_empresa(nome='Gama').delete()
+        self.assertEqual(self.etag(), com_usuario)
+        self.assertEqual(self.chefe.get(self.URL, HTTP_IF_NONE_MATCH=com_usuario).status_code, 304)
+
+    def test_etag_por_usuario_e_parametros(self):
+        usuario = cliente_api(criar_usuario(self.empresa))
+        etag_chefe = self.etag()
+        self.assertNotEqual(self.etag(usuario), etag_chefe)
+        self.assertEqual(usuario.get(self.URL, HTTP_IF_NONE_MATCH=etag_chefe).status_code, 200)
+        self.assertEqual(self.chefe.get(f'{self.URL}?page=1', HTTP_IF_NONE_MATCH=etag_chefe).status_code, 200)
@@ -1,13 +1,20 @@
+import hashlib
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Max, Sum, Q
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 
 from .models import Empresa
 from .serializers import EmpresaSerializer, EmpresaCreateSerializer
+from usuarios.contexto import contexto_tenant
+from usuarios.models import Usuario
 from usuarios.permissions import IsAdminChefe, MultiTenantPermission
+from relatorios.cache import chave_relatorio, obter_relatorio, guardar_relatorio
 
 
 class EmpresaViewSet(viewsets.ModelViewSet):
@@ -36,17 +43,20 @@ class EmpresaViewSet(viewsets.ModelViewSet):
         """
         Filtra empresas com base no tipo de usuário.
         """
-        user = self.request.user
+        contexto = contexto_tenant(self.request)
 
         # Admin Chefe vê todas as empresas
-        if user.tipo_usuario == 'ADMIN_CHEFE':
-            return Empresa.objects.all()
-
+        if contexto.admin_chefe:
+            queryset = Empresa.objects.all()
         # Outros usuários veem apenas sua empresa
-        if user.empresa:
-            return Empresa.objects.filter(id=user.empresa_id)
+        elif contexto.empresa_id:
+            queryset = Empresa.objects.filter(id=contexto.empresa_id)
+        else:
+            return Empresa.objects.none()
 
-        return Empresa.objects.none()
+        # Total de usuários lido pelo EmpresaSerializer. Com o GROUP BY o
+        # Meta.ordering não é aplicado, então a ordenação é explícita
+        return queryset.annotate(total_usuarios_anotado=Count('usuarios')).order_by('nome')
 
     def get_serializer_class(self):
         """
@@ -56,6 +66,50 @@ class EmpresaViewSet(viewsets.ModelViewSet):
             return EmpresaCreateSerializer
         return EmpresaSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Listagem com GET condicional: a resposta traz ETag e Last-Modified, e
+        uma requisição com If-None-Match (ou If-Modified-Since) ainda válido
+        recebe 304 sem que a listagem seja montada.
+        """
+        etag, ultima_alteracao = self.versao_listagem()
+        resposta = get_conditional_response(request, etag=etag, last_modified=ultima_alteracao)
+        if resposta is None:
+            resposta = super().list(request, *args, **kwargs)
+        resposta['ETag'] = etag
+        if ultima_alteracao:
+            resposta['Last-Modified'] = http_date(ultima_alteracao)
+        # O navegador pode guardar a resposta, mas deve revalidá-la a cada uso
+        patch_cache_control(resposta, private=True, no_cache=True)
+        patch_vary_headers(resposta, ['Authorization'])
+        return resposta
+
+    def versao_listagem(self):
+        """
+        ETag e data da última alteração (timestamp) das empresas listadas.
+
+        A versão muda quando uma empresa é criada, alterada ou excluída e
+        quando os usuários delas mudam (o total_usuarios faz parte da
+        resposta). Exclusões não alteram a data, apenas a ETag.
+        """
+        empresas = self.filter_queryset(self.get_queryset()).order_by()
+        versao_empresas = empresas.aggregate(ultima=Max('atualizado_em'), quantidade=Count('id'))
+        versao_usuarios = Usuario.objects.filter(
+            empresa__in=empresas.values('id')
+        ).aggregate(ultima=Max('atualizado_em'), quantidade=Count('id'))
+
+        datas = [data for data in (versao_empresas['ultima'], versao_usuarios['ultima']) if data]
+        ultima_alteracao = int(max(datas).timestamp()) if datas else None
+        contexto = contexto_tenant(self.request)
+        assinatura = repr((
+            self.request.get_full_path(),
+            contexto.tipo_usuario,
+            contexto.empresa_id,
+            sorted(versao_empresas.items()),
+            sorted(versao_usuarios.items()),
+        )).encode()
+        return f'"{hashlib.md5(assinatura).hexdigest()}"', ultima_alteracao
+
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
         """
@@ -72,6 +126,13 @@ class EmpresaViewSet(viewsets.ModelViewSet):
         hoje = timezone.now().date()
         inicio_mes = hoje.replace(day=1)
 
+        # Os totais do mês não têm data final e as pendências usam todo o
+        # histórico, então o cache depende de todos os meses da empresa
+        chave_cache = chave_relatorio('empresa-dashboard', empresa.id, inicio_mes, None, historico=True)
+        dados = obter_relatorio(chave_cache)
+        if dados is not None:
+            return Response(dados)
+
         # Estatísticas
         total_usuarios = empresa.usuarios.filter(is_active=True).count()
         total_despesas_mes = Despesa.objects.filter(
@@ -98,7 +159,7 @@ class EmpresaViewSet(viewsets.ModelViewSet):
             status='PENDENTE'
         ).count()
 
-        return Response({
+        dados = {
             'empresa': EmpresaSerializer(empresa).data,
             'estatisticas': {
                 'total_usuarios': total_usuarios,
@@ -108,4 +169,6 @@ class EmpresaViewSet(viewsets.ModelViewSet):
                 'despesas_pendentes': despesas_pendentes,
                 'saldo_mes': float(total_receitas_mes + total_vendas_mes - total_despesas_mes),
             }
-        })
+        }
+        guardar_relatorio(chave_cache, dados)
+        return Response(dados)
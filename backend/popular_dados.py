@@ -12,8 +12,9 @@ django.setup()
 
 from empresas.models import Empresa
 from usuarios.models import Usuario
-from despesas.models import CategoriaDespesa, Despesa
-from receitas.models import CategoriaReceita, Receita
+from categorias.models import Categoria
+from despesas.models import Despesa
+from receitas.models import Receita
 from vendas.models import Cliente, Produto, Venda, ItemVenda
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -153,16 +154,16 @@ categorias_despesas = [
     ('Material de Escritório', 'Compras de material'),
 ]
 
+# Categorias são globais (compartilhadas por todas as empresas)
 count_cat_desp = 0
-for empresa in [empresa1, empresa2, empresa3]:
-    for nome, desc in categorias_despesas:
-        _, created = CategoriaDespesa.objects.get_or_create(
-            nome=nome,
-            empresa=empresa,
-            defaults={'descricao': desc, 'ativa': True}
-        )
-        if created:
-            count_cat_desp += 1
+for nome, desc in categorias_despesas:
+    _, created = Categoria.objects.get_or_create(
+        nome=nome,
+        tipo='DESPESA',
+        defaults={'descricao': desc, 'ativa': True}
+    )
+    if created:
+        count_cat_desp += 1
 
 print(f"   ✓ {count_cat_desp} categorias de despesa criadas")
 
@@ -172,16 +173,16 @@ categorias_receitas = [
     ('Investimentos', 'Retorno de investimentos'),
 ]
 
+# Categorias são globais (compartilhadas por todas as empresas)
 count_cat_rec = 0
-for empresa in [empresa1, empresa2, empresa3]:
-    for nome, desc in categorias_receitas:
-        _, created = CategoriaReceita.objects.get_or_create(
-            nome=nome,
-            empresa=empresa,
-            defaults={'descricao': desc, 'ativa': True}
-        )
-        if created:
-            count_cat_rec += 1
+for nome, desc in categorias_receitas:
+    _, created = Categoria.objects.get_or_create(
+        nome=nome,
+        tipo='RECEITA',
+        defaults={'descricao': desc, 'ativa': True}
+    )
+    if created:
+        count_cat_rec += 1
 
 print(f"   ✓ {count_cat_rec} categorias de receita criadas")
 
@@ -192,16 +193,16 @@ hoje = datetime.now().date()
 count_despesas = 0
 
 # Despesas da Tech Solutions
-cat_aluguel = CategoriaDespesa.objects.filter(nome='Aluguel', empresa=empresa1).first()
-cat_energia = CategoriaDespesa.objects.filter(nome='Energia', empresa=empresa1).first()
-cat_salarios = CategoriaDespesa.objects.filter(nome='Salários', empresa=empresa1).first()
+cat_aluguel = Categoria.objects.filter(nome='Aluguel', tipo='DESPESA').first()
+cat_energia = Categoria.objects.filter(nome='Energia', tipo='DESPESA').first()
+cat_salarios = Categoria.objects.filter(nome='Salários', tipo='DESPESA').first()
 
 despesas_tech = [
     ('Aluguel Janeiro 2026', cat_aluguel, 5000.00, hoje + timedelta(days=5), 'PENDENTE'),
     ('Energia Dezembro 2025', cat_energia, 850.00, hoje - timedelta(days=2), 'VENCIDA'),
     ('Salários Janeiro 2026', cat_salarios, 45000.00, hoje + timedelta(days=3), 'PENDENTE'),
     ('Aluguel Dezembro 2025', cat_aluguel, 5000.00, hoje - timedelta(days=30), 'PAGA'),
-    ('Internet Janeiro 2026', CategoriaDespesa.objects.filter(nome='Internet', empresa=empresa1).first(), 299.00, hoje + timedelta(days=10), 'PENDENTE'),
+    ('Internet Janeiro 2026', Categoria.objects.filter(nome='Internet', tipo='DESPESA').first(), 299.00, hoje + timedelta(days=10), 'PENDENTE'),
 ]
 
 for desc, cat, valor, venc, status in despesas_tech:
@@ -222,8 +223,8 @@ for desc, cat, valor, venc, status in despesas_tech:
         count_despesas += 1
 
 # Despesas do Comércio ABC
-cat_aluguel2 = CategoriaDespesa.objects.filter(nome='Aluguel', empresa=empresa2).first()
-cat_energia2 = CategoriaDespesa.objects.filter(nome='Energia', empresa=empresa2).first()
+cat_aluguel2 = Categoria.objects.filter(nome='Aluguel', tipo='DESPESA').first()
+cat_energia2 = Categoria.objects.filter(nome='Energia', tipo='DESPESA').first()
 
 despesas_abc = [
     ('Aluguel Janeiro 2026', cat_aluguel2, 3500.00, hoje + timedelta(days=10), 'PENDENTE'),
@@ -253,8 +254,8 @@ print(f"   ✓ {count_despesas} despesas criadas")
 # 5. CRIAR RECEITAS
 print("\n[5/6] Criando Receitas...")
 
-cat_vendas = CategoriaReceita.objects.filter(nome='Vendas', empresa=empresa1).first()
-cat_servicos = CategoriaReceita.objects.filter(nome='Serviços', empresa=empresa1).first()
+cat_vendas = Categoria.objects.filter(nome='Vendas', tipo='RECEITA').first()
+cat_servicos = Categoria.objects.filter(nome='Serviços', tipo='RECEITA').first()
 
 count_receitas = 0
 receitas = [
@@ -446,8 +447,8 @@ print("RESUMO FINAL")
 print("=" * 80)
 print(f"✓ Empresas: {Empresa.objects.count()}")
 print(f"✓ Usuários: {Usuario.objects.count()}")
-print(f"✓ Categorias de Despesas: {CategoriaDespesa.objects.count()}")
-print(f"✓ Categorias de Receitas: {CategoriaReceita.objects.count()}")
+print(f"✓ Categorias de Despesas: {Categoria.objects.filter(tipo='DESPESA').count()}")
+print(f"✓ Categorias de Receitas: {Categoria.objects.filter(tipo='RECEITA').count()}")
 print(f"✓ Despesas: {Despesa.objects.count()}")
 print(f"✓ Receitas: {Receita.objects.count()}")
 print(f"✓ Clientes: {Cliente.objects.count()}")
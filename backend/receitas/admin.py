@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Sum
 from django.utils import timezone
 from .models import Receita
+from core.totalizadores import TotalizadoresAdminMixin
+from relatorios.resumo import atualizar_resumo, buckets_do_queryset
 
 
 @admin.register(Receita)
-class ReceitaAdmin(admin.ModelAdmin):
+class ReceitaAdmin(TotalizadoresAdminMixin, admin.ModelAdmin):
     list_display = ['descricao', 'empresa', 'categoria', 'valor_formatado',
                     'data_prevista', 'status_badge', 'dias_para_recebimento']
     list_filter = ['status', 'forma_recebimento', 'empresa', 'categoria',
@@ -15,6 +16,8 @@ class ReceitaAdmin(admin.ModelAdmin):
     date_hierarchy = 'data_prevista'
     readonly_fields = ['criado_em', 'atualizado_em']
     list_per_page = 50
+    totalizador_campo = 'valor'
+    totalizador_status = ['PREVISTA', 'RECEBIDA', 'ATRASADA']
     list_select_related = ['empresa', 'categoria', 'usuario_cadastro']
 
     fieldsets = (
@@ -40,8 +43,8 @@ class ReceitaAdmin(admin.ModelAdmin):
     def valor_formatado(self, obj):
         """Formata o valor em reais"""
         return format_html(
-            '<strong style="color: #388e3c;">R$ {:,.2f}</strong>',
-            obj.valor
+            '<strong style="color: #388e3c;">R$ {}</strong>',
+            f'{obj.valor:,.2f}'
         )
     valor_formatado.short_description = 'Valor'
     valor_formatado.admin_order_field = 'valor'
@@ -90,36 +93,22 @@ class ReceitaAdmin(admin.ModelAdmin):
     actions = ['marcar_como_recebida', 'marcar_como_prevista', 'marcar_como_cancelada']
 
     def marcar_como_recebida(self, request, queryset):
+        buckets = buckets_do_queryset('RECEITA', queryset)
         updated = queryset.update(status='RECEBIDA', data_recebimento=timezone.now().date())
+        atualizar_resumo('RECEITA', buckets)
         self.message_user(request, f'{updated} receita(s) marcada(s) como RECEBIDA.')
     marcar_como_recebida.short_description = 'Marcar como RECEBIDA'
 
     def marcar_como_prevista(self, request, queryset):
+        buckets = buckets_do_queryset('RECEITA', queryset)
         updated = queryset.update(status='PREVISTA', data_recebimento=None)
+        atualizar_resumo('RECEITA', buckets)
         self.message_user(request, f'{updated} receita(s) marcada(s) como PREVISTA.')
     marcar_como_prevista.short_description = 'Marcar como PREVISTA'
 
     def marcar_como_cancelada(self, request, queryset):
+        buckets = buckets_do_queryset('RECEITA', queryset)
         updated = queryset.update(status='CANCELADA')
+        atualizar_resumo('RECEITA', buckets)
         self.message_user(request, f'{updated} receita(s) CANCELADA(S).')
     marcar_como_cancelada.short_description = 'Marcar como CANCELADA'
-
-    def changelist_view(self, request, extra_context=None):
-        """Adiciona totalizadores na parte superior da lista"""
-        extra_context = extra_context or {}
-
-        cl = self.get_changelist_instance(request)
-        queryset = cl.get_queryset(request)
-
-        total_geral = queryset.aggregate(total=Sum('valor'))['total'] or 0
-        total_prevista = queryset.filter(status='PREVISTA').aggregate(total=Sum('valor'))['total'] or 0
-        total_recebida = queryset.filter(status='RECEBIDA').aggregate(total=Sum('valor'))['total'] or 0
-        total_atrasada = queryset.filter(status='ATRASADA').aggregate(total=Sum('valor'))['total'] or 0
-
-        extra_context['total_geral'] = f'R$ {total_geral:,.2f}'
-        extra_context['total_prevista'] = f'R$ {total_prevista:,.2f}'
-        extra_context['total_recebida'] = f'R$ {total_recebida:,.2f}'
-        extra_context['total_atrasada'] = f'R$ {total_atrasada:,.2f}'
-        extra_context['quantidade'] = queryset.count()
-
-        return super().changelist_view(request, extra_context=extra_context)
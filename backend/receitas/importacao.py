@@ -0,0 +1,13 @@
+from core.importacao import Importador
+from .models import Receita
+
+
+importador_receitas = Importador(
+    Receita,
+    campos=[
+        'descricao', 'categoria', 'valor', 'data_prevista', 'data_recebimento',
+        'forma_recebimento', 'status', 'observacoes',
+    ],
+    tipo_categoria='RECEITA',
+    origem='RECEITA',
+)
@@ -0,0 +1,7 @@
+from core.importacao import ImportacaoCommand
+from receitas.importacao import importador_receitas
+
+
+class Command(ImportacaoCommand):
+    help = 'Importa receitas de um arquivo CSV ou XLSX, gerando um relatorio com as linhas rejeitadas'
+    importador = importador_receitas
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categorias', '0001_initial'),
+        ('empresas', '0001_initial'),
+        ('receitas', '0003_alter_receita_categoria_delete_categoriareceita'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='receita',
+            index=models.Index(fields=['empresa', 'status', 'data_prevista', 'valor'], name='receitas_re_empresa_e22a3f_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='receita',
+            name='receitas_re_empresa_ade08c_idx',
+        ),
+    ]
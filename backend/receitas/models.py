@@ -82,7 +82,10 @@ class Receita(models.Model):
         ordering = ['-data_prevista']
         indexes = [
             models.Index(fields=['empresa', 'data_prevista']),
-            models.Index(fields=['empresa', 'status']),
+            # Relatórios: empresa + status + período, somando valor sem ler
+            # as linhas da tabela (índice de cobertura). Começa por (empresa,
+            # status), então também atende os filtros só por eles
+            models.Index(fields=['empresa', 'status', 'data_prevista', 'valor']),
         ]
 
     def __str__(self):
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.campos import CamposDinamicosMixin
 from .models import Receita
 
 
-class ReceitaSerializer(serializers.ModelSerializer):
+class ReceitaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
     usuario_cadastro_nome = serializers.CharField(source='usuario_cadastro.get_full_name', read_only=True)
 
@@ -14,3 +15,17 @@ class ReceitaSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['usuario_cadastro'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class ReceitaListSerializer(serializers.ModelSerializer):
+    """
+    Serializer compacto para a listagem de receitas (sem observações e anexo).
+    """
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
+
+    class Meta:
+        model = Receita
+        fields = [
+            'id', 'empresa', 'categoria', 'categoria_nome', 'descricao', 'valor',
+            'data_prevista', 'data_recebimento', 'forma_recebimento', 'status'
+        ]
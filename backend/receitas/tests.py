@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.test import TestCase
+
+from core.fabricas import cliente_api, criar_categoria, criar_empresa, criar_receita, criar_usuario
+
+
+class PaginacaoCursorReceitasTest(TestCase):
+    """?paginacao=cursor percorre as receitas nos dois sentidos sem repetir nem pular registros"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        categoria = criar_categoria(tipo='RECEITA')
+        # Datas repetidas: o id desempata a ordenação
+        receitas = [
+            criar_receita(self.empresa, categoria, self.usuario, data_prevista=date(2026, 7, dia))
+            for dia in (5, 3, 5, 1, 3)
+        ]
+        self.ordem = [
+            receita.pk for receita in sorted(receitas, key=lambda r: (r.data_prevista, r.pk), reverse=True)
+        ]
+
+    def pagina(self, url):
+        resposta = self.api.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data, [receita['id'] for receita in resposta.data['results']]
+
+    def test_proxima_e_anterior(self):
+        dados, ids = self.pagina('/api/receitas/?paginacao=cursor&page_size=2')
+        self.assertIsNone(dados['previous'])
+        self.assertNotIn('count', dados)
+        paginas = [ids]
+        while dados['next']:
+            dados, ids = self.pagina(dados['next'])
+            paginas.append(ids)
+        self.assertEqual([pk for ids in paginas for pk in ids], self.ordem)
+        self.assertEqual([len(ids) for ids in paginas], [2, 2, 1])
+
+        # Voltando da última página
+        voltando = []
+        while dados['previous']:
+            dados, ids = self.pagina(dados['previous'])
+            voltando.append(ids)
+        self.assertEqual(voltando, [paginas[1], paginas[0]])
+        self.assertIsNotNone(dados['next'])
+
+    def test_cursor_e_modo_invalidos(self):
+        self.assertEqual(self.api.get('/api/receitas/?paginacao=cursor&cursor=xyz').status_code, 404)
+        self.assertEqual(self.api.get('/api/receitas/?paginacao=offset').status_code, 400)
@@ -2,23 +2,50 @@ from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
 
+from .importacao import importador_receitas
 from .models import Receita
-from .serializers import ReceitaSerializer
+from .serializers import ReceitaSerializer, ReceitaListSerializer
+from usuarios.contexto import contexto_tenant
 from usuarios.permissions import MultiTenantPermission
+from core.campos import CamposEsparsosMixin
+from core.paginacao import PaginacaoCursorMixin
+from core.exportacao import ExportacaoMixin
+from core.importacao import ImportacaoMixin
 
 
-class ReceitaViewSet(viewsets.ModelViewSet):
+class ReceitaViewSet(ExportacaoMixin, ImportacaoMixin, CamposEsparsosMixin, PaginacaoCursorMixin, viewsets.ModelViewSet):
     queryset = Receita.objects.all()
     serializer_class = ReceitaSerializer
+    list_serializer_class = ReceitaListSerializer
     permission_classes = [IsAuthenticated, MultiTenantPermission]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['empresa', 'categoria', 'status', 'forma_recebimento', 'data_prevista']
     search_fields = ['descricao', 'observacoes']
     ordering_fields = ['data_prevista', 'valor', 'criado_em']
     ordering = ['-data_prevista']
+    cursor_campo = 'data_prevista'
+    importador = importador_receitas
+    export_nome = 'receitas'
+    export_campos = [
+        ('id', 'ID'),
+        ('empresa__nome', 'Empresa'),
+        ('categoria__nome', 'Categoria'),
+        ('descricao', 'Descrição'),
+        ('valor', 'Valor'),
+        ('data_prevista', 'Data Prevista'),
+        ('data_recebimento', 'Data de Recebimento'),
+        ('forma_recebimento', 'Forma de Recebimento'),
+        ('status', 'Status'),
+        ('observacoes', 'Observações'),
+    ]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.tipo_usuario == 'ADMIN_CHEFE':
-            return Receita.objects.all()
-        return Receita.objects.filter(empresa=user.empresa)
+        contexto = contexto_tenant(self.request)
+        if contexto.admin_chefe:
+            queryset = Receita.objects.all()
+        else:
+            queryset = Receita.objects.filter(empresa_id=contexto.empresa_id)
+
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.select_related('categoria', 'usuario_cadastro')
+        return queryset
@@ -1,3 +1,22 @@
 from django.contrib import admin
+from .models import ResumoMensal
 
-# Este app não tem models, apenas views para relatórios
+
+@admin.register(ResumoMensal)
+class ResumoMensalAdmin(admin.ModelAdmin):
+    """
+    Consulta do resumo mensal. Os dados são mantidos automaticamente
+    e não devem ser editados manualmente.
+    """
+    list_display = ['empresa', 'origem', 'mes', 'status', 'categoria',
+                    'forma_pagamento', 'quantidade', 'valor', 'atualizado_em']
+    list_filter = ['origem', 'status', 'empresa', 'mes']
+    date_hierarchy = 'mes'
+    list_select_related = ['empresa', 'categoria']
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
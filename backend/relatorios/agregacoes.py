@@ -0,0 +1,170 @@
+"""
+Motor de agregação dos relatórios.
+
+Em vez de executar uma consulta por período, cada fonte de dados (vendas,
+receitas, despesas) é agregada em uma única consulta agrupada pelo período
+(dia, semana, mês ou trimestre) e, quando necessário, por outros campos
+como a categoria. A montagem das linhas período a período é feita em Python.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.db.models import Sum, Count
+from django.db.models.functions import (
+    TruncDay, TruncWeek, TruncMonth, TruncQuarter
+)
+
+
+# Granularidades aceitas e a função de truncamento correspondente
+GRANULARIDADES = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+    'trimestre': TruncQuarter,
+}
+
+
+def add_months(source_date, months):
+    """Adiciona meses a uma data (substitui relativedelta)"""
+    month = source_date.month - 1 + months
+    year = source_date.year + month // 12
+    month = month % 12 + 1
+    day = min(source_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def inicio_do_periodo(data, granularidade):
+    """Retorna o primeiro dia do período (dia, semana, mês ou trimestre) da data"""
+    if granularidade == 'dia':
+        return data
+    if granularidade == 'semana':
+        # Semana iniciando na segunda-feira, como TruncWeek
+        return data - timedelta(days=data.weekday())
+    if granularidade == 'trimestre':
+        return date(data.year, (data.month - 1) // 3 * 3 + 1, 1)
+    return data.replace(day=1)
+
+
+def proximo_periodo(inicio, granularidade):
+    """Retorna o primeiro dia do período seguinte"""
+    if granularidade == 'dia':
+        return inicio + timedelta(days=1)
+    if granularidade == 'semana':
+        return inicio + timedelta(days=7)
+    if granularidade == 'trimestre':
+        return add_months(inicio, 3)
+    return add_months(inicio, 1)
+
+
+def periodos_do_intervalo(dt_inicio, dt_fim, granularidade='mes'):
+    """
+    Retorna o primeiro dia de cada período entre dt_inicio e dt_fim (inclusive).
+    """
+    periodos = []
+    atual = inicio_do_periodo(dt_inicio, granularidade)
+    ultimo = inicio_do_periodo(dt_fim, granularidade)
+    while atual <= ultimo:
+        periodos.append(atual)
+        atual = proximo_periodo(atual, granularidade)
+    return periodos
+
+
+def meses_do_periodo(dt_inicio, dt_fim):
+    """
+    Retorna o primeiro dia de cada mês entre dt_inicio e dt_fim (inclusive).
+    """
+    return periodos_do_intervalo(dt_inicio, dt_fim, 'mes')
+
+
+def rotulo_periodo(inicio, granularidade):
+    """
+    Retorna (rotulo, chave) do período para exibição e ordenação.
+    Ex.: mes -> ('JAN 25', '2025-01'), trimestre -> ('T1 25', '2025-T1')
+    """
+    if granularidade == 'dia':
+        return inicio.strftime('%d/%m/%y'), inicio.isoformat()
+    if granularidade == 'semana':
+        ano, semana, _ = inicio.isocalendar()
+        return f"SEM {inicio.strftime('%d/%m/%y')}", f'{ano}-W{semana:02d}'
+    if granularidade == 'trimestre':
+        trimestre = (inicio.month - 1) // 3 + 1
+        return f"T{trimestre} {inicio.strftime('%y')}", f'{inicio.year}-T{trimestre}'
+    return inicio.strftime('%b %y').upper(), inicio.strftime('%Y-%m')
+
+
+def filtrar_periodo(queryset, campo_data, periodos, granularidade='mes'):
+    """
+    Restringe o queryset aos períodos completos informados.
+    """
+    if not periodos:
+        return queryset.none()
+    return queryset.filter(**{
+        f'{campo_data}__gte': periodos[0],
+        f'{campo_data}__lt': proximo_periodo(periodos[-1], granularidade),
+    })
+
+
+def agregar_por_periodo(queryset, campo_data, granularidade, somas, agrupar_por=(), contar=None):
+    """
+    Agrega o queryset em uma única consulta agrupada por período.
+
+    - granularidade: 'dia', 'semana', 'mes' ou 'trimestre'
+    - somas: dict {alias: campo} somados com Sum(campo); também aceita uma
+      expressão pronta como valor (ex.: {'qtde': Sum('quantidade')})
+    - agrupar_por: campos extras do GROUP BY (ex.: 'categoria__nome')
+    - contar: alias opcional para Count('id')
+
+    Retorna um dict {inicio_do_periodo: [linhas]}, onde cada linha é um
+    dict com os campos de agrupamento e os aliases. Como só existem linhas
+    para grupos com movimento, as somas nunca são nulas.
+    """
+    truncar = GRANULARIDADES[granularidade]
+    valores = {
+        alias: campo if hasattr(campo, 'resolve_expression') else Sum(campo)
+        for alias, campo in somas.items()
+    }
+    if contar:
+        valores[contar] = Count('id')
+
+    linhas = queryset.annotate(
+        periodo_ref=truncar(campo_data)
+    ).values(
+        'periodo_ref', *agrupar_por
+    ).annotate(**valores).order_by()
+
+    resultado = defaultdict(list)
+    for linha in linhas:
+        periodo = linha.pop('periodo_ref')
+        if isinstance(periodo, datetime):
+            periodo = periodo.date()
+        resultado[periodo].append(linha)
+    return resultado
+
+
+def agregar_por_mes(queryset, campo_data, somas, agrupar_por=(), contar=None):
+    """
+    Atalho de agregar_por_periodo com granularidade mensal.
+    """
+    return agregar_por_periodo(
+        queryset, campo_data, 'mes', somas, agrupar_por=agrupar_por, contar=contar
+    )
+
+
+def totais_do_periodo(resultado, periodo, aliases):
+    """
+    Soma as linhas de um período do resultado de agregar_por_periodo.
+    Períodos sem movimento retornam zero em todos os aliases.
+    """
+    totais = {alias: 0 for alias in aliases}
+    for linha in resultado.get(periodo, []):
+        for alias in aliases:
+            totais[alias] += linha[alias]
+    return totais
+
+
+def calc_variacao(atual_val, anterior_val):
+    """Variação percentual entre dois valores (100% quando parte de zero)"""
+    if anterior_val == 0:
+        return 0 if atual_val == 0 else 100
+    return round(((atual_val - anterior_val) / anterior_val) * 100, 1)
@@ -0,0 +1,150 @@
+"""
+Cache dos resultados dos relatórios.
+
+Cada resultado é guardado com uma chave formada pelo relatório, pelo escopo
+(id da empresa ou "consolidado"), pelo período, pelos demais parâmetros e
+pelas versões dos meses que o período cobre. Gravar ou excluir uma venda,
+despesa ou receita troca apenas a versão do mês daquela empresa (e do
+consolidado), então só os resultados que dependem desse mês deixam de ser
+encontrados; os demais continuam válidos.
+
+Os resultados antigos não são apagados: saem do cache pelo TTL ou pela
+política LRU do backend (ver CACHES['relatorios'] em core/settings.py).
+
+As versões ficam no cache "default". Com um backend compartilhado entre os
+processos, uma gravação em um worker troca a versão lida por todos, e os
+resultados guardados no cache local dos demais workers deixam de ser
+encontrados. Com o cache "default" local a cada processo (LocMemCache, o
+padrão), a troca não chegaria aos demais workers, que continuariam servindo
+os valores antigos até o TTL; nesse caso os resultados não são guardados e
+cada relatório é calculado a cada requisição.
+"""
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+from core.cache import cache_compartilhado
+from .agregacoes import meses_do_periodo
+
+
+CACHE_ALIAS = 'relatorios'
+CACHE_VERSOES_ALIAS = 'default'
+
+# Parâmetros já representados pelo escopo e pelo período da chave; "format"
+# só escolhe o renderer (JSON ou PDF) do mesmo resultado
+PARAMETROS_IGNORADOS = ('empresa', 'empresa_id', 'data_inicio', 'data_fim', 'format')
+
+
+def cache_relatorios():
+    return caches[CACHE_ALIAS]
+
+
+def cache_versoes():
+    return caches[CACHE_VERSOES_ALIAS]
+
+
+def escopo_cache(empresa_id):
+    """Escopo de cache: o id da empresa ou 'consolidado'"""
+    return 'consolidado' if empresa_id is None else str(empresa_id)
+
+
+def _tokens(escopo, dt_inicio, dt_fim, historico):
+    """
+    Tokens de versão dos quais o resultado depende: o escopo em si e cada
+    mês coberto. Sem período (ou com historico=True), depende de todos os
+    meses.
+    """
+    tokens = [f'relatorios:versao:{escopo}']
+    if dt_inicio and dt_fim:
+        tokens += [
+            f'relatorios:versao:{escopo}:{mes:%Y-%m}'
+            for mes in meses_do_periodo(dt_inicio, dt_fim)
+        ]
+    if historico or not (dt_inicio and dt_fim):
+        tokens.append(f'relatorios:versao:{escopo}:todos')
+    return tokens
+
+
+def _versoes(tokens):
+    """
+    Lê as versões dos tokens. Tokens ausentes (nunca gravados ou removidos
+    pelo LRU) recebem uma versão nova, para não reaproveitar resultados
+    antigos que ainda estejam no cache.
+    """
+    cache = cache_versoes()
+    versoes = cache.get_many(tokens)
+    ausentes = {token: time.time_ns() for token in tokens if token not in versoes}
+    if ausentes:
+        cache.set_many(ausentes, timeout=None)
+        versoes.update(ausentes)
+    return [versoes[token] for token in tokens]
+
+
+def chave_relatorio(relatorio, empresa_id, dt_inicio, dt_fim, params=None, historico=False):
+    """
+    Monta a chave de cache de um relatório.
+
+    - relatorio: nome do relatório (ex.: 'dre')
+    - empresa_id: empresa do relatório ou None para o consolidado
+    - dt_inicio / dt_fim: período dos dados lidos (None para todo o histórico)
+    - params: demais parâmetros que alteram o resultado
+    - historico: o resultado também usa dados fora do período (ex.: pendências)
+    """
+    escopo = escopo_cache(empresa_id)
+    params = {
+        nome: valor for nome, valor in (params or {}).items()
+        if nome not in PARAMETROS_IGNORADOS
+    }
+    versoes = _versoes(_tokens(escopo, dt_inicio, dt_fim, historico))
+
+    assinatura = repr((sorted(params.items()), versoes)).encode()
+    return 'relatorios:{}:{}:{}:{}:{}'.format(
+        relatorio, escopo, dt_inicio, dt_fim, hashlib.md5(assinatura).hexdigest()
+    )
+
+
+def relatorios_em_cache():
+    """Os resultados só são guardados se as versões são vistas por todos os processos"""
+    return cache_compartilhado(CACHE_VERSOES_ALIAS)
+
+
+def obter_relatorio(chave):
+    """Resultado em cache ou None"""
+    if not relatorios_em_cache():
+        return None
+    return cache_relatorios().get(chave)
+
+
+def guardar_relatorio(chave, dados):
+    if relatorios_em_cache():
+        cache_relatorios().set(chave, dados)
+
+
+def invalidar_meses(buckets):
+    """
+    Troca a versão dos meses afetados. buckets é um iterável de
+    (empresa_id, data). Executado após o commit, para que nenhum relatório
+    seja calculado e guardado com os dados anteriores à gravação.
+    """
+    tokens = set()
+    for empresa_id, data in buckets:
+        if not data:
+            continue
+        for escopo in (escopo_cache(empresa_id), escopo_cache(None)):
+            tokens.add(f'relatorios:versao:{escopo}:{data:%Y-%m}')
+            tokens.add(f'relatorios:versao:{escopo}:todos')
+
+    if tokens:
+        transaction.on_commit(
+            lambda: cache_versoes().set_many(dict.fromkeys(tokens, time.time_ns()), timeout=None)
+        )
+
+
+def invalidar_empresa(empresa_id):
+    """Invalida todos os relatórios da empresa e do consolidado"""
+    tokens = [f'relatorios:versao:{escopo_cache(empresa_id)}', f'relatorios:versao:{escopo_cache(None)}']
+    transaction.on_commit(
+        lambda: cache_versoes().set_many(dict.fromkeys(tokens, time.time_ns()), timeout=None)
+    )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from relatorios.resumo import FONTES, reconstruir_resumo
+
+
+class Command(BaseCommand):
+    help = 'Reconstroi a tabela pre-agregada de resumo mensal (vendas, despesas e receitas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--origem',
+            action='append',
+            choices=list(FONTES),
+            help='Origem a reconstruir (pode ser repetido). Padrao: todas'
+        )
+        parser.add_argument(
+            '--empresa',
+            action='append',
+            type=int,
+            help='ID da empresa a reconstruir (pode ser repetido). Padrao: todas'
+        )
+
+    def handle(self, *args, **options):
+        origens = options['origem'] or list(FONTES)
+        self.stdout.write(f"Reconstruindo resumo mensal: {', '.join(origens)}...")
+
+        total = reconstruir_resumo(origens=origens, empresa_ids=options['empresa'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total} linhas de resumo gravadas.'))
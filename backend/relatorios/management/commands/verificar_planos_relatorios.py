@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from despesas.models import Despesa
+from empresas.models import Empresa
+from receitas.models import Receita
+from relatorios.resumo import filtro_empresas_ativas
+from vendas.models import Venda
+
+
+def nome_indice(model, campos):
+    """Nome do índice do model com exatamente esses campos"""
+    for indice in model._meta.indexes:
+        if list(indice.fields) == campos:
+            return indice.name
+    raise CommandError(f'{model.__name__} não tem índice em {campos}')
+
+
+def leitura_completa(plano, tabela):
+    """Indica se o plano lê a tabela (ou um índice dela) inteira em vez de uma faixa"""
+    for linha in plano.splitlines():
+        partes = linha.split()
+        if connection.vendor == 'sqlite':
+            # "SCAN tabela [USING ... INDEX ...]" x "SEARCH tabela USING ..."
+            if 'SCAN' in partes and tabela in partes:
+                return True
+        elif connection.vendor == 'mysql':
+            # Formato tradicional: id select_type table partitions type ...
+            if len(partes) > 4 and partes[2] == tabela and partes[4] in ('ALL', 'index'):
+                return True
+        elif connection.vendor == 'postgresql':
+            if f'Seq Scan on {tabela}' in linha:
+                return True
+    return False
+
+
+def consultas_relatorios(empresa_id, dt_inicio, dt_fim):
+    """
+    (descrição, queryset, índices aceitos) das consultas dos relatórios
+    sobre as tabelas brutas (períodos parciais e RELATORIOS_USAR_RESUMO=False)
+    """
+    indice_vendas = nome_indice(Venda, ['empresa', 'status', 'data_venda', 'valor_total', 'desconto'])
+    indice_despesas = nome_indice(Despesa, ['empresa', 'status', 'data_vencimento', 'categoria', 'valor'])
+    indice_receitas = nome_indice(Receita, ['empresa', 'status', 'data_prevista', 'valor'])
+
+    vendas = Venda.objects.filter(data_venda__gte=dt_inicio, data_venda__lte=dt_fim)
+    despesas = Despesa.objects.filter(data_vencimento__gte=dt_inicio, data_vencimento__lte=dt_fim)
+    receitas = Receita.objects.filter(data_prevista__gte=dt_inicio, data_prevista__lte=dt_fim)
+    empresas_ativas = filtro_empresas_ativas()
+
+    return [
+        (
+            'Vendas por status no periodo (financeiro, dashboard)',
+            vendas.filter(empresa_id=empresa_id, status__in=['PAGA', 'PENDENTE']).values('status').annotate(
+                total=Sum('valor_total'), desconto=Sum('desconto'), quantidade=Count('id')
+            ).order_by(),
+            [indice_vendas],
+        ),
+        (
+            'Vendas pagas por mes (financeiro, DRE)',
+            vendas.filter(empresa_id=empresa_id, status='PAGA').annotate(
+                periodo=TruncMonth('data_venda')
+            ).values('periodo').annotate(total=Sum('valor_total')).order_by(),
+            [indice_vendas],
+        ),
+        (
+            'Vendas pagas das empresas ativas (consolidado)',
+            vendas.filter(**empresas_ativas, status='PAGA').values('empresa_id').annotate(
+                total=Sum('valor_total')
+            ).order_by(),
+            [indice_vendas],
+        ),
+        (
+            'Despesas pagas por categoria (DRE, financeiro, dashboard)',
+            despesas.filter(empresa_id=empresa_id, status='PAGA').values('categoria__nome').annotate(
+                total=Sum('valor'), quantidade=Count('id')
+            ).order_by(),
+            [indice_despesas],
+        ),
+        (
+            'Despesas pagas das empresas ativas (consolidado)',
+            despesas.filter(**empresas_ativas, status='PAGA').values('empresa_id').annotate(
+                total=Sum('valor')
+            ).order_by(),
+            [indice_despesas],
+        ),
+        (
+            'Receitas recebidas por mes (DRE, dashboard)',
+            receitas.filter(empresa_id=empresa_id, status='RECEBIDA').annotate(
+                periodo=TruncMonth('data_prevista')
+            ).values('periodo').annotate(total=Sum('valor')).order_by(),
+            [indice_receitas],
+        ),
+        (
+            'Receitas recebidas das empresas ativas (consolidado)',
+            receitas.filter(**empresas_ativas, status='RECEBIDA').values('empresa_id').annotate(
+                total=Sum('valor')
+            ).order_by(),
+            [indice_receitas],
+        ),
+        (
+            'Top clientes do periodo (dashboard)',
+            vendas.filter(empresa_id=empresa_id, cliente__isnull=False).exclude(status='CANCELADA').values(
+                'cliente_id'
+            ).annotate(total=Sum('valor_total')).order_by(),
+            [indice_vendas, nome_indice(Venda, ['empresa', 'data_venda'])],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Confere com EXPLAIN se as consultas dos relatorios sobre vendas, despesas e '
+        'receitas usam os indices compostos. Use com uma base de tamanho real: em tabelas '
+        'pequenas o banco pode preferir ler a tabela inteira'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='ID da empresa consultada. Padrao: a primeira')
+        parser.add_argument(
+            '--dias', type=int, default=90, help='Tamanho do periodo consultado, ate hoje. Padrao: 90'
+        )
+        parser.add_argument(
+            '--analisar', action='store_true', help='Atualiza as estatisticas das tabelas (ANALYZE) antes'
+        )
+
+    def handle(self, *args, **options):
+        empresa_id = options['empresa']
+        if empresa_id is None:
+            empresa_id = Venda.objects.order_by('empresa_id').values_list('empresa_id', flat=True).first() or 0
+        dt_fim = date.today()
+        dt_inicio = dt_fim - timedelta(days=options['dias'])
+
+        if options['analisar']:
+            self.analisar()
+
+        falhas = 0
+        for descricao, queryset, indices in consultas_relatorios(empresa_id, dt_inicio, dt_fim):
+            plano = queryset.explain()
+            usado = next((indice for indice in indices if indice in plano), None)
+            if usado is None:
+                erro = f'nenhum de {", ".join(indices)}'
+            elif leitura_completa(plano, queryset.model._meta.db_table):
+                erro = f'{usado} lido por inteiro'
+            else:
+                erro = None
+
+            if erro:
+                falhas += 1
+                self.stdout.write(self.style.ERROR(f'FALHA  {descricao}: {erro}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK     {descricao}: {usado}'))
+            if erro or options['verbosity'] > 1:
+                self.stdout.write(plano)
+
+        if falhas:
+            raise CommandError(f'{falhas} consulta(s) sem uso dos indices ({connection.vendor})')
+        self.stdout.write(self.style.SUCCESS('Todas as consultas usam os indices compostos.'))
+
+    def analisar(self):
+        tabelas = [model._meta.db_table for model in (Empresa, Venda, Despesa, Receita)]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f"ANALYZE TABLE {', '.join(tabelas)}")
+            else:
+                for tabela in tabelas:
+                    cursor.execute(f'ANALYZE {tabela}')
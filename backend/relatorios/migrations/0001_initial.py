@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-18 05:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('categorias', '0001_initial'),
+        ('empresas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origem', models.CharField(choices=[('VENDA', 'Venda'), ('DESPESA', 'Despesa'), ('RECEITA', 'Receita')], max_length=10, verbose_name='Origem')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês', verbose_name='Mês')),
+                ('status', models.CharField(max_length=15, verbose_name='Status')),
+                ('forma_pagamento', models.CharField(help_text='Forma de pagamento (vendas/despesas) ou de recebimento (receitas)', max_length=20, verbose_name='Forma de Pagamento')),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Valor')),
+                ('desconto', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Desconto')),
+                ('chargeback', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Chargeback')),
+                ('reversao_chargeback', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Reversao de Chargeback')),
+                ('quantidade', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumos_mensais', to='categorias.categoria', verbose_name='Categoria')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_mensais', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal',
+                'verbose_name_plural': 'Resumos Mensais',
+                'ordering': ['-mes'],
+                'indexes': [models.Index(fields=['empresa', 'origem', 'mes'], name='relatorios__empresa_02c1ae_idx'), models.Index(fields=['origem', 'mes'], name='relatorios__origem_09ce0a_idx')],
+            },
+        ),
+    ]
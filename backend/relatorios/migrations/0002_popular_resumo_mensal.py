@@ -0,0 +1,77 @@
+from django.db import migrations
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+
+
+# (origem, app, model, campo de data, campo de valor, campo de forma, tem categoria)
+FONTES = [
+    ('VENDA', 'vendas', 'Venda', 'data_venda', 'valor_total', 'forma_pagamento', False),
+    ('DESPESA', 'despesas', 'Despesa', 'data_vencimento', 'valor', 'forma_pagamento', True),
+    ('RECEITA', 'receitas', 'Receita', 'data_prevista', 'valor', 'forma_recebimento', True),
+]
+
+
+def popular_resumo(apps, schema_editor):
+    """Preenche o resumo mensal com os lançamentos já existentes"""
+    ResumoMensal = apps.get_model('relatorios', 'ResumoMensal')
+
+    for origem, app, model_name, campo_data, campo_valor, campo_forma, tem_categoria in FONTES:
+        Model = apps.get_model(app, model_name)
+
+        agrupar_por = ['empresa_id', 'status', campo_forma]
+        if tem_categoria:
+            agrupar_por.append('categoria_id')
+
+        somas = {'soma_valor': Sum(campo_valor)}
+        if origem == 'VENDA':
+            somas.update(
+                soma_desconto=Sum('desconto'),
+                soma_chargeback=Sum('chargeback'),
+                soma_reversao_chargeback=Sum('reversao_chargeback'),
+            )
+
+        grupos = Model.objects.annotate(
+            mes_ref=TruncMonth(campo_data)
+        ).values(
+            'mes_ref', *agrupar_por
+        ).annotate(
+            quantidade_ref=Count('id'), **somas
+        ).order_by()
+
+        ResumoMensal.objects.bulk_create(
+            (
+                ResumoMensal(
+                    origem=origem,
+                    empresa_id=grupo['empresa_id'],
+                    mes=grupo['mes_ref'],
+                    status=grupo['status'],
+                    categoria_id=grupo.get('categoria_id'),
+                    forma_pagamento=grupo[campo_forma],
+                    quantidade=grupo['quantidade_ref'],
+                    valor=grupo['soma_valor'] or 0,
+                    desconto=grupo.get('soma_desconto') or 0,
+                    chargeback=grupo.get('soma_chargeback') or 0,
+                    reversao_chargeback=grupo.get('soma_reversao_chargeback') or 0,
+                )
+                for grupo in grupos
+            ),
+            batch_size=1000
+        )
+
+
+def limpar_resumo(apps, schema_editor):
+    apps.get_model('relatorios', 'ResumoMensal').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relatorios', '0001_initial'),
+        ('vendas', '0002_add_chargeback_fields'),
+        ('despesas', '0003_alter_despesa_categoria_delete_categoriadespesa'),
+        ('receitas', '0003_alter_receita_categoria_delete_categoriareceita'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_resumo, limpar_resumo),
+    ]
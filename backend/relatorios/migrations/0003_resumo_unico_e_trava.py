@@ -0,0 +1,107 @@
+# Generated by Django 5.0 on 2026-10-18 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+# (origem, app, model, campo de data, campo de valor, campo de forma, tem categoria)
+FONTES = {
+    'VENDA': ('vendas', 'Venda', 'data_venda', 'valor_total', 'forma_pagamento', False),
+    'DESPESA': ('despesas', 'Despesa', 'data_vencimento', 'valor', 'forma_pagamento', True),
+    'RECEITA': ('receitas', 'Receita', 'data_prevista', 'valor', 'forma_recebimento', True),
+}
+
+CAMPOS_UNICOS = ('origem', 'empresa_id', 'mes', 'status', 'categoria_id', 'forma_pagamento')
+
+
+def recalcular_meses_duplicados(apps, schema_editor):
+    """
+    Recalcula, a partir dos lançamentos, os meses que ficaram com linhas
+    duplicadas no resumo (gravações concorrentes), para que a restrição de
+    unicidade possa ser criada.
+    """
+    ResumoMensal = apps.get_model('relatorios', 'ResumoMensal')
+
+    duplicados = ResumoMensal.objects.values(*CAMPOS_UNICOS).annotate(
+        linhas=Count('id')
+    ).filter(linhas__gt=1).order_by()
+    meses = {(grupo['origem'], grupo['empresa_id'], grupo['mes']) for grupo in duplicados}
+
+    for origem, empresa_id, mes in meses:
+        app, model_name, campo_data, campo_valor, campo_forma, tem_categoria = FONTES[origem]
+        Model = apps.get_model(app, model_name)
+        proximo_mes = mes.replace(year=mes.year + mes.month // 12, month=mes.month % 12 + 1)
+
+        agrupar_por = ['status', campo_forma]
+        if tem_categoria:
+            agrupar_por.append('categoria_id')
+        somas = {'soma_valor': Sum(campo_valor)}
+        if origem == 'VENDA':
+            somas.update(
+                soma_desconto=Sum('desconto'),
+                soma_chargeback=Sum('chargeback'),
+                soma_reversao_chargeback=Sum('reversao_chargeback'),
+            )
+
+        grupos = Model.objects.filter(**{
+            'empresa_id': empresa_id,
+            f'{campo_data}__gte': mes,
+            f'{campo_data}__lt': proximo_mes,
+        }).values(*agrupar_por).annotate(quantidade_ref=Count('id'), **somas).order_by()
+
+        ResumoMensal.objects.filter(origem=origem, empresa_id=empresa_id, mes=mes).delete()
+        ResumoMensal.objects.bulk_create([
+            ResumoMensal(
+                origem=origem,
+                empresa_id=empresa_id,
+                mes=mes,
+                status=grupo['status'],
+                categoria_id=grupo.get('categoria_id'),
+                forma_pagamento=grupo[campo_forma],
+                quantidade=grupo['quantidade_ref'],
+                valor=grupo['soma_valor'] or 0,
+                desconto=grupo.get('soma_desconto') or 0,
+                chargeback=grupo.get('soma_chargeback') or 0,
+                reversao_chargeback=grupo.get('soma_reversao_chargeback') or 0,
+            )
+            for grupo in grupos
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categorias', '0001_initial'),
+        ('empresas', '0001_initial'),
+        ('relatorios', '0002_popular_resumo_mensal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravaResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origem', models.CharField(choices=[('VENDA', 'Venda'), ('DESPESA', 'Despesa'), ('RECEITA', 'Receita')], max_length=10, verbose_name='Origem')),
+                ('mes', models.DateField(verbose_name='Mês')),
+            ],
+            options={
+                'verbose_name': 'Trava do Resumo Mensal',
+                'verbose_name_plural': 'Travas do Resumo Mensal',
+            },
+        ),
+        migrations.RunPython(recalcular_meses_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='resumomensal',
+            constraint=models.UniqueConstraint(fields=('origem', 'empresa', 'mes', 'status', 'categoria', 'forma_pagamento'), name='resumo_mensal_unico'),
+        ),
+        migrations.AddField(
+            model_name='travaresumomensal',
+            name='empresa',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa', verbose_name='Empresa'),
+        ),
+        migrations.AddConstraint(
+            model_name='travaresumomensal',
+            constraint=models.UniqueConstraint(fields=('origem', 'empresa', 'mes'), name='trava_resumo_mensal_unica'),
+        ),
+    ]
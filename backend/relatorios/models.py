@@ -1 +1,103 @@
-# Este app não tem models, apenas views para relatórios
+from django.db import models
+
+
+class ResumoMensal(models.Model):
+    """
+    Tabela de fatos pré-agregada usada pelos relatórios.
+
+    Cada linha soma as vendas, despesas ou receitas de uma empresa em um mês,
+    agrupadas por status, categoria e forma de pagamento. É mantida pelos
+    signals de Venda, Despesa e Receita (ver relatorios/signals.py) e pode
+    ser reconstruída com `python manage.py reconstruir_resumo_mensal`.
+    """
+    ORIGEM_CHOICES = [
+        ('VENDA', 'Venda'),
+        ('DESPESA', 'Despesa'),
+        ('RECEITA', 'Receita'),
+    ]
+
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='resumos_mensais',
+        verbose_name='Empresa'
+    )
+
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, verbose_name='Origem')
+    mes = models.DateField(verbose_name='Mês', help_text='Primeiro dia do mês')
+    status = models.CharField(max_length=15, verbose_name='Status')
+
+    categoria = models.ForeignKey(
+        'categorias.Categoria',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resumos_mensais',
+        verbose_name='Categoria'
+    )
+
+    forma_pagamento = models.CharField(
+        max_length=20,
+        verbose_name='Forma de Pagamento',
+        help_text='Forma de pagamento (vendas/despesas) ou de recebimento (receitas)'
+    )
+
+    # Valor total da venda ou valor da despesa/receita
+    valor = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name='Valor')
+    desconto = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name='Desconto')
+    chargeback = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name='Chargeback')
+    reversao_chargeback = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, verbose_name='Reversao de Chargeback'
+    )
+    quantidade = models.PositiveIntegerField(default=0, verbose_name='Quantidade')
+
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Resumo Mensal'
+        verbose_name_plural = 'Resumos Mensais'
+        ordering = ['-mes']
+        indexes = [
+            models.Index(fields=['empresa', 'origem', 'mes']),
+            models.Index(fields=['origem', 'mes']),
+        ]
+        constraints = [
+            # Uma linha por combinação. Em bancos que tratam NULL como
+            # distinto (categoria das vendas), quem garante a unicidade é a
+            # trava do mês (TravaResumoMensal) tomada por atualizar_resumo
+            models.UniqueConstraint(
+                fields=['origem', 'empresa', 'mes', 'status', 'categoria', 'forma_pagamento'],
+                name='resumo_mensal_unico',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_origem_display()} {self.mes:%m/%Y} - {self.status} - R$ {self.valor}"
+
+
+class TravaResumoMensal(models.Model):
+    """
+    Linha de trava de um mês do resumo (origem, empresa, mês).
+
+    atualizar_resumo bloqueia a linha com select_for_update antes de apagar
+    e regravar o mês, de modo que gravações concorrentes no mesmo mês sejam
+    recalculadas uma depois da outra e não dupliquem linhas do resumo.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Empresa'
+    )
+    origem = models.CharField(max_length=10, choices=ResumoMensal.ORIGEM_CHOICES, verbose_name='Origem')
+    mes = models.DateField(verbose_name='Mês')
+
+    class Meta:
+        verbose_name = 'Trava do Resumo Mensal'
+        verbose_name_plural = 'Travas do Resumo Mensal'
+        constraints = [
+            models.UniqueConstraint(fields=['origem', 'empresa', 'mes'], name='trava_resumo_mensal_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.origem} {self.empresa_id} {self.mes:%m/%Y}"
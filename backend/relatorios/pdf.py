@@ -0,0 +1,187 @@
+"""
+Geração dos PDFs dos relatórios com reportlab.
+
+Cada função recebe o dict já calculado pela view (o mesmo devolvido em JSON)
+e retorna os bytes do PDF. O módulo não depende do Django para poder ser
+executado nos processos do pool de renderização (ver relatorios/renderers.py).
+"""
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+
+COR_CABECALHO = colors.HexColor('#1e3c72')
+COR_LINHA_ALTERNADA = colors.HexColor('#f5f7fa')
+
+
+def moeda(valor):
+    """Formata no padrão brasileiro: R$ 1.234,56"""
+    texto = f'{float(valor or 0):,.2f}'
+    return 'R$ ' + texto.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def percentual(valor):
+    return f'{float(valor or 0):.1f}%'.replace('.', ',')
+
+
+def _tabela(linhas, destacar_ultima=False):
+    """Tabela com cabeçalho destacado e linhas alternadas"""
+    tabela = Table(linhas, repeatRows=1, hAlign='LEFT')
+    estilo = [
+        ('BACKGROUND', (0, 0), (-1, 0), COR_CABECALHO),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COR_LINHA_ALTERNADA]),
+    ]
+    if destacar_ultima:
+        estilo.append(('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'))
+    tabela.setStyle(TableStyle(estilo))
+    return tabela
+
+
+def _documento(titulo, subtitulo, elementos):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        leftMargin=1.5 * cm,
+        rightMargin=1.5 * cm,
+        topMargin=1.5 * cm,
+        bottomMargin=1.5 * cm,
+        title=titulo,
+    )
+    estilos = getSampleStyleSheet()
+    doc.build([
+        Paragraph(titulo, estilos['Title']),
+        Paragraph(subtitulo, estilos['Normal']),
+        Spacer(1, 0.5 * cm),
+        *elementos,
+    ])
+    return buffer.getvalue()
+
+
+def _periodo(dados):
+    periodo = dados.get('periodo') or {}
+    inicio = periodo.get('data_inicio') or '-'
+    fim = periodo.get('data_fim') or '-'
+    return f'Período: {inicio} a {fim}'
+
+
+def _transpor(colunas, linhas_por_campo):
+    """Monta uma tabela com os campos nas linhas e os meses nas colunas"""
+    return [['', *colunas]] + [[rotulo, *valores] for rotulo, valores in linhas_por_campo]
+
+
+def renderizar_dre(dados):
+    meses = dados['dados_mensais']
+    totais = dados['totais']
+
+    def linha(rotulo, campo, formato=moeda):
+        return rotulo, [formato(m[campo]) for m in meses] + [formato(totais[campo])]
+
+    tabela = _transpor(
+        [m['mes'] for m in meses] + ['TOTAL'],
+        [
+            linha('Receita de Vendas', 'receita_vendas'),
+            linha('Outras Receitas', 'outras_receitas'),
+            linha('Receita Bruta', 'receita_bruta'),
+            linha('(-) Descontos', 'descontos'),
+            linha('(-) Chargeback', 'chargeback'),
+            linha('(+) Reversão de Chargeback', 'reversao_chargeback'),
+            linha('Receita Líquida', 'receita_liquida'),
+            linha('(-) Despesas', 'total_despesas'),
+            linha('Lucro Líquido', 'lucro_liquido'),
+            linha('Margem Líquida', 'margem_liquida', percentual),
+        ]
+    )
+
+    categorias = [['Categoria', 'Valor']] + [
+        [c['categoria'], moeda(c['valor'])] for c in totais['despesas_por_categoria']
+    ]
+
+    estilos = getSampleStyleSheet()
+    elementos = [_tabela(tabela), Spacer(1, 0.6 * cm)]
+    if len(categorias) > 1:
+        elementos += [Paragraph('Despesas por Categoria', estilos['Heading3']), _tabela(categorias)]
+
+    escopo = 'Consolidado Grupo' if dados.get('consolidado') else 'Empresa'
+    return _documento('DRE - Demonstrativo de Resultado', f'{escopo} | {_periodo(dados)}', elementos)
+
+
+def renderizar_analise_receita(dados):
+    linhas = [[
+        'Período', 'Vendas', 'Receita Bruta', 'Descontos', 'Desc. %', 'Chargeback',
+        'CB %', 'Reversão CB', 'Receita Op. Líquida', 'Ticket Médio',
+    ]]
+    for m in dados['dados_mensais']:
+        linhas.append([
+            m['mes'], m['qtde_vendas'], moeda(m['receita_bruta']), moeda(m['descontos']),
+            percentual(m['descontos_perc']), moeda(m['chargeback']), percentual(m['chargeback_perc']),
+            moeda(m['reversao_chargeback']), moeda(m['receita_operacional_liquida']),
+            moeda(m['ticket_medio']),
+        ])
+
+    t = dados['totais']
+    linhas.append([
+        'TOTAL', t['qtde_vendas'], moeda(t['receita_bruta']), moeda(t['descontos']),
+        percentual(t['descontos_perc']), moeda(t['chargeback']), percentual(t['chargeback_perc']),
+        moeda(t['reversao_chargeback']), moeda(t['receita_operacional_liquida']),
+        moeda(t['ticket_medio']),
+    ])
+
+    escopo = 'Consolidado Grupo' if dados.get('consolidado') else 'Empresa'
+    return _documento(
+        'Análise de Receita', f'{escopo} | {_periodo(dados)}', [_tabela(linhas, destacar_ultima=True)]
+    )
+
+
+def renderizar_financeiro(dados):
+    resumo = dados['resumo']
+    linhas_resumo = [
+        ['', 'Realizado', 'Pendente'],
+        ['Vendas', moeda(resumo['total_vendas']), moeda(resumo['total_vendas_pendentes'])],
+        ['Receitas', moeda(resumo['total_receitas']), moeda(resumo['total_receitas_pendentes'])],
+        ['Despesas', moeda(resumo['total_despesas']), moeda(resumo['total_despesas_pendentes'])],
+        ['Saldo', moeda(resumo['saldo']), ''],
+    ]
+
+    categorias = [['Categoria', 'Quantidade', 'Total']] + [
+        [c['categoria__nome'] or 'Sem categoria', c['quantidade'], moeda(c['total'])]
+        for c in dados['despesas_por_categoria']
+    ]
+    vendas_mes = [['Mês', 'Vendas pagas']] + [
+        [v['mes'], moeda(v['total'])] for v in dados['vendas_por_mes']
+    ]
+
+    estilos = getSampleStyleSheet()
+    elementos = [_tabela(linhas_resumo, destacar_ultima=True), Spacer(1, 0.6 * cm)]
+    if len(categorias) > 1:
+        elementos += [
+            Paragraph('Despesas pagas por Categoria', estilos['Heading3']),
+            _tabela(categorias),
+            Spacer(1, 0.6 * cm),
+        ]
+    elementos += [Paragraph('Vendas dos últimos 6 meses', estilos['Heading3']), _tabela(vendas_mes)]
+
+    return _documento(
+        f"Relatório Financeiro - {dados['empresa']['nome']}", _periodo(dados), elementos
+    )
+
+
+RENDERIZADORES = {
+    'dre': renderizar_dre,
+    'analise-receita': renderizar_analise_receita,
+    'financeiro': renderizar_financeiro,
+}
+
+
+def renderizar(relatorio, dados):
+    """Ponto de entrada usado pelo pool de processos"""
+    return RENDERIZADORES[relatorio](dados)
@@ -0,0 +1,143 @@
+"""
+Renderer PDF dos relatórios (?format=pdf).
+
+O PDF é gerado a partir do dict calculado pela view em um pool de processos
+e guardado em disco com o hash do conteúdo como nome. Como o hash cobre os
+dados do relatório (período, empresa e valores), downloads repetidos do
+mesmo relatório reaproveitam o arquivo; qualquer alteração nos valores gera
+um novo arquivo. A cada PDF gravado, os arquivos sem download há mais de
+RELATORIOS_PDF_MAX_DIAS dias e os mais antigos além de
+RELATORIOS_PDF_MAX_ARQUIVOS são removidos (o download atualiza a data do
+arquivo).
+
+Se a renderização passa de RELATORIOS_PDF_TIMEOUT segundos, a resposta é um
+503 em JSON; o processo do pool termina o PDF em segundo plano, sem gravá-lo.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TimeoutPDF
+from multiprocessing import get_context
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from . import pdf
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_pdf():
+    """Pool de processos criado sob demanda, um por processo do servidor"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.RELATORIOS_PDF_WORKERS,
+                mp_context=get_context('spawn'),
+            )
+        return _pool
+
+
+def gerar_pdf(relatorio, dados):
+    """
+    Retorna os bytes do PDF, lendo do cache em disco quando o mesmo conteúdo
+    já foi renderizado.
+    """
+    conteudo = json.dumps([relatorio, dados], sort_keys=True, default=str)
+    nome = hashlib.sha256(conteudo.encode()).hexdigest() + '.pdf'
+
+    diretorio = Path(settings.RELATORIOS_PDF_DIR)
+    caminho = diretorio / nome
+    try:
+        conteudo_pdf = caminho.read_bytes()
+    except FileNotFoundError:
+        pass
+    else:
+        # Arquivo baixado há pouco não é removido pela limpeza
+        os.utime(caminho)
+        return conteudo_pdf
+
+    futuro = pool_pdf().submit(pdf.renderizar, relatorio, dados)
+    try:
+        conteudo_pdf = futuro.result(timeout=settings.RELATORIOS_PDF_TIMEOUT)
+    except TimeoutPDF:
+        # Se ainda estiver na fila, não chega a ser renderizado
+        futuro.cancel()
+        raise
+
+    # Grava em arquivo temporário e renomeia, para que requisições
+    # simultâneas nunca leiam um PDF pela metade
+    diretorio.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=diretorio, suffix='.tmp', delete=False) as temporario:
+        temporario.write(conteudo_pdf)
+    os.replace(temporario.name, caminho)
+    limpar_pdfs(diretorio)
+    return conteudo_pdf
+
+
+def limpar_pdfs(diretorio):
+    """
+    Remove os PDFs sem download há mais de RELATORIOS_PDF_MAX_DIAS dias e os
+    mais antigos além de RELATORIOS_PDF_MAX_ARQUIVOS. Arquivos removidos por
+    outra requisição ao mesmo tempo são ignorados.
+    """
+    arquivos = []
+    for arquivo in os.scandir(diretorio):
+        if arquivo.name.endswith('.pdf'):
+            try:
+                arquivos.append((arquivo.stat().st_mtime, arquivo.path))
+            except FileNotFoundError:
+                continue
+    arquivos.sort(reverse=True)
+
+    limite = time.time() - settings.RELATORIOS_PDF_MAX_DIAS * 86400
+    for posicao, (modificado_em, caminho) in enumerate(arquivos):
+        if posicao >= settings.RELATORIOS_PDF_MAX_ARQUIVOS or modificado_em < limite:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+
+class RelatorioPDFRenderer(BaseRenderer):
+    """
+    Renderiza a resposta da view como PDF. A view informa o relatório em
+    `pdf_relatorio` (chave de relatorios.pdf.RENDERIZADORES). Respostas de
+    erro continuam em JSON.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        view = renderer_context.get('view')
+
+        if response is not None and response.status_code >= 400:
+            response['Content-Type'] = 'application/json'
+            return JSONRenderer().render(data)
+
+        relatorio = view.pdf_relatorio
+        try:
+            conteudo_pdf = gerar_pdf(relatorio, data)
+        except TimeoutPDF:
+            if response is None:
+                raise
+            response.status_code = 503
+            response['Content-Type'] = 'application/json'
+            return JSONRenderer().render({'error': 'Tempo esgotado ao gerar o PDF. Tente novamente'})
+
+        if response is not None:
+            periodo = data.get('periodo') or {}
+            nome = '_'.join(filter(None, [relatorio, periodo.get('data_inicio'), periodo.get('data_fim')]))
+            response['Content-Disposition'] = f'attachment; filename="{nome}.pdf"'
+        return conteudo_pdf
@@ -0,0 +1,296 @@
+"""
+Manutenção e leitura da tabela pré-agregada ResumoMensal.
+
+Os relatórios leem os valores por meio de FonteRelatorio, que expõe a mesma
+interface sobre as linhas brutas (Venda, Despesa, Receita) ou sobre o
+resumo mensal. O resumo só é usado quando os filtros do relatório cobrem
+meses inteiros e usam apenas as dimensões gravadas no resumo.
+"""
+import copy
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+
+from despesas.models import Despesa
+from empresas.models import Empresa
+from receitas.models import Receita
+from vendas.models import Venda
+from .agregacoes import add_months, filtrar_periodo, agregar_por_periodo
+from .cache import invalidar_meses
+from .models import ResumoMensal, TravaResumoMensal
+
+
+# Configuração de cada origem: model bruto, campo de data e o mapeamento
+# dos campos do model para os campos de ResumoMensal
+FONTES = {
+    'VENDA': {
+        'model': Venda,
+        'campo_data': 'data_venda',
+        'campo_forma': 'forma_pagamento',
+        'campos': {
+            'data_venda': 'mes',
+            'valor_total': 'valor',
+            'desconto': 'desconto',
+            'chargeback': 'chargeback',
+            'reversao_chargeback': 'reversao_chargeback',
+            'forma_pagamento': 'forma_pagamento',
+        },
+    },
+    'DESPESA': {
+        'model': Despesa,
+        'campo_data': 'data_vencimento',
+        'campo_forma': 'forma_pagamento',
+        'campos': {
+            'data_vencimento': 'mes',
+            'valor': 'valor',
+            'categoria': 'categoria',
+            'categoria_id': 'categoria_id',
+            'forma_pagamento': 'forma_pagamento',
+        },
+    },
+    'RECEITA': {
+        'model': Receita,
+        'campo_data': 'data_prevista',
+        'campo_forma': 'forma_recebimento',
+        'campos': {
+            'data_prevista': 'mes',
+            'valor': 'valor',
+            'categoria': 'categoria',
+            'categoria_id': 'categoria_id',
+            'forma_recebimento': 'forma_pagamento',
+        },
+    },
+}
+
+# Granularidades que podem ser montadas a partir de meses inteiros
+GRANULARIDADES_RESUMO = ('mes', 'trimestre')
+
+# Campos com o mesmo nome no model bruto e no resumo
+CAMPOS_COMUNS = ('empresa', 'empresa_id', 'status')
+
+# Campos de valor somados no resumo
+CAMPOS_VALOR = ('valor', 'desconto', 'chargeback', 'reversao_chargeback')
+
+
+def linhas_resumo(origem, queryset):
+    """
+    Agrupa as linhas brutas do queryset em instâncias de ResumoMensal
+    (não salvas) com uma única consulta.
+    """
+    config = FONTES[origem]
+    campos = config['campos']
+
+    somas = {
+        f'soma_{destino}': Sum(campo)
+        for campo, destino in campos.items()
+        if destino in CAMPOS_VALOR
+    }
+    agrupar_por = ['empresa_id', 'status', config['campo_forma']]
+    if 'categoria_id' in campos:
+        agrupar_por.append('categoria_id')
+
+    grupos = queryset.annotate(
+        mes_ref=TruncMonth(config['campo_data'])
+    ).values(
+        'mes_ref', *agrupar_por
+    ).annotate(
+        quantidade_ref=Count('id'), **somas
+    ).order_by()
+
+    for grupo in grupos:
+        yield ResumoMensal(
+            origem=origem,
+            empresa_id=grupo['empresa_id'],
+            mes=grupo['mes_ref'],
+            status=grupo['status'],
+            categoria_id=grupo.get('categoria_id'),
+            forma_pagamento=grupo[config['campo_forma']],
+            quantidade=grupo['quantidade_ref'],
+            **{
+                campo: grupo.get(f'soma_{campo}') or 0
+                for campo in CAMPOS_VALOR
+            }
+        )
+
+
+def reconstruir_resumo(origens=None, empresa_ids=None, batch_size=1000):
+    """
+    Reconstrói o resumo das origens (todas por padrão), opcionalmente
+    restrito a algumas empresas. Retorna a quantidade de linhas gravadas.
+    """
+    total = 0
+    for origem in origens or FONTES:
+        queryset = FONTES[origem]['model'].objects.all()
+        resumo = ResumoMensal.objects.filter(origem=origem)
+        if empresa_ids is not None:
+            queryset = queryset.filter(empresa_id__in=empresa_ids)
+            resumo = resumo.filter(empresa_id__in=empresa_ids)
+
+        with transaction.atomic():
+            resumo.delete()
+            criados = ResumoMensal.objects.bulk_create(
+                linhas_resumo(origem, queryset), batch_size=batch_size
+            )
+        total += len(criados)
+    return total
+
+
+def atualizar_resumo(origem, buckets):
+    """
+    Recalcula os meses afetados de uma origem.
+
+    buckets é um iterável de (empresa_id, data); cada par identifica o mês
+    da empresa que deve ser recalculado a partir das linhas brutas. O
+    recálculo de um mês é uma consulta agrupada restrita à empresa e ao
+    mês, servida pelo índice (empresa, data_*). Os relatórios em cache
+    desses meses são invalidados.
+
+    Cada mês é travado (TravaResumoMensal, select_for_update) antes de ser
+    apagado e regravado: duas transações que alteram o mesmo mês recalculam
+    uma depois da outra, e a segunda já enxerga as linhas da primeira. Os
+    meses são travados sempre na mesma ordem, para não haver deadlock.
+    """
+    config = FONTES[origem]
+    campo_data = config['campo_data']
+    meses = {(empresa_id, data.replace(day=1)) for empresa_id, data in buckets if data}
+    invalidar_meses(meses)
+
+    with transaction.atomic():
+        for empresa_id, mes in sorted(meses):
+            TravaResumoMensal.objects.select_for_update().get_or_create(
+                origem=origem, empresa_id=empresa_id, mes=mes
+            )
+            ResumoMensal.objects.filter(origem=origem, empresa_id=empresa_id, mes=mes).delete()
+            queryset = config['model'].objects.filter(**{
+                'empresa_id': empresa_id,
+                f'{campo_data}__gte': mes,
+                f'{campo_data}__lt': add_months(mes, 1),
+            })
+            ResumoMensal.objects.bulk_create(linhas_resumo(origem, queryset))
+
+
+def buckets_do_queryset(origem, queryset):
+    """
+    Retorna os pares (empresa_id, mes) cobertos por um queryset bruto.
+    Usado antes de queryset.update(), que não dispara signals.
+    """
+    campo_data = FONTES[origem]['campo_data']
+    return set(
+        queryset.annotate(
+            mes_ref=TruncMonth(campo_data)
+        ).values_list('empresa_id', 'mes_ref').order_by().distinct()
+    )
+
+
+def periodo_mensal_completo(dt_inicio, dt_fim, granularidade='mes'):
+    """
+    Indica se o período cobre apenas meses inteiros (ou não foi informado),
+    condição para ler os valores do resumo mensal.
+    """
+    if granularidade not in GRANULARIDADES_RESUMO:
+        return False
+    if dt_inicio is None and dt_fim is None:
+        return True
+    if dt_inicio is None or dt_fim is None:
+        return False
+    return dt_inicio.day == 1 and (dt_fim + timedelta(days=1)).day == 1
+
+
+def filtro_empresas_ativas():
+    """
+    Filtro dos relatórios consolidados: empresa_id__in com os ids das
+    empresas ativas, lidos antes. Com empresa__ativa=True o banco junta a
+    tabela de empresas e o SQLite percorre o índice (empresa, status, data)
+    inteiro; com a lista, cada empresa vira uma faixa do índice.
+    """
+    return {'empresa_id__in': list(Empresa.objects.filter(ativa=True).values_list('id', flat=True))}
+
+
+class FonteRelatorio:
+    """
+    Origem dos valores de um relatório: as linhas brutas do model ou a
+    tabela ResumoMensal. Filtros, somas e agrupamentos usam sempre os nomes
+    de campo do model bruto e são traduzidos quando a leitura vem do resumo.
+    """
+
+    def __init__(self, origem, usar_resumo=True):
+        self.origem = origem
+        self.config = FONTES[origem]
+        self.usar_resumo = usar_resumo and getattr(settings, 'RELATORIOS_USAR_RESUMO', True)
+
+        if self.usar_resumo:
+            self.queryset = ResumoMensal.objects.filter(origem=origem)
+            self.campo_data = 'mes'
+        else:
+            self.queryset = self.config['model'].objects.all()
+            self.campo_data = self.config['campo_data']
+
+    def campo(self, nome):
+        """Traduz um caminho de campo do model bruto para o resumo"""
+        if not self.usar_resumo:
+            return nome
+
+        raiz, separador, resto = nome.partition('__')
+        if raiz in self.config['campos']:
+            raiz = self.config['campos'][raiz]
+        elif raiz not in CAMPOS_COMUNS:
+            raise ValueError(f'Campo {nome} não disponível no resumo mensal')
+        return raiz + separador + resto
+
+    def filtrar(self, **filtros):
+        """Retorna uma nova fonte com os filtros aplicados"""
+        fonte = copy.copy(self)
+        fonte.queryset = self.queryset.filter(
+            **{self.campo(nome): valor for nome, valor in filtros.items()}
+        )
+        return fonte
+
+    def _valores(self, somas, contar=None):
+        valores = {alias: Sum(self.campo(campo)) for alias, campo in somas.items()}
+        if contar:
+            valores[contar] = Sum('quantidade') if self.usar_resumo else Count('id')
+        return valores
+
+    def _renomear(self, linha, agrupar_por):
+        """Devolve as chaves de agrupamento com os nomes do model bruto"""
+        for nome in agrupar_por:
+            traduzido = self.campo(nome)
+            if traduzido != nome:
+                linha[nome] = linha.pop(traduzido)
+        return linha
+
+    def totais(self, somas, contar=None):
+        """Agregado único; valores ausentes retornam zero"""
+        resultado = self.queryset.aggregate(**self._valores(somas, contar))
+        return {alias: valor or 0 for alias, valor in resultado.items()}
+
+    def agrupar(self, agrupar_por, somas, contar=None):
+        """Lista de linhas agrupadas pelos campos informados"""
+        linhas = self.queryset.values(
+            *[self.campo(nome) for nome in agrupar_por]
+        ).annotate(**self._valores(somas, contar)).order_by()
+        return [self._renomear(linha, agrupar_por) for linha in linhas]
+
+    def por_periodo(self, periodos, granularidade, somas, agrupar_por=(), contar=None):
+        """
+        Agrega os períodos completos informados em uma única consulta.
+        Ver agregacoes.agregar_por_periodo.
+        """
+        if self.usar_resumo and granularidade not in GRANULARIDADES_RESUMO:
+            raise ValueError(f'Granularidade {granularidade} não disponível no resumo mensal')
+
+        queryset = filtrar_periodo(self.queryset, self.campo_data, periodos, granularidade)
+        resultado = agregar_por_periodo(
+            queryset,
+            self.campo_data,
+            granularidade,
+            self._valores(somas, contar),
+            agrupar_por=[self.campo(nome) for nome in agrupar_por],
+        )
+        for linhas in resultado.values():
+            for linha in linhas:
+                self._renomear(linha, agrupar_por)
+        return resultado
@@ -0,0 +1,130 @@
+"""
+Signals que mantêm a tabela ResumoMensal e o cache dos relatórios atualizados.
+
+A cada gravação ou exclusão de Venda, Despesa ou Receita, apenas os meses
+afetados (o mês atual do registro e, em uma alteração, o mês anterior) da
+empresa são recalculados e têm o cache invalidado.
+
+Gravações em lote podem suspender os signals com resumo_suspenso() e chamar
+atualizar_resumo uma única vez com todos os meses afetados. A suspensão
+também vale para os totais de compras dos clientes (vendas/signals.py) e
+para o índice de busca (busca/signals.py).
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from despesas.models import Despesa
+from empresas.models import Empresa
+from receitas.models import Receita
+from usuarios.models import Usuario
+from vendas.models import Venda
+from .cache import invalidar_empresa
+from .resumo import FONTES, atualizar_resumo
+
+
+ORIGEM_POR_MODEL = {
+    config['model']: origem for origem, config in FONTES.items()
+}
+
+_estado = threading.local()
+
+
+@contextmanager
+def resumo_suspenso():
+    """
+    Não atualiza o resumo (nem os totais dos clientes e o índice de busca)
+    a cada save()/delete() dentro do bloco. Quem usa é responsável por
+    chamar atualizar_resumo, atualizar_totais_clientes e busca.indice.indexar
+    com os registros afetados.
+    """
+    anterior = getattr(_estado, 'suspenso', False)
+    _estado.suspenso = True
+    try:
+        yield
+    finally:
+        _estado.suspenso = anterior
+
+
+def sinais_suspensos():
+    """Indica se os signals de agregados estão suspensos nesta thread"""
+    return getattr(_estado, 'suspenso', False)
+
+
+def _bucket(instance):
+    campo_data = FONTES[ORIGEM_POR_MODEL[type(instance)]]['campo_data']
+    return instance.empresa_id, getattr(instance, campo_data)
+
+
+@receiver(pre_save, sender=Venda)
+@receiver(pre_save, sender=Despesa)
+@receiver(pre_save, sender=Receita)
+def guardar_bucket_anterior(sender, instance, **kwargs):
+    """Guarda empresa e data gravadas antes da alteração"""
+    instance._resumo_bucket_anterior = None
+    if instance.pk and not sinais_suspensos():
+        campo_data = FONTES[ORIGEM_POR_MODEL[sender]]['campo_data']
+        instance._resumo_bucket_anterior = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('empresa_id', campo_data).first()
+
+
+@receiver(post_save, sender=Venda)
+@receiver(post_save, sender=Despesa)
+@receiver(post_save, sender=Receita)
+def atualizar_resumo_apos_salvar(sender, instance, raw=False, **kwargs):
+    if raw or sinais_suspensos():
+        return
+    buckets = {_bucket(instance)}
+    anterior = getattr(instance, '_resumo_bucket_anterior', None)
+    if anterior:
+        buckets.add(anterior)
+    atualizar_resumo(ORIGEM_POR_MODEL[sender], buckets)
+
+
+@receiver(post_delete, sender=Venda)
+@receiver(post_delete, sender=Despesa)
+@receiver(post_delete, sender=Receita)
+def atualizar_resumo_apos_excluir(sender, instance, **kwargs):
+    if sinais_suspensos():
+        return
+    atualizar_resumo(ORIGEM_POR_MODEL[sender], {_bucket(instance)})
+
+
+@receiver(post_save, sender=Empresa)
+@receiver(post_delete, sender=Empresa)
+def invalidar_cache_empresa(sender, instance, raw=False, **kwargs):
+    """Nome e status da empresa aparecem nos relatórios e no consolidado"""
+    if raw:
+        return
+    invalidar_empresa(instance.pk)
+
+
+@receiver(pre_save, sender=Usuario)
+def guardar_empresa_anterior(sender, instance, update_fields=None, **kwargs):
+    """Guarda a empresa gravada antes da alteração (o usuário pode mudar de empresa)"""
+    instance._relatorios_empresa_anterior = None
+    if instance.pk and not _apenas_ultimo_acesso(update_fields):
+        instance._relatorios_empresa_anterior = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('empresa_id', flat=True).first()
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_cache_usuario(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    O total de usuários ativos aparece no dashboard da empresa e no
+    consolidado. O último acesso, gravado a cada login, não conta.
+    """
+    if raw or _apenas_ultimo_acesso(update_fields):
+        return
+    empresas = {instance.empresa_id, getattr(instance, '_relatorios_empresa_anterior', None)}
+    for empresa_id in empresas - {None}:
+        invalidar_empresa(empresa_id)
+
+
+def _apenas_ultimo_acesso(update_fields):
+    return update_fields is not None and set(update_fields) <= {'last_login'}
@@ -0,0 +1,320 @@
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+
+from core.fabricas import (
+    cliente_api, criar_categoria, criar_chefe, criar_cliente, criar_despesa, criar_empresa, criar_receita,
+    criar_usuario, criar_venda,
+)
+from despesas.models import Despesa
+from receitas.models import Receita
+from vendas.models import Venda
+from .cache import cache_relatorios
+from .models import ResumoMensal, TravaResumoMensal
+from .renderers import TimeoutPDF, limpar_pdfs
+from .resumo import atualizar_resumo
+
+
+class ResumoMensalTest(TestCase):
+    """O resumo mensal mantido pelos signals bate com a agregação das linhas brutas"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.cliente = criar_cliente(self.empresa)
+        self.categoria = criar_categoria()
+
+    def assertResumoIgualAoBruto(self, origem, model, campo_valor):
+        resumo = ResumoMensal.objects.filter(origem=origem, empresa=self.empresa).aggregate(
+            valor=Sum('valor'), quantidade=Sum('quantidade')
+        )
+        bruto = model.objects.filter(empresa=self.empresa).aggregate(valor=Sum(campo_valor), quantidade=Count('id'))
+        self.assertEqual(resumo['valor'] or 0, bruto['valor'] or 0)
+        self.assertEqual(resumo['quantidade'] or 0, bruto['quantidade'])
+
+    def test_vendas_criadas_alteradas_e_excluidas(self):
+        vendas = [
+            criar_venda(self.empresa, self.cliente, self.usuario, valor_total='100.00', data_venda=date(2026, 3, 10)),
+            criar_venda(self.empresa, self.cliente, self.usuario, valor_total='40.00', data_venda=date(2026, 3, 20)),
+            criar_venda(self.empresa, self.cliente, self.usuario, valor_total='15.50', data_venda=date(2026, 4, 2)),
+        ]
+        self.assertResumoIgualAoBruto('VENDA', Venda, 'valor_total')
+
+        # Mudança de mês recalcula o mês anterior e o novo
+        vendas[0].data_venda = date(2026, 4, 5)
+        vendas[0].valor_total = Decimal('120.00')
+        vendas[0].save()
+        self.assertResumoIgualAoBruto('VENDA', Venda, 'valor_total')
+        self.assertEqual(
+            ResumoMensal.objects.get(origem='VENDA', empresa=self.empresa, mes=date(2026, 3, 1)).valor,
+            Decimal('40.00'),
+        )
+
+        vendas[1].delete()
+        self.assertResumoIgualAoBruto('VENDA', Venda, 'valor_total')
+        self.assertFalse(ResumoMensal.objects.filter(origem='VENDA', mes=date(2026, 3, 1)).exists())
+
+    def test_despesas_e_receitas(self):
+        despesa = criar_despesa(self.empresa, self.categoria, self.usuario, valor='30.00')
+        criar_despesa(self.empresa, self.categoria, self.usuario, valor='20.00', status='PAGA')
+        criar_receita(self.empresa, criar_categoria(tipo='RECEITA'), self.usuario, valor='75.00')
+        self.assertResumoIgualAoBruto('DESPESA', Despesa, 'valor')
+        self.assertResumoIgualAoBruto('RECEITA', Receita, 'valor')
+
+        despesa.status = 'PAGA'
+        despesa.save()
+        self.assertResumoIgualAoBruto('DESPESA', Despesa, 'valor')
+        self.assertEqual(ResumoMensal.objects.get(origem='DESPESA', status='PAGA').quantidade, 2)
+
+    def test_recalculo_repetido_nao_duplica_linhas(self):
+        criar_venda(self.empresa, self.cliente, self.usuario, data_venda=date(2026, 5, 3))
+        buckets = {(self.empresa.pk, date(2026, 5, 3)), (self.empresa.pk, date(2026, 5, 28))}
+        atualizar_resumo('VENDA', buckets)
+        atualizar_resumo('VENDA', buckets)
+
+        self.assertEqual(ResumoMensal.objects.filter(origem='VENDA', empresa=self.empresa).count(), 1)
+        self.assertEqual(
+            TravaResumoMensal.objects.filter(origem='VENDA', empresa=self.empresa, mes=date(2026, 5, 1)).count(), 1
+        )
+        self.assertResumoIgualAoBruto('VENDA', Venda, 'valor_total')
+
+
+class DashboardLimiteTest(TestCase):
+    def setUp(self):
+        self.api = cliente_api(criar_usuario(criar_empresa()))
+
+    def test_limite_fora_do_intervalo(self):
+        for limite in ('-1', '0', 'cinco'):
+            resposta = self.api.get(f'/api/relatorios/dashboard/?limite={limite}')
+            self.assertEqual(resposta.status_code, 400, limite)
+
+        self.assertEqual(self.api.get('/api/relatorios/dashboard/?limite=500').status_code, 200)
+
+
+class PeriodoInvalidoTest(TestCase):
+    """Datas malformadas ou período invertido respondem 400 em todos os relatórios"""
+
+    URLS = [
+        '/api/relatorios/financeiro/', '/api/relatorios/analise-receita/', '/api/relatorios/dre/',
+        '/api/relatorios/dashboard/', '/api/relatorios/consolidado/',
+    ]
+
+    def setUp(self):
+        self.chefe = cliente_api(criar_chefe())
+        empresa = criar_empresa()
+        # O financeiro recebe empresa_id; os demais, empresa
+        self.empresa_params = f'empresa={empresa.pk}&empresa_id={empresa.pk}'
+
+    def test_datas_invalidas(self):
+        for url in self.URLS:
+            for periodo in ('data_inicio=2026-13-01&data_fim=2026-12-31', 'data_inicio=2026-05-01&data_fim=abc',
+                            'data_inicio=2026-05-01&data_fim=2026-04-01'):
+                resposta = self.chefe.get(f'{url}?{self.empresa_params}&{periodo}')
+                self.assertEqual(resposta.status_code, 400, f'{url}?{periodo}')
+                self.assertIn('error', resposta.data)
+
+        for url in self.URLS:
+            resposta = self.chefe.get(f'{url}?{self.empresa_params}&data_inicio=2026-04-01&data_fim=2026-04-30')
+            self.assertEqual(resposta.status_code, 200, url)
+
+
+# Cache "default" em arquivo: compartilhado entre processos, como em produção
+CACHE_COMPARTILHADO = {
+    **settings.CACHES,
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(settings.BASE_DIR / 'cache' / 'testes' / 'cache_default'),
+    },
+}
+
+
+@override_settings(CACHES=CACHE_COMPARTILHADO)
+class CacheRelatoriosTest(TestCase):
+    """Gravações trocam as versões (cache compartilhado) e os relatórios em cache deixam de valer"""
+
+    URL_CONSOLIDADO = '/api/relatorios/consolidado/'
+
+    def setUp(self):
+        caches['default'].clear()
+        cache_relatorios().clear()
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.cliente = criar_cliente(self.empresa)
+        self.chefe = cliente_api(criar_chefe())
+
+    def consolidado(self):
+        resposta = self.chefe.get(self.URL_CONSOLIDADO)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data
+
+    def test_versoes_no_cache_compartilhado(self):
+        self.consolidado()
+        self.assertIsNotNone(caches['default'].get('relatorios:versao:consolidado'))
+        self.assertIsNone(cache_relatorios().get('relatorios:versao:consolidado'))
+
+    def test_venda_invalida_consolidado(self):
+        self.assertEqual(self.consolidado()['resumo_geral']['total_vendas'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_venda(self.empresa, self.cliente, self.usuario, valor_total='250.00')
+        self.assertEqual(self.consolidado()['resumo_geral']['total_vendas'], 250)
+
+    def test_usuarios_invalidam_consolidado(self):
+        self.assertEqual(self.consolidado()['total_usuarios'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            novo = criar_usuario(self.empresa)
+        self.assertEqual(self.consolidado()['total_usuarios'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            novo.is_active = False
+            novo.save()
+        self.assertEqual(self.consolidado()['total_usuarios'], 1)
+
+    def test_ultimo_acesso_nao_invalida(self):
+        self.consolidado()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.usuario.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+    def test_analise_receita_periodo_invertido(self):
+        resposta = cliente_api(self.usuario).get(
+            '/api/relatorios/analise-receita/?data_inicio=2026-05-01&data_fim=2026-04-01'
+        )
+        self.assertEqual(resposta.status_code, 400)
+
+
+class PlanosRelatoriosTest(TestCase):
+    """As consultas dos relatórios leem faixas dos índices compostos, inclusive as do consolidado"""
+
+    def setUp(self):
+        cache_relatorios().clear()
+        self.empresa = criar_empresa()
+        usuario = criar_usuario(self.empresa)
+        criar_venda(self.empresa, criar_cliente(self.empresa), usuario, data_venda=date.today())
+        criar_despesa(self.empresa, criar_categoria(), usuario, status='PAGA', data_vencimento=date.today())
+        criar_receita(self.empresa, criar_categoria(tipo='RECEITA'), usuario, status='RECEBIDA')
+
+        self.inativa = criar_empresa(ativa=False)
+        usuario_inativa = criar_usuario(self.inativa)
+        criar_venda(
+            self.inativa, criar_cliente(self.inativa), usuario_inativa, valor_total='999.00', data_venda=date.today()
+        )
+
+    def test_planos_usam_os_indices(self):
+        saida = io.StringIO()
+        call_command('verificar_planos_relatorios', empresa=self.empresa.pk, stdout=saida)
+        self.assertNotIn('FALHA', saida.getvalue())
+        self.assertEqual(saida.getvalue().count('OK '), 8)
+
+    def test_consolidado_ignora_empresas_inativas(self):
+        resposta = cliente_api(criar_chefe()).get('/api/relatorios/consolidado/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data['resumo_geral']['total_vendas'], 100)
+        self.assertEqual([empresa['empresa_id'] for empresa in resposta.data['empresas']], [self.empresa.pk])
+
+
+class CacheRelatoriosLocalTest(TestCase):
+    """Com o cache de versões local a cada processo, os resultados não são reaproveitados"""
+
+    def setUp(self):
+        cache_relatorios().clear()
+        empresa = criar_empresa()
+        criar_venda(empresa, criar_cliente(empresa), criar_usuario(empresa), valor_total='250.00')
+        self.chefe = cliente_api(criar_chefe())
+
+    def total_vendas(self):
+        resposta = self.chefe.get('/api/relatorios/consolidado/')
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data['resumo_geral']['total_vendas']
+
+    def alterar_em_outro_processo(self):
+        """update() não troca as versões, como uma gravação vista só por outro worker"""
+        ResumoMensal.objects.filter(origem='VENDA').update(valor=Decimal('300.00'))
+
+    def test_cache_local_recalcula(self):
+        self.assertEqual(self.total_vendas(), 250)
+        self.alterar_em_outro_processo()
+        self.assertEqual(self.total_vendas(), 300)
+
+    def test_cache_compartilhado_reaproveita(self):
+        with override_settings(CACHES=CACHE_COMPARTILHADO):
+            caches['default'].clear()
+            self.assertEqual(self.total_vendas(), 250)
+            self.alterar_em_outro_processo()
+            self.assertEqual(self.total_vendas(), 250)
+
+
+class RelatoriosPDFTest(TestCase):
+    """?format=pdf devolve o PDF, reaproveitado do disco; erros continuam em JSON"""
+
+    def setUp(self):
+        cache_relatorios().clear()
+        self.diretorio = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(RELATORIOS_PDF_DIR=str(self.diretorio)))
+        self.empresa = criar_empresa()
+        usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(usuario)
+        criar_venda(self.empresa, criar_cliente(self.empresa), usuario, data_venda=date(2026, 4, 10))
+        criar_despesa(self.empresa, criar_categoria(), usuario, status='PAGA', data_vencimento=date(2026, 4, 5))
+        periodo = 'data_inicio=2026-04-01&data_fim=2026-04-30&format=pdf'
+        self.urls = [
+            f'/api/relatorios/dre/?{periodo}',
+            f'/api/relatorios/analise-receita/?{periodo}',
+            f'/api/relatorios/financeiro/?empresa_id={self.empresa.pk}&{periodo}',
+        ]
+
+    def test_pdf_gerado_e_reaproveitado(self):
+        for url in self.urls:
+            resposta = self.api.get(url)
+            self.assertEqual(resposta.status_code, 200, url)
+            self.assertEqual(resposta['Content-Type'], 'application/pdf')
+            self.assertTrue(resposta.content.startswith(b'%PDF'), url)
+            self.assertIn('attachment; filename=', resposta['Content-Disposition'])
+
+            with mock.patch('relatorios.renderers.pool_pdf') as pool:
+                repetida = self.api.get(url)
+            pool.assert_not_called()
+            self.assertEqual(repetida.content, resposta.content)
+        self.assertEqual(len(list(self.diretorio.glob('*.pdf'))), 3)
+
+    def test_erros_em_json(self):
+        resposta = self.api.get('/api/relatorios/dre/?data_inicio=2026-04-31&data_fim=2026-05-01&format=pdf')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(resposta['Content-Type'], 'application/json')
+        self.assertIn('error', json.loads(resposta.content))
+
+    def test_tempo_esgotado(self):
+        with mock.patch('relatorios.renderers.pool_pdf') as pool:
+            pool.return_value.submit.return_value.result.side_effect = TimeoutPDF
+            resposta = self.api.get(self.urls[0])
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta['Content-Type'], 'application/json')
+        self.assertNotIn('Content-Disposition', resposta)
+        self.assertIn('error', json.loads(resposta.content))
+        self.assertEqual(list(self.diretorio.iterdir()), [])
+
+    @override_settings(RELATORIOS_PDF_MAX_DIAS=7, RELATORIOS_PDF_MAX_ARQUIVOS=3)
+    def test_limpeza_do_diretorio(self):
+        agora = time.time()
+        for numero, dias in enumerate([0, 1, 2, 3, 10]):
+            arquivo = self.diretorio / f'{numero}.pdf'
+            arquivo.write_bytes(b'%PDF')
+            os.utime(arquivo, (agora - dias * 86400, agora - dias * 86400))
+        (self.diretorio / 'outro.tmp').write_bytes(b'')
+
+        limpar_pdfs(self.diretorio)
+        self.assertEqual(sorted(arquivo.name for arquivo in self.diretorio.iterdir()),
+                         ['0.pdf', '1.pdf', '2.pdf', 'outro.tmp'])
@@ -1,35 +1,51 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q, Avg, F
-from django.db.models.functions import TruncMonth, Coalesce
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
+from django.db.models import Sum, Count, Q, F
 from django.utils import timezone
-from datetime import timedelta, date
-import calendar
+from datetime import date, timedelta
 from decimal import Decimal
 from collections import defaultdict
 
-
-def add_months(source_date, months):
-    """Adiciona meses a uma data (substitui relativedelta)"""
-    month = source_date.month - 1 + months
-    year = source_date.year + month // 12
-    month = month % 12 + 1
-    day = min(source_date.day, calendar.monthrange(year, month)[1])
-    return date(year, month, day)
-
 from empresas.models import Empresa
-from despesas.models import Despesa
-from vendas.models import Venda
-from receitas.models import Receita
+from vendas.models import Venda, ItemVenda
+from usuarios.contexto import contexto_tenant
 from usuarios.permissions import IsAdminChefe, MultiTenantPermission
+from .agregacoes import (
+    GRANULARIDADES, add_months, meses_do_periodo, periodos_do_intervalo, proximo_periodo,
+    rotulo_periodo, totais_do_periodo, calc_variacao
+)
+from .cache import chave_relatorio, obter_relatorio, guardar_relatorio
+from .renderers import RelatorioPDFRenderer
+from .resumo import FonteRelatorio, GRANULARIDADES_RESUMO, filtro_empresas_ativas, periodo_mensal_completo
+
+
+def totais_por_status(fonte, campo_valor):
+    """Retorna {status: total} com uma única consulta agrupada"""
+    return {
+        linha['status']: linha['total']
+        for linha in fonte.agrupar(['status'], {'total': campo_valor})
+    }
+
+
+def totais_por_empresa(fonte, campo_valor):
+    """Retorna {empresa_id: total} com uma única consulta agrupada"""
+    return {
+        linha['empresa_id']: linha['total']
+        for linha in fonte.agrupar(['empresa_id'], {'total': campo_valor})
+    }
 
 
 class RelatorioFinanceiroView(APIView):
     """
     Relatório financeiro de uma empresa.
+    Aceita ?format=pdf para baixar o relatório em PDF.
     """
     permission_classes = [IsAuthenticated, MultiTenantPermission]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, RelatorioPDFRenderer]
+    pdf_relatorio = 'financeiro'
 
     def get(self, request):
         empresa_id = request.query_params.get('empresa_id')
@@ -46,83 +62,75 @@ class RelatorioFinanceiroView(APIView):
         except Empresa.DoesNotExist:
             return Response({'error': 'Empresa não encontrada'}, status=404)
 
-        if not request.user.pode_acessar_empresa(empresa_id):
+        if not contexto_tenant(request).pode_acessar_empresa(empresa_id):
             return Response({'error': 'Sem permissão para acessar esta empresa'}, status=403)
 
         # Filtros de data
+        dt_inicio = dt_fim = None
         if data_inicio and data_fim:
-            despesas_qs = Despesa.objects.filter(
-                empresa=empresa,
-                data_vencimento__gte=data_inicio,
-                data_vencimento__lte=data_fim
-            )
-            vendas_qs = Venda.objects.filter(
-                empresa=empresa,
-                data_venda__gte=data_inicio,
-                data_venda__lte=data_fim
-            )
-            receitas_qs = Receita.objects.filter(
-                empresa=empresa,
-                data_prevista__gte=data_inicio,
-                data_prevista__lte=data_fim
-            )
-        else:
-            despesas_qs = Despesa.objects.filter(empresa=empresa)
-            vendas_qs = Venda.objects.filter(empresa=empresa)
-            receitas_qs = Receita.objects.filter(empresa=empresa)
+            try:
+                dt_inicio = date.fromisoformat(data_inicio)
+                dt_fim = date.fromisoformat(data_fim)
+            except ValueError:
+                return Response({'error': 'Data invalida. Use o formato AAAA-MM-DD'}, status=400)
+            if dt_fim < dt_inicio:
+                return Response({'error': 'data_fim deve ser maior ou igual a data_inicio'}, status=400)
+
+        # vendas_por_mes depende do mes atual
+        chave_cache = chave_relatorio(
+            'financeiro', empresa.id, dt_inicio, dt_fim,
+            {**request.query_params.dict(), 'hoje': date.today()}
+        )
+        dados = obter_relatorio(chave_cache)
+        if dados is not None:
+            return Response(dados)
+
+        # Periodos de meses inteiros sao lidos do resumo mensal
+        usar_resumo = periodo_mensal_completo(dt_inicio, dt_fim)
+        despesas = FonteRelatorio('DESPESA', usar_resumo).filtrar(empresa=empresa)
+        vendas = FonteRelatorio('VENDA', usar_resumo).filtrar(empresa=empresa)
+        receitas = FonteRelatorio('RECEITA', usar_resumo).filtrar(empresa=empresa)
+
+        if dt_inicio and dt_fim:
+            despesas = despesas.filtrar(data_vencimento__gte=dt_inicio, data_vencimento__lte=dt_fim)
+            vendas = vendas.filtrar(data_venda__gte=dt_inicio, data_venda__lte=dt_fim)
+            receitas = receitas.filtrar(data_prevista__gte=dt_inicio, data_prevista__lte=dt_fim)
 
         # Cálculos
-        total_despesas = despesas_qs.filter(status='PAGA').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
-
-        total_despesas_pendentes = despesas_qs.filter(status='PENDENTE').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
-
-        total_vendas = vendas_qs.filter(status='PAGA').aggregate(
-            total=Sum('valor_total')
-        )['total'] or Decimal('0')
+        despesas_status = totais_por_status(despesas, 'valor')
+        vendas_status = totais_por_status(vendas, 'valor_total')
+        receitas_status = totais_por_status(receitas, 'valor')
 
-        total_vendas_pendentes = vendas_qs.filter(status='PENDENTE').aggregate(
-            total=Sum('valor_total')
-        )['total'] or Decimal('0')
-
-        total_receitas = receitas_qs.filter(status='RECEBIDA').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
-
-        total_receitas_pendentes = receitas_qs.filter(status='PENDENTE').aggregate(
-            total=Sum('valor')
-        )['total'] or Decimal('0')
+        total_despesas = despesas_status.get('PAGA') or Decimal('0')
+        total_despesas_pendentes = despesas_status.get('PENDENTE') or Decimal('0')
+        total_vendas = vendas_status.get('PAGA') or Decimal('0')
+        total_vendas_pendentes = vendas_status.get('PENDENTE') or Decimal('0')
+        total_receitas = receitas_status.get('RECEBIDA') or Decimal('0')
+        total_receitas_pendentes = receitas_status.get('PENDENTE') or Decimal('0')
 
         # Despesas por categoria
-        despesas_por_categoria = despesas_qs.filter(status='PAGA').values(
-            'categoria__nome'
-        ).annotate(
-            total=Sum('valor'),
-            quantidade=Count('id')
-        ).order_by('-total')
+        despesas_por_categoria = sorted(
+            despesas.filtrar(status='PAGA').agrupar(
+                ['categoria__nome'], {'total': 'valor'}, contar='quantidade'
+            ),
+            key=lambda d: -d['total']
+        )
 
         # Vendas por mês (últimos 6 meses)
         hoje = timezone.now().date()
-        seis_meses_atras = hoje - timedelta(days=180)
-        vendas_por_mes = []
-        for i in range(6):
-            mes_inicio = seis_meses_atras + timedelta(days=30*i)
-            mes_fim = mes_inicio + timedelta(days=30)
-            total_mes = vendas_qs.filter(
-                data_venda__gte=mes_inicio,
-                data_venda__lt=mes_fim,
-                status='PAGA'
-            ).aggregate(total=Sum('valor_total'))['total'] or Decimal('0')
-
-            vendas_por_mes.append({
-                'mes': mes_inicio.strftime('%m/%Y'),
-                'total': float(total_mes)
-            })
+        ultimos_meses = meses_do_periodo(add_months(hoje.replace(day=1), -5), hoje)
+        vendas_mes = vendas.filtrar(status='PAGA').por_periodo(
+            ultimos_meses, 'mes', {'total': 'valor_total'}
+        )
+        vendas_por_mes = [
+            {
+                'mes': mes.strftime('%m/%Y'),
+                'total': float(totais_do_periodo(vendas_mes, mes, ['total'])['total'])
+            }
+            for mes in ultimos_meses
+        ]
 
-        return Response({
+        dados = {
             'empresa': {
                 'id': empresa.id,
                 'nome': empresa.nome
@@ -140,9 +148,11 @@ class RelatorioFinanceiroView(APIView):
                 'total_receitas_pendentes': float(total_receitas_pendentes),
                 'saldo': float(total_receitas + total_vendas - total_despesas),
             },
-            'despesas_por_categoria': list(despesas_por_categoria),
+            'despesas_por_categoria': despesas_por_categoria,
             'vendas_por_mes': vendas_por_mes,
-        })
+        }
+        guardar_relatorio(chave_cache, dados)
+        return Response(dados)
 
 
 class AnaliseReceitaView(APIView):
@@ -155,75 +165,104 @@ class AnaliseReceitaView(APIView):
     - Reversao de Chargeback
     - Receita Operacional Liquida
     - Ticket Medio
-    - Variacao mes a mes
+    - Variacao periodo a periodo
+
+    Parametro granularidade: dia, semana, mes (padrao) ou trimestre.
+    Aceita ?format=pdf para baixar o relatorio em PDF.
     """
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, RelatorioPDFRenderer]
+    pdf_relatorio = 'analise-receita'
 
     def get(self, request):
         empresa_id = request.query_params.get('empresa_id')
         data_inicio = request.query_params.get('data_inicio')
         data_fim = request.query_params.get('data_fim')
         meses = int(request.query_params.get('meses', 3))
+        granularidade = request.query_params.get('granularidade', 'mes')
+
+        if granularidade not in GRANULARIDADES:
+            return Response(
+                {'error': f"granularidade invalida. Use: {', '.join(GRANULARIDADES)}"},
+                status=400
+            )
 
         # Ignora valores invalidos como 'todos'
         if empresa_id and (empresa_id == 'todos' or not empresa_id.isdigit()):
             empresa_id = None
 
         # Determina se é Admin Chefe
-        is_admin_chefe = request.user.tipo_usuario == 'ADMIN_CHEFE'
+        contexto = contexto_tenant(request)
+        is_admin_chefe = contexto.admin_chefe
 
         # Se Admin Chefe sem empresa selecionada, pega consolidado
         is_consolidado = empresa_id is None and is_admin_chefe
 
         # Para usuarios normais, sempre usa a empresa do usuario
         if not is_admin_chefe:
-            empresa_id = request.user.empresa_id
+            empresa_id = contexto.empresa_id
             is_consolidado = False
 
         # Se nao e consolidado e nao tem empresa, erro
         if not is_consolidado and not empresa_id:
             return Response({'error': 'Usuario nao possui empresa associada'}, status=400)
 
-        # Base queryset
+        # Base de vendas (resumo mensal quando a granularidade permite)
+        vendas_base = FonteRelatorio('VENDA', usar_resumo=granularidade in GRANULARIDADES_RESUMO)
         if is_consolidado:
-            vendas_base = Venda.objects.filter(empresa__ativa=True)
+            vendas_base = vendas_base.filtrar(**filtro_empresas_ativas())
         else:
             # Verifica permissao (apenas para Admin Chefe acessando outra empresa)
-            if is_admin_chefe and not request.user.pode_acessar_empresa(empresa_id):
+            if is_admin_chefe and not contexto.pode_acessar_empresa(empresa_id):
                 return Response({'error': 'Sem permissao para acessar esta empresa'}, status=403)
-            vendas_base = Venda.objects.filter(empresa_id=empresa_id)
+            vendas_base = vendas_base.filtrar(empresa_id=empresa_id)
 
         # Determinar periodo
         hoje = date.today()
         if data_inicio and data_fim:
-            dt_inicio = date.fromisoformat(data_inicio)
-            dt_fim = date.fromisoformat(data_fim)
+            try:
+                dt_inicio = date.fromisoformat(data_inicio)
+                dt_fim = date.fromisoformat(data_fim)
+            except ValueError:
+                return Response({'error': 'Data invalida. Use o formato AAAA-MM-DD'}, status=400)
         else:
             # Incluir mes atual se tiver dados, senao usar ate mes anterior
             dt_fim = hoje  # Ultimo dia do mes atual
             dt_inicio = add_months(hoje, -(meses-1)).replace(day=1)
 
-        # Dados mes a mes
-        dados_mensais = []
-        mes_atual = dt_inicio.replace(day=1)
-
-        # Iterar ate o mes atual (inclusive)
-        while mes_atual.replace(day=1) <= dt_fim.replace(day=1):
-            prox_mes = add_months(mes_atual, 1)
+        if dt_fim < dt_inicio:
+            return Response({'error': 'data_fim deve ser maior ou igual a data_inicio'}, status=400)
+
+        # Uma unica consulta agrupada por periodo cobrindo todo o intervalo
+        periodos = periodos_do_intervalo(dt_inicio, dt_fim, granularidade)
+        chave_cache = chave_relatorio(
+            'analise-receita', None if is_consolidado else empresa_id,
+            periodos[0], proximo_periodo(periodos[-1], granularidade) - timedelta(days=1),
+            request.query_params.dict()
+        )
+        dados = obter_relatorio(chave_cache)
+        if dados is not None:
+            return Response(dados)
+
+        vendas_por_periodo = vendas_base.por_periodo(
+            periodos,
+            granularidade,
+            somas={
+                'receita_bruta': 'valor_total',
+                'total_descontos': 'desconto',
+                'total_chargeback': 'chargeback',
+                'total_reversao_cb': 'reversao_chargeback',
+            },
+            contar='qtde_vendas'
+        )
 
-            vendas_mes = vendas_base.filter(
-                data_venda__gte=mes_atual,
-                data_venda__lt=prox_mes
-            )
+        aliases = ['receita_bruta', 'total_descontos', 'total_chargeback', 'total_reversao_cb', 'qtde_vendas']
 
-            # Calculos do mes
-            aggregates = vendas_mes.aggregate(
-                receita_bruta=Coalesce(Sum('valor_total'), Decimal('0')),
-                total_descontos=Coalesce(Sum('desconto'), Decimal('0')),
-                total_chargeback=Coalesce(Sum('chargeback'), Decimal('0')),
-                total_reversao_cb=Coalesce(Sum('reversao_chargeback'), Decimal('0')),
-                qtde_vendas=Count('id')
-            )
+        # Percentuais, ticket medio e variacoes em uma unica passada
+        dados_mensais = []
+        anterior = None
+        for inicio in periodos:
+            aggregates = totais_do_periodo(vendas_por_periodo, inicio, aliases)
 
             receita_bruta = float(aggregates['receita_bruta'])
             descontos = float(aggregates['total_descontos'])
@@ -245,9 +284,11 @@ class AnaliseReceitaView(APIView):
             perc_chargeback = (chargeback / receita_bruta * 100) if receita_bruta > 0 else 0
             perc_reversao_cb = (reversao_cb / receita_bruta * 100) if receita_bruta > 0 else 0
 
-            dados_mensais.append({
-                'mes': mes_atual.strftime('%b %y').upper(),
-                'mes_num': mes_atual.strftime('%Y-%m'),
+            rotulo, chave = rotulo_periodo(inicio, granularidade)
+            atual = {
+                'mes': rotulo,
+                'mes_num': chave,
+                'periodo_inicio': inicio.isoformat(),
                 'qtde_vendas': qtde_vendas,
                 'receita_bruta': receita_bruta,
                 'descontos': descontos,
@@ -259,26 +300,19 @@ class AnaliseReceitaView(APIView):
                 'receita_liquida_antes_cb': receita_liquida_antes_cb,
                 'receita_operacional_liquida': receita_operacional_liquida,
                 'ticket_medio': round(ticket_medio, 2),
-            })
+            }
 
-            mes_atual = prox_mes
+            # Variacoes em relacao ao periodo anterior
+            if anterior is not None:
+                atual['variacao_qtde'] = calc_variacao(atual['qtde_vendas'], anterior['qtde_vendas'])
+                atual['variacao_receita_bruta'] = calc_variacao(atual['receita_bruta'], anterior['receita_bruta'])
+                atual['variacao_descontos'] = calc_variacao(atual['descontos'], anterior['descontos'])
+                atual['variacao_chargeback'] = calc_variacao(atual['chargeback'], anterior['chargeback'])
+                atual['variacao_receita_liquida'] = calc_variacao(atual['receita_operacional_liquida'], anterior['receita_operacional_liquida'])
+                atual['variacao_ticket_medio'] = atual['ticket_medio'] - anterior['ticket_medio']
 
-        # Calcular variacoes mes a mes
-        for i in range(1, len(dados_mensais)):
-            atual = dados_mensais[i]
-            anterior = dados_mensais[i-1]
-
-            def calc_variacao(atual_val, anterior_val):
-                if anterior_val == 0:
-                    return 0 if atual_val == 0 else 100
-                return round(((atual_val - anterior_val) / anterior_val) * 100, 1)
-
-            atual['variacao_qtde'] = calc_variacao(atual['qtde_vendas'], anterior['qtde_vendas'])
-            atual['variacao_receita_bruta'] = calc_variacao(atual['receita_bruta'], anterior['receita_bruta'])
-            atual['variacao_descontos'] = calc_variacao(atual['descontos'], anterior['descontos'])
-            atual['variacao_chargeback'] = calc_variacao(atual['chargeback'], anterior['chargeback'])
-            atual['variacao_receita_liquida'] = calc_variacao(atual['receita_operacional_liquida'], anterior['receita_operacional_liquida'])
-            atual['variacao_ticket_medio'] = atual['ticket_medio'] - anterior['ticket_medio']
+            dados_mensais.append(atual)
+            anterior = atual
 
         # Totais do periodo
         totais = {
@@ -294,16 +328,19 @@ class AnaliseReceitaView(APIView):
         totais['descontos_perc'] = round((totais['descontos'] / totais['receita_bruta'] * 100), 1) if totais['receita_bruta'] > 0 else 0
         totais['chargeback_perc'] = round((totais['chargeback'] / totais['receita_bruta'] * 100), 1) if totais['receita_bruta'] > 0 else 0
 
-        return Response({
+        dados = {
             'periodo': {
                 'data_inicio': dt_inicio.isoformat(),
                 'data_fim': dt_fim.isoformat(),
-                'meses': meses
+                'meses': meses,
+                'granularidade': granularidade
             },
             'consolidado': is_consolidado,
             'dados_mensais': dados_mensais,
             'totais': totais
-        })
+        }
+        guardar_relatorio(chave_cache, dados)
+        return Response(dados)
 
 
 class DREView(APIView):
@@ -316,8 +353,12 @@ class DREView(APIView):
     - Custos e Despesas por categoria
     - Lucro Bruto
     - Lucro Liquido
+
+    Aceita ?format=pdf para baixar o relatorio em PDF.
     """
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, RelatorioPDFRenderer]
+    pdf_relatorio = 'dre'
 
     def get(self, request):
         empresa_id = request.query_params.get('empresa_id')
@@ -330,14 +371,15 @@ class DREView(APIView):
             empresa_id = None
 
         # Determina se é Admin Chefe
-        is_admin_chefe = request.user.tipo_usuario == 'ADMIN_CHEFE'
+        contexto = contexto_tenant(request)
+        is_admin_chefe = contexto.admin_chefe
 
         # Se Admin Chefe sem empresa selecionada, pega consolidado
         is_consolidado = empresa_id is None and is_admin_chefe
 
         # Para usuarios normais, sempre usa a empresa do usuario
         if not is_admin_chefe:
-            empresa_id = request.user.empresa_id
+            empresa_id = contexto.empresa_id
             is_consolidado = False
 
         # Se nao e consolidado e nao tem empresa, erro
@@ -347,76 +389,86 @@ class DREView(APIView):
         # Determinar periodo
         hoje = date.today()
         if data_inicio and data_fim:
-            dt_inicio = date.fromisoformat(data_inicio)
-            dt_fim = date.fromisoformat(data_fim)
+            try:
+                dt_inicio = date.fromisoformat(data_inicio)
+                dt_fim = date.fromisoformat(data_fim)
+            except ValueError:
+                return Response({'error': 'Data invalida. Use o formato AAAA-MM-DD'}, status=400)
         else:
             # Incluir mes atual se tiver dados, senao usar ate mes anterior
             dt_fim = hoje  # Ultimo dia do mes atual
             dt_inicio = add_months(hoje, -(meses-1)).replace(day=1)
 
-        # Base querysets
+        if dt_fim < dt_inicio:
+            return Response({'error': 'data_fim deve ser maior ou igual a data_inicio'}, status=400)
+
+        chave_cache = chave_relatorio(
+            'dre', None if is_consolidado else empresa_id, dt_inicio, dt_fim,
+            request.query_params.dict()
+        )
+        dados = obter_relatorio(chave_cache)
+        if dados is not None:
+            return Response(dados)
+
+        # Bases de dados (o DRE usa meses inteiros, lidos do resumo mensal)
         if is_consolidado:
-            vendas_base = Venda.objects.filter(empresa__ativa=True)
-            receitas_base = Receita.objects.filter(empresa__ativa=True)
-            despesas_base = Despesa.objects.filter(empresa__ativa=True)
+            filtro_empresa = filtro_empresas_ativas()
         else:
-            vendas_base = Venda.objects.filter(empresa_id=empresa_id)
-            receitas_base = Receita.objects.filter(empresa_id=empresa_id)
-            despesas_base = Despesa.objects.filter(empresa_id=empresa_id)
+            filtro_empresa = {'empresa_id': empresa_id}
+        vendas_base = FonteRelatorio('VENDA').filtrar(**filtro_empresa)
+        receitas_base = FonteRelatorio('RECEITA').filtrar(**filtro_empresa)
+        despesas_base = FonteRelatorio('DESPESA').filtrar(**filtro_empresa)
+
+        # Uma consulta agrupada por mes para cada fonte, cobrindo todo o periodo
+        meses_periodo = meses_do_periodo(dt_inicio, dt_fim)
+
+        vendas_por_mes = vendas_base.por_periodo(
+            meses_periodo,
+            'mes',
+            somas={
+                'receita_vendas': 'valor_total',
+                'total_descontos': 'desconto',
+                'total_chargeback': 'chargeback',
+                'total_reversao_cb': 'reversao_chargeback',
+            },
+            contar='qtde_vendas'
+        )
+
+        # Receitas do periodo (outras receitas alem de vendas)
+        receitas_por_mes = receitas_base.filtrar(status='RECEBIDA').por_periodo(
+            meses_periodo,
+            'mes',
+            somas={'total': 'valor'}
+        )
+
+        # Despesas do periodo por categoria
+        despesas_por_mes = despesas_base.filtrar(status='PAGA').por_periodo(
+            meses_periodo,
+            'mes',
+            somas={'total': 'valor'},
+            agrupar_por=('categoria__nome', 'categoria__cor')
+        )
 
         # Dados mes a mes
         dados_mensais = []
-        mes_atual = dt_inicio.replace(day=1)
-
-        # Iterar ate o mes atual (inclusive)
-        while mes_atual.replace(day=1) <= dt_fim.replace(day=1):
-            prox_mes = add_months(mes_atual, 1)
-
-            # Vendas do mes
-            vendas_mes = vendas_base.filter(
-                data_venda__gte=mes_atual,
-                data_venda__lt=prox_mes
-            )
-
-            # Receitas do mes (outras receitas alem de vendas)
-            receitas_mes = receitas_base.filter(
-                data_prevista__gte=mes_atual,
-                data_prevista__lt=prox_mes,
-                status='RECEBIDA'
-            )
-
-            # Despesas do mes
-            despesas_mes = despesas_base.filter(
-                data_vencimento__gte=mes_atual,
-                data_vencimento__lt=prox_mes,
-                status='PAGA'
-            )
 
+        for mes_atual in meses_periodo:
             # Agregados de vendas
-            vendas_agg = vendas_mes.aggregate(
-                receita_vendas=Coalesce(Sum('valor_total'), Decimal('0')),
-                total_descontos=Coalesce(Sum('desconto'), Decimal('0')),
-                total_chargeback=Coalesce(Sum('chargeback'), Decimal('0')),
-                total_reversao_cb=Coalesce(Sum('reversao_chargeback'), Decimal('0')),
-                qtde_vendas=Count('id')
+            vendas_agg = totais_do_periodo(
+                vendas_por_mes, mes_atual,
+                ['receita_vendas', 'total_descontos', 'total_chargeback', 'total_reversao_cb', 'qtde_vendas']
             )
 
             # Outras receitas
-            outras_receitas = float(receitas_mes.aggregate(
-                total=Coalesce(Sum('valor'), Decimal('0'))
-            )['total'])
+            outras_receitas = float(totais_do_periodo(receitas_por_mes, mes_atual, ['total'])['total'])
 
             # Despesas por categoria
-            despesas_por_cat = despesas_mes.values(
-                'categoria__nome',
-                'categoria__cor'
-            ).annotate(
-                total=Sum('valor')
-            ).order_by('-total')
+            despesas_por_cat = sorted(
+                despesas_por_mes.get(mes_atual, []),
+                key=lambda d: -d['total']
+            )
 
-            total_despesas = float(despesas_mes.aggregate(
-                total=Coalesce(Sum('valor'), Decimal('0'))
-            )['total'])
+            total_despesas = float(sum(d['total'] for d in despesas_por_cat))
 
             # Calculos
             receita_vendas = float(vendas_agg['receita_vendas'])
@@ -470,18 +522,11 @@ class DREView(APIView):
                 'margem_liquida': round(margem_liquida, 1),
             })
 
-            mes_atual = prox_mes
-
         # Calcular variacoes mes a mes
         for i in range(1, len(dados_mensais)):
             atual = dados_mensais[i]
             anterior = dados_mensais[i-1]
 
-            def calc_variacao(atual_val, anterior_val):
-                if anterior_val == 0:
-                    return 0 if atual_val == 0 else 100
-                return round(((atual_val - anterior_val) / anterior_val) * 100, 1)
-
             atual['variacao_receita'] = calc_variacao(atual['receita_bruta'], anterior['receita_bruta'])
             atual['variacao_despesas'] = calc_variacao(atual['total_despesas'], anterior['total_despesas'])
             atual['variacao_lucro'] = calc_variacao(atual['lucro_liquido'], anterior['lucro_liquido'])
@@ -516,7 +561,7 @@ class DREView(APIView):
         totais['margem_bruta'] = round((totais['lucro_bruto'] / totais['receita_bruta'] * 100), 1) if totais['receita_bruta'] > 0 else 0
         totais['margem_liquida'] = round((totais['lucro_liquido'] / totais['receita_bruta'] * 100), 1) if totais['receita_bruta'] > 0 else 0
 
-        return Response({
+        dados = {
             'periodo': {
                 'data_inicio': dt_inicio.isoformat(),
                 'data_fim': dt_fim.isoformat(),
@@ -525,81 +570,126 @@ class DREView(APIView):
             'consolidado': is_consolidado,
             'dados_mensais': dados_mensais,
             'totais': totais
-        })
+        }
+        guardar_relatorio(chave_cache, dados)
+        return Response(dados)
+
+
+class ConsolidadoPagination(PageNumberPagination):
+    """Paginação das linhas de empresas do relatório consolidado"""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
 
 
 class RelatorioConsolidadoView(APIView):
     """
     Relatório consolidado de todas as empresas (apenas Admin Chefe).
+
+    Cada origem é agregada em uma única consulta agrupada por empresa, então
+    o número de consultas não depende da quantidade de empresas.
+
+    Parâmetros opcionais:
+    - data_inicio / data_fim: período (AAAA-MM-DD)
+    - ordering: campo de ordenação das empresas, com "-" para decrescente
+      (empresa_nome, total_usuarios, total_despesas, total_vendas,
+      total_receitas, saldo)
+    - page / page_size: paginação das empresas
     """
     permission_classes = [IsAuthenticated, IsAdminChefe]
+    pagination_class = ConsolidadoPagination
+    ordering_fields = [
+        'empresa_nome', 'total_usuarios', 'total_despesas',
+        'total_vendas', 'total_receitas', 'saldo',
+    ]
 
     def get(self, request):
         data_inicio = request.query_params.get('data_inicio')
         data_fim = request.query_params.get('data_fim')
+        ordering = request.query_params.get('ordering', 'empresa_nome')
 
-        empresas = Empresa.objects.filter(ativa=True)
-        relatorio_empresas = []
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return Response({
+                'error': f"ordering invalido. Use: {', '.join(self.ordering_fields)}"
+            }, status=400)
 
-        for empresa in empresas:
-            # Filtros de data
-            if data_inicio and data_fim:
-                despesas_qs = Despesa.objects.filter(
-                    empresa=empresa,
-                    data_vencimento__gte=data_inicio,
-                    data_vencimento__lte=data_fim
-                )
-                vendas_qs = Venda.objects.filter(
-                    empresa=empresa,
-                    data_venda__gte=data_inicio,
-                    data_venda__lte=data_fim
-                )
-                receitas_qs = Receita.objects.filter(
-                    empresa=empresa,
-                    data_prevista__gte=data_inicio,
-                    data_prevista__lte=data_fim
-                )
-            else:
-                despesas_qs = Despesa.objects.filter(empresa=empresa)
-                vendas_qs = Venda.objects.filter(empresa=empresa)
-                receitas_qs = Receita.objects.filter(empresa=empresa)
+        dt_inicio = dt_fim = None
+        if data_inicio and data_fim:
+            try:
+                dt_inicio = date.fromisoformat(data_inicio)
+                dt_fim = date.fromisoformat(data_fim)
+            except ValueError:
+                return Response({'error': 'Data invalida. Use o formato AAAA-MM-DD'}, status=400)
+            if dt_fim < dt_inicio:
+                return Response({'error': 'data_fim deve ser maior ou igual a data_inicio'}, status=400)
+
+        chave_cache = chave_relatorio(
+            'consolidado', None, dt_inicio, dt_fim,
+            {**request.query_params.dict(), 'host': request.get_host()}
+        )
+        dados = obter_relatorio(chave_cache)
+        if dados is not None:
+            return Response(dados)
+
+        usar_resumo = periodo_mensal_completo(dt_inicio, dt_fim)
+
+        empresas_ativas = filtro_empresas_ativas()
+        despesas = FonteRelatorio('DESPESA', usar_resumo).filtrar(**empresas_ativas, status='PAGA')
+        vendas = FonteRelatorio('VENDA', usar_resumo).filtrar(**empresas_ativas, status='PAGA')
+        receitas = FonteRelatorio('RECEITA', usar_resumo).filtrar(**empresas_ativas, status='RECEBIDA')
 
-            total_despesas = despesas_qs.filter(status='PAGA').aggregate(
-                total=Sum('valor')
-            )['total'] or Decimal('0')
+        # Filtros de data
+        if dt_inicio and dt_fim:
+            despesas = despesas.filtrar(data_vencimento__gte=dt_inicio, data_vencimento__lte=dt_fim)
+            vendas = vendas.filtrar(data_venda__gte=dt_inicio, data_venda__lte=dt_fim)
+            receitas = receitas.filtrar(data_prevista__gte=dt_inicio, data_prevista__lte=dt_fim)
 
-            total_vendas = vendas_qs.filter(status='PAGA').aggregate(
-                total=Sum('valor_total')
-            )['total'] or Decimal('0')
+        # Uma consulta agrupada por origem: {empresa_id: total}
+        despesas_por_empresa = totais_por_empresa(despesas, 'valor')
+        vendas_por_empresa = totais_por_empresa(vendas, 'valor_total')
+        receitas_por_empresa = totais_por_empresa(receitas, 'valor')
 
-            total_receitas = receitas_qs.filter(status='RECEBIDA').aggregate(
-                total=Sum('valor')
-            )['total'] or Decimal('0')
+        empresas = Empresa.objects.filter(ativa=True).annotate(
+            total_usuarios=Count('usuarios', filter=Q(usuarios__is_active=True))
+        ).values('id', 'nome', 'total_usuarios').order_by()
 
-            total_usuarios = empresa.usuarios.filter(is_active=True).count()
+        relatorio_empresas = []
+        for empresa in empresas:
+            total_despesas = despesas_por_empresa.get(empresa['id'], Decimal('0'))
+            total_vendas = vendas_por_empresa.get(empresa['id'], Decimal('0'))
+            total_receitas = receitas_por_empresa.get(empresa['id'], Decimal('0'))
 
             relatorio_empresas.append({
-                'empresa_id': empresa.id,
-                'empresa_nome': empresa.nome,
-                'total_usuarios': total_usuarios,
+                'empresa_id': empresa['id'],
+                'empresa_nome': empresa['nome'],
+                'total_usuarios': empresa['total_usuarios'],
                 'total_despesas': float(total_despesas),
                 'total_vendas': float(total_vendas),
                 'total_receitas': float(total_receitas),
                 'saldo': float(total_receitas + total_vendas - total_despesas),
             })
 
-        # Totais gerais
+        # Totais gerais (sobre todas as empresas, não apenas a página)
         total_geral_despesas = sum(e['total_despesas'] for e in relatorio_empresas)
         total_geral_vendas = sum(e['total_vendas'] for e in relatorio_empresas)
         total_geral_receitas = sum(e['total_receitas'] for e in relatorio_empresas)
         total_geral_usuarios = sum(e['total_usuarios'] for e in relatorio_empresas)
 
-        return Response({
+        # Ordenação e paginação das empresas
+        campo = ordering.lstrip('-')
+        relatorio_empresas.sort(key=lambda e: e['empresa_id'])
+        relatorio_empresas.sort(
+            key=lambda e: e[campo].lower() if campo == 'empresa_nome' else e[campo],
+            reverse=ordering.startswith('-')
+        )
+        paginator = self.pagination_class()
+        pagina = paginator.paginate_queryset(relatorio_empresas, request, view=self)
+
+        dados = {
             'periodo': {
                 'data_inicio': data_inicio,
                 'data_fim': data_fim
             },
-            'total_empresas': empresas.count(),
+            'total_empresas': len(relatorio_empresas),
             'total_usuarios': total_geral_usuarios,
             'resumo_geral': {
                 'total_despesas': total_geral_despesas,
@@ -607,5 +697,254 @@ class RelatorioConsolidadoView(APIView):
                 'total_receitas': total_geral_receitas,
                 'saldo_geral': total_geral_receitas + total_geral_vendas - total_geral_despesas,
             },
-            'empresas': relatorio_empresas,
-        })
+            'ordering': ordering,
+            'paginacao': {
+                'pagina': paginator.page.number,
+                'total_paginas': paginator.page.paginator.num_pages,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+            },
+            'empresas': pagina,
+        }
+        guardar_relatorio(chave_cache, dados)
+        return Response(dados)
+
+
+class DashboardView(APIView):
+    """
+    Resumo do dashboard: KPIs, séries e rankings em uma única resposta.
+
+    Todos os valores são agregados no banco, então o tamanho da resposta não
+    depende da quantidade de lançamentos.
+
+    Parâmetros (os mesmos de getFilterParams no frontend):
+    - empresa (ou empresa_id): empresa selecionada; sem empresa, o Admin
+      Chefe recebe o consolidado das empresas ativas
+    - data_inicio / data_fim: período (padrão: mês atual)
+    - limite: tamanho dos rankings (padrão 5, de 1 a 20)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        empresa_id = request.query_params.get('empresa') or request.query_params.get('empresa_id')
+        data_inicio = request.query_params.get('data_inicio')
+        data_fim = request.query_params.get('data_fim')
+
+        try:
+            limite = int(request.query_params.get('limite', 5))
+        except ValueError:
+            return Response({'error': 'limite invalido'}, status=400)
+        if limite < 1:
+            return Response({'error': 'limite invalido'}, status=400)
+        limite = min(limite, 20)
+
+        # Ignora valores invalidos como 'todos'
+        if empresa_id and (empresa_id == 'todos' or not empresa_id.isdigit()):
+            empresa_id = None
+
+        contexto = contexto_tenant(request)
+        is_admin_chefe = contexto.admin_chefe
+        is_consolidado = empresa_id is None and is_admin_chefe
+
+        # Para usuarios normais, sempre usa a empresa do usuario
+        if not is_admin_chefe:
+            empresa_id = contexto.empresa_id
+            is_consolidado = False
+
+        if not is_consolidado and not empresa_id:
+            return Response({'error': 'Usuario nao possui empresa associada'}, status=400)
+
+        # Periodo (padrao: mes atual)
+        hoje = date.today()
+        try:
+            dt_inicio = date.fromisoformat(data_inicio) if data_inicio else hoje.replace(day=1)
+            if data_fim:
+                dt_fim = date.fromisoformat(data_fim)
+            else:
+                dt_fim = add_months(dt_inicio.replace(day=1), 1) - timedelta(days=1)
+        except ValueError:
+            return Response({'error': 'Data invalida. Use o formato AAAA-MM-DD'}, status=400)
+
+        if dt_fim < dt_inicio:
+            return Response({'error': 'data_fim deve ser maior ou igual a data_inicio'}, status=400)
+
+        # Pendencias usam todo o historico; total_empresas so aparece para o Admin Chefe
+        chave_cache = chave_relatorio(
+            'dashboard', None if is_consolidado else empresa_id, dt_inicio, dt_fim,
+            {**request.query_params.dict(), 'admin_chefe': is_admin_chefe},
+            historico=True
+        )
+        dados = obter_relatorio(chave_cache)
+        if dados is not None:
+            return Response(dados)
+
+        # Series diarias para periodos curtos, mensais para os demais
+        granularidade = 'dia' if (dt_fim - dt_inicio).days <= 62 else 'mes'
+        usar_resumo = periodo_mensal_completo(dt_inicio, dt_fim)
+
+        if is_consolidado:
+            filtro_empresa = filtro_empresas_ativas()
+        else:
+            filtro_empresa = {'empresa_id': empresa_id}
+
+        fontes = {
+            'VENDA': ('data_venda', 'valor_total'),
+            'DESPESA': ('data_vencimento', 'valor'),
+            'RECEITA': ('data_prevista', 'valor'),
+        }
+
+        # KPIs do periodo: uma consulta agrupada por status para cada fonte
+        kpis_por_origem = {}
+        for origem, (campo_data, campo_valor) in fontes.items():
+            somas = {'total': campo_valor}
+            if origem == 'VENDA':
+                somas['desconto'] = 'desconto'
+            fonte = FonteRelatorio(origem, usar_resumo).filtrar(**filtro_empresa, **{
+                f'{campo_data}__gte': dt_inicio,
+                f'{campo_data}__lte': dt_fim,
+            }).filtrar(status__in=self.status_validos(origem))
+
+            total = Decimal('0')
+            quantidade = 0
+            for linha in fonte.agrupar(['status'], somas, contar='quantidade'):
+                total += linha['total'] - linha.get('desconto', 0)
+                quantidade += linha['quantidade']
+            kpis_por_origem[origem] = (total, quantidade)
+
+        # Pendencias (em todo o sistema, nao so no periodo)
+        despesas_pendentes = FonteRelatorio('DESPESA').filtrar(
+            status__in=['PENDENTE', 'VENCIDA'], **filtro_empresa
+        ).totais({}, contar='quantidade')['quantidade']
+        receitas_pendentes = FonteRelatorio('RECEITA').filtrar(
+            status='PENDENTE', **filtro_empresa
+        ).totais({}, contar='quantidade')['quantidade']
+
+        total_vendas, qtde_vendas = kpis_por_origem['VENDA']
+        total_despesas, _ = kpis_por_origem['DESPESA']
+        total_receitas, _ = kpis_por_origem['RECEITA']
+
+        # Series por periodo
+        periodos = periodos_do_intervalo(dt_inicio, dt_fim, granularidade)
+        series_por_origem = {}
+        for origem, (campo_data, campo_valor) in fontes.items():
+            somas = {'total': campo_valor}
+            if origem == 'VENDA':
+                somas['desconto'] = 'desconto'
+            fonte = FonteRelatorio(
+                origem, periodo_mensal_completo(dt_inicio, dt_fim, granularidade)
+            ).filtrar(**filtro_empresa).filtrar(status__in=self.status_validos(origem))
+            series_por_origem[origem] = fonte.por_periodo(periodos, granularidade, somas)
+
+        series = []
+        for periodo in periodos:
+            valores = {}
+            for origem, resultado in series_por_origem.items():
+                aliases = ['total', 'desconto'] if origem == 'VENDA' else ['total']
+                totais = totais_do_periodo(resultado, periodo, aliases)
+                valores[origem] = float(totais['total'] - totais.get('desconto', 0))
+            rotulo, chave = rotulo_periodo(periodo, granularidade)
+            series.append({
+                'periodo': rotulo,
+                'chave': chave,
+                'vendas': valores['VENDA'],
+                'receitas': valores['RECEITA'],
+                'despesas': valores['DESPESA'],
+                'saldo': valores['VENDA'] + valores['RECEITA'] - valores['DESPESA'],
+            })
+
+        # Rankings do periodo
+        top_categorias = sorted(
+            FonteRelatorio('DESPESA', usar_resumo).filtrar(
+                **filtro_empresa,
+                data_vencimento__gte=dt_inicio,
+                data_vencimento__lte=dt_fim,
+            ).filtrar(status__in=self.status_validos('DESPESA')).agrupar(
+                ['categoria__nome', 'categoria__cor'], {'total': 'valor'}, contar='quantidade'
+            ),
+            key=lambda c: -c['total']
+        )[:limite]
+
+        vendas_periodo = Venda.objects.filter(
+            **filtro_empresa,
+            data_venda__gte=dt_inicio,
+            data_venda__lte=dt_fim,
+        ).exclude(status='CANCELADA')
+
+        top_clientes = vendas_periodo.filter(cliente__isnull=False).values(
+            'cliente_id', 'cliente__nome'
+        ).annotate(
+            total=Sum(F('valor_total') - F('desconto')),
+            quantidade=Count('id'),
+        ).order_by('-total')[:limite]
+
+        top_produtos = ItemVenda.objects.filter(venda__in=vendas_periodo).values(
+            'produto_id', 'produto__nome'
+        ).annotate(
+            total=Sum(F('quantidade') * F('preco_unitario')),
+            quantidade=Sum('quantidade'),
+        ).order_by('-total')[:limite]
+
+        kpis = {
+            'total_vendas': float(total_vendas),
+            'total_receitas': float(total_receitas),
+            'total_despesas': float(total_despesas),
+            'saldo': float(total_receitas + total_vendas - total_despesas),
+            'vendas_periodo': qtde_vendas,
+            'ticket_medio': float(total_vendas / qtde_vendas) if qtde_vendas else 0,
+            'despesas_pendentes': despesas_pendentes,
+            'receitas_pendentes': receitas_pendentes,
+        }
+        if is_admin_chefe:
+            kpis['total_empresas'] = Empresa.objects.filter(ativa=True).count()
+
+        dados = {
+            'periodo': {
+                'data_inicio': dt_inicio.isoformat(),
+                'data_fim': dt_fim.isoformat(),
+                'granularidade': granularidade,
+            },
+            'consolidado': is_consolidado,
+            'empresa_id': None if is_consolidado else int(empresa_id),
+            'kpis': kpis,
+            'series': series,
+            'top': {
+                'despesas_por_categoria': [
+                    {
+                        'categoria': c['categoria__nome'] or 'Sem Categoria',
+                        'cor': c['categoria__cor'] or '#666666',
+                        'total': float(c['total']),
+                        'quantidade': c['quantidade'],
+                    }
+                    for c in top_categorias
+                ],
+                'clientes': [
+                    {
+                        'cliente_id': c['cliente_id'],
+                        'cliente': c['cliente__nome'],
+                        'total': float(c['total']),
+                        'quantidade': c['quantidade'],
+                    }
+                    for c in top_clientes
+                ],
+                'produtos': [
+                    {
+                        'produto_id': p['produto_id'],
+                        'produto': p['produto__nome'],
+                        'total': float(p['total']),
+                        'quantidade': p['quantidade'],
+                    }
+                    for p in top_produtos
+                ],
+            },
+        }
+        guardar_relatorio(chave_cache, dados)
+        return Response(dados)
+
+    @staticmethod
+    def status_validos(origem):
+        """Status considerados nos totais (lancamentos cancelados ficam de fora)"""
+        if origem == 'DESPESA':
+            return ['PENDENTE', 'PAGA', 'VENCIDA']
+        if origem == 'RECEITA':
+            return ['PENDENTE', 'RECEBIDA']
+        return ['PENDENTE', 'PAGA']
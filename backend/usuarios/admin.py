@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
 from django.utils.html import format_html
+from relatorios.cache import invalidar_empresa
+from .autenticacao import invalidar_cache_usuarios
 from .models import Usuario
 
 
@@ -86,22 +89,39 @@ class UsuarioAdmin(BaseUserAdmin):
 
     actions = ['ativar_usuarios', 'desativar_usuarios', 'tornar_admin_empresa', 'tornar_usuario_empresa']
 
+    def _invalidar_relatorios(self, empresa_ids):
+        """O total de usuários ativos aparece no dashboard da empresa e no consolidado"""
+        for empresa_id in empresa_ids:
+            invalidar_empresa(empresa_id)
+
     def ativar_usuarios(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        ids = list(queryset.values_list('pk', flat=True))
+        empresa_ids = set(queryset.exclude(empresa=None).values_list('empresa_id', flat=True))
+        updated = queryset.update(is_active=True, atualizado_em=timezone.now())
+        invalidar_cache_usuarios(ids)
+        self._invalidar_relatorios(empresa_ids)
         self.message_user(request, f'{updated} usuário(s) ativado(s).')
     ativar_usuarios.short_description = 'Ativar usuários selecionados'
 
     def desativar_usuarios(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        ids = list(queryset.values_list('pk', flat=True))
+        empresa_ids = set(queryset.exclude(empresa=None).values_list('empresa_id', flat=True))
+        updated = queryset.update(is_active=False, atualizado_em=timezone.now())
+        invalidar_cache_usuarios(ids)
+        self._invalidar_relatorios(empresa_ids)
         self.message_user(request, f'{updated} usuário(s) desativado(s).')
     desativar_usuarios.short_description = 'Desativar usuários selecionados'
 
     def tornar_admin_empresa(self, request, queryset):
-        updated = queryset.update(tipo_usuario='ADMIN_EMPRESA')
+        ids = list(queryset.values_list('pk', flat=True))
+        updated = queryset.update(tipo_usuario='ADMIN_EMPRESA', atualizado_em=timezone.now())
+        invalidar_cache_usuarios(ids)
         self.message_user(request, f'{updated} usuário(s) promovido(s) a Admin da Empresa.')
     tornar_admin_empresa.short_description = 'Tornar Admin da Empresa'
 
     def tornar_usuario_empresa(self, request, queryset):
-        updated = queryset.update(tipo_usuario='USUARIO_EMPRESA')
+        ids = list(queryset.values_list('pk', flat=True))
+        updated = queryset.update(tipo_usuario='USUARIO_EMPRESA', atualizado_em=timezone.now())
+        invalidar_cache_usuarios(ids)
         self.message_user(request, f'{updated} usuário(s) alterado(s) para Usuário da Empresa.')
     tornar_usuario_empresa.short_description = 'Tornar Usuário da Empresa'
@@ -0,0 +1,144 @@
+"""
+Autenticação JWT sem consulta ao banco a cada requisição.
+
+O token traz, além do id, as claims email, first_name, last_name,
+tipo_usuario, empresa_id e versao (atualizado_em do usuário na emissão).
+Com o cache "default" compartilhado entre os processos (ver CACHES em
+core/settings.py), a versão atual de cada usuário fica em cache por
+USUARIOS_CACHE_TIMEOUT segundos:
+
+- versão em cache igual à do token: o usuário é montado a partir das
+  claims, sem consultar o banco (os demais campos são carregados só se
+  forem usados);
+- versão diferente (o usuário foi alterado depois da emissão do token) ou
+  desconhecida: o usuário é lido do banco, o que também recusa contas
+  desativadas, e a versão atual volta para o cache.
+
+Gravações de usuário (save, delete e as ações do admin) removem a versão
+do cache.
+
+Com cache local a cada processo (LocMemCache, o padrão), a remoção não
+chegaria aos demais workers, que continuariam aceitando um usuário
+desativado até o fim do TTL. Nesse caso is_active e a versão são lidos do
+banco a cada requisição, em uma consulta pela chave primária que traz só
+atualizado_em; o usuário continua sendo montado a partir das claims quando
+a versão confere.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core.cache import cache_compartilhado
+
+from .contexto import ContextoTenant
+from .models import Usuario
+
+
+# (campo do Usuario, claim do token) do usuário montado a partir do token
+CAMPOS_TOKEN = [
+    ('email', 'email'),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('tipo_usuario', 'tipo_usuario'),
+    ('empresa_id', 'empresa_id'),
+]
+
+
+def versao_usuario(usuario):
+    """Versão do usuário: atualizado_em em microssegundos"""
+    return versao_da_data(usuario.atualizado_em)
+
+
+def versao_da_data(atualizado_em):
+    return int(atualizado_em.timestamp() * 1_000_000)
+
+
+def chave_versao(usuario_id):
+    return f'usuarios:versao:{usuario_id}'
+
+
+def chave_usuario(usuario_id):
+    return f'usuarios:usuario:{usuario_id}'
+
+
+def invalidar_cache_usuarios(usuario_ids):
+    chaves = []
+    for usuario_id in usuario_ids:
+        chaves += [chave_versao(usuario_id), chave_usuario(usuario_id)]
+    cache.delete_many(chaves)
+
+
+def token_completo(token):
+    """O token traz todas as claims usadas para montar o usuário"""
+    return all(claim in token for _, claim in CAMPOS_TOKEN)
+
+
+def usuario_do_token(token):
+    """
+    Usuario montado a partir das claims, como se tivesse sido lido do banco
+    com .only(): os campos que não estão no token são carregados ao serem
+    acessados.
+    """
+    dados = {campo: token[claim] for campo, claim in CAMPOS_TOKEN}
+    dados.update(id=token[api_settings.USER_ID_CLAIM], is_active=True)
+    # from_db espera os valores na ordem dos campos do model
+    campos = [campo.attname for campo in Usuario._meta.concrete_fields if campo.attname in dados]
+    return Usuario.from_db(DEFAULT_DB_ALIAS, campos, [dados[campo] for campo in campos])
+
+
+class JWTAutenticacaoTenant(JWTAuthentication):
+    """JWTAuthentication que monta o usuário a partir do token e o contexto de tenant"""
+
+    def authenticate(self, request):
+        resultado = super().authenticate(request)
+        if resultado is None:
+            return None
+        usuario, token = resultado
+        request._request.tenant = ContextoTenant.do_token(usuario, token)
+        return resultado
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if not cache_compartilhado():
+            return self.get_user_sem_cache(usuario_id, validated_token)
+
+        versao = cache.get(chave_versao(usuario_id))
+        if versao is not None:
+            if versao == validated_token.get('versao') and token_completo(validated_token):
+                return usuario_do_token(validated_token)
+
+            # Token emitido antes da última alteração do usuário (as claims
+            # estão desatualizadas): usa o usuário da versão atual, se em cache
+            usuario = cache.get(chave_usuario(usuario_id))
+            if usuario is not None and versao_usuario(usuario) == versao:
+                return usuario
+
+        # Banco: recusa usuários inexistentes ou desativados
+        usuario = super().get_user(validated_token)
+        cache.set_many(
+            {chave_versao(usuario_id): versao_usuario(usuario), chave_usuario(usuario_id): usuario},
+            timeout=settings.USUARIOS_CACHE_TIMEOUT,
+        )
+        return usuario
+
+    def get_user_sem_cache(self, usuario_id, validated_token):
+        """Versão e is_active lidos do banco: o cache local não vê gravações de outros processos"""
+        atualizado_em = Usuario.objects.filter(
+            **{api_settings.USER_ID_FIELD: usuario_id}, is_active=True
+        ).order_by().values_list('atualizado_em', flat=True).first()
+        if (
+            atualizado_em is not None
+            and versao_da_data(atualizado_em) == validated_token.get('versao')
+            and token_completo(validated_token)
+        ):
+            return usuario_do_token(validated_token)
+
+        # Usuário alterado depois da emissão do token, desativado ou inexistente
+        return super().get_user(validated_token)
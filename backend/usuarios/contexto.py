@@ -0,0 +1,94 @@
+"""
+Contexto de tenant da requisição: usuário, empresa e perfil resolvidos uma
+única vez.
+
+Permissões e viewsets leem empresa_id e tipo_usuario do contexto, sem
+acessar request.user.empresa (que carrega a Empresa do banco). Com JWT o
+contexto é montado pela autenticação (usuarios.autenticacao) a partir das
+claims empresa_id e tipo_usuario do token; nas demais requisições (admin,
+sessão, testes com force_authenticate) é montado a partir do usuário.
+"""
+from django.utils.functional import SimpleLazyObject, cached_property
+
+
+class ContextoTenant:
+    """Usuário, empresa e perfil de uma requisição"""
+
+    def __init__(self, usuario, empresa_id=None, tipo_usuario=None):
+        self.usuario = usuario
+        self.empresa_id = empresa_id
+        self.tipo_usuario = tipo_usuario
+
+    @classmethod
+    def do_usuario(cls, usuario):
+        if usuario is None or not usuario.is_authenticated:
+            return cls(usuario)
+        return cls(usuario, usuario.empresa_id, usuario.tipo_usuario)
+
+    @classmethod
+    def do_token(cls, usuario, token):
+        """
+        Contexto a partir das claims do token. Se a empresa ou o perfil do
+        usuário mudaram depois da emissão do token, valem os dados atuais.
+        """
+        empresa_id = token.get('empresa_id', usuario.empresa_id)
+        tipo_usuario = token.get('tipo_usuario', usuario.tipo_usuario)
+        if (empresa_id, tipo_usuario) != (usuario.empresa_id, usuario.tipo_usuario):
+            return cls.do_usuario(usuario)
+        return cls(usuario, empresa_id, tipo_usuario)
+
+    @property
+    def autenticado(self):
+        return self.usuario is not None and self.usuario.is_authenticated
+
+    @property
+    def admin_chefe(self):
+        return self.tipo_usuario == 'ADMIN_CHEFE'
+
+    @property
+    def admin_empresa(self):
+        return self.tipo_usuario == 'ADMIN_EMPRESA'
+
+    def pode_acessar_empresa(self, empresa_id):
+        """Admin Chefe acessa qualquer empresa; os demais, só a própria"""
+        if self.admin_chefe:
+            return True
+        return self.empresa_id is not None and str(self.empresa_id) == str(empresa_id)
+
+    @cached_property
+    def empresa(self):
+        """Empresa do usuário, carregada apenas se for usada"""
+        from empresas.models import Empresa
+
+        if not self.empresa_id:
+            return None
+        return Empresa.objects.filter(pk=self.empresa_id).first()
+
+
+def contexto_tenant(request):
+    """
+    Contexto da requisição (HttpRequest ou Request do DRF). É recriado
+    quando o usuário autenticado não é o do contexto, como em
+    force_authenticate ou em uma autenticação diferente da JWT.
+    """
+    contexto = getattr(request, 'tenant', None)
+    usuario = request.user
+    if contexto is None or contexto.usuario is not usuario:
+        contexto = ContextoTenant.do_usuario(usuario)
+        request.tenant = contexto
+    return contexto
+
+
+class ContextoTenantMiddleware:
+    """
+    Disponibiliza request.tenant em todas as requisições. O contexto da
+    sessão é montado só quando usado; na API ele é substituído pelo
+    contexto da autenticação JWT.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant = SimpleLazyObject(lambda: ContextoTenant.do_usuario(request.user))
+        return self.get_response(request)
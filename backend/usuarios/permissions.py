@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .contexto import contexto_tenant
+
 
 class IsAdminChefe(permissions.BasePermission):
     """
@@ -7,11 +9,8 @@ class IsAdminChefe(permissions.BasePermission):
     Permite acesso apenas a usuários com tipo_usuario = ADMIN_CHEFE.
     """
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.tipo_usuario == 'ADMIN_CHEFE'
-        )
+        contexto = contexto_tenant(request)
+        return contexto.autenticado and contexto.admin_chefe
 
 
 class IsAdminEmpresa(permissions.BasePermission):
@@ -20,11 +19,8 @@ class IsAdminEmpresa(permissions.BasePermission):
     Permite acesso a Admin Chefe e Admin da Empresa.
     """
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.tipo_usuario in ['ADMIN_CHEFE', 'ADMIN_EMPRESA']
-        )
+        contexto = contexto_tenant(request)
+        return contexto.autenticado and (contexto.admin_chefe or contexto.admin_empresa)
 
 
 class IsOwnerOrAdminChefe(permissions.BasePermission):
@@ -32,17 +28,15 @@ class IsOwnerOrAdminChefe(permissions.BasePermission):
     Permissão que permite acesso ao dono do objeto ou Admin Chefe.
     """
     def has_object_permission(self, request, view, obj):
+        contexto = contexto_tenant(request)
+
         # Admin Chefe tem acesso total
-        if request.user.tipo_usuario == 'ADMIN_CHEFE':
+        if contexto.admin_chefe:
             return True
 
-        # Verifica se o objeto pertence à mesma empresa do usuário
-        if hasattr(obj, 'empresa'):
-            return obj.empresa_id == request.user.empresa_id
-
-        # Para objetos do tipo Usuario
+        # Verifica se o objeto (ou o Usuario) pertence à mesma empresa do usuário
         if hasattr(obj, 'empresa_id'):
-            return obj.empresa_id == request.user.empresa_id
+            return obj.empresa_id == contexto.empresa_id
 
         return False
 
@@ -52,32 +46,33 @@ class MultiTenantPermission(permissions.BasePermission):
     Permissão base para multi-tenant.
     Garante que usuários só acessem dados da própria empresa,
     exceto Admin Chefe que tem acesso a tudo.
+
+    Usa o contexto de tenant da requisição: a empresa é comparada pelo id,
+    sem carregar a Empresa do banco.
     """
     def has_permission(self, request, view):
+        contexto = contexto_tenant(request)
+
         # Usuário deve estar autenticado
-        if not request.user or not request.user.is_authenticated:
+        if not contexto.autenticado:
             return False
 
         # Admin Chefe tem acesso a tudo
-        if request.user.tipo_usuario == 'ADMIN_CHEFE':
+        if contexto.admin_chefe:
             return True
 
         # Outros usuários devem ter uma empresa associada
-        if not request.user.empresa:
-            return False
-
-        return True
+        return bool(contexto.empresa_id)
 
     def has_object_permission(self, request, view, obj):
+        contexto = contexto_tenant(request)
+
         # Admin Chefe tem acesso a tudo
-        if request.user.tipo_usuario == 'ADMIN_CHEFE':
+        if contexto.admin_chefe:
             return True
 
         # Verifica se o objeto pertence à empresa do usuário
-        if hasattr(obj, 'empresa'):
-            return obj.empresa_id == request.user.empresa_id
-
         if hasattr(obj, 'empresa_id'):
-            return obj.empresa_id == request.user.empresa_id
+            return obj.empresa_id == contexto.empresa_id
 
         return False
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .autenticacao import versao_usuario
+from .contexto import contexto_tenant
 from .models import Usuario
 from empresas.serializers import EmpresaSerializer
 
@@ -27,8 +29,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'first_name': self.user.first_name,
             'last_name': self.user.last_name,
             'tipo_usuario': self.user.tipo_usuario,
-            'empresa_id': self.user.empresa_id if self.user.empresa else None,
-            'empresa_nome': self.user.empresa.nome if self.user.empresa else None,
+            'empresa_id': self.user.empresa_id,
+            'empresa_nome': self.user.empresa.nome if self.user.empresa_id else None,
             'telefone': self.user.telefone,
             'foto': self.user.foto.url if self.user.foto else None,
             'is_active': self.user.is_active,
@@ -40,10 +42,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
 
-        # Adiciona claims customizados ao token
+        # Adiciona claims customizados ao token. Com a versão do usuário, a
+        # autenticação monta o usuário a partir das claims (ver
+        # usuarios/autenticacao.py)
         token['email'] = user.email
+        token['first_name'] = user.first_name
+        token['last_name'] = user.last_name
         token['tipo_usuario'] = user.tipo_usuario
-        token['empresa_id'] = user.empresa_id if user.empresa else None
+        token['empresa_id'] = user.empresa_id
+        token['versao'] = versao_usuario(user)
 
         return token
 
@@ -67,11 +74,11 @@ class UsuarioSerializer(serializers.ModelSerializer):
 
     def get_empresa_nome(self, obj):
         """Retorna nome da empresa ou None se não tiver"""
-        return obj.empresa.nome if obj.empresa else None
+        return obj.empresa.nome if obj.empresa_id else None
 
     def get_empresa_id(self, obj):
         """Retorna ID da empresa ou None se não tiver"""
-        return obj.empresa.id if obj.empresa else None
+        return obj.empresa_id
 
     def create(self, validated_data):
         password = validated_data.pop('password', None)
@@ -101,14 +108,15 @@ class UsuarioSerializer(serializers.ModelSerializer):
             instance.save()
             return instance
 
-        is_admin_chefe = request.user.tipo_usuario == 'ADMIN_CHEFE'
-        is_admin_empresa = request.user.tipo_usuario == 'ADMIN_EMPRESA'
+        contexto = contexto_tenant(request)
+        is_admin_chefe = contexto.admin_chefe
+        is_admin_empresa = contexto.admin_empresa
         is_editing_self = request.user.id == instance.id
 
         # Verifica se Admin Empresa está editando usuário da mesma empresa
         is_same_empresa = (
-            request.user.empresa_id and
-            instance.empresa_id == request.user.empresa_id
+            contexto.empresa_id and
+            instance.empresa_id == contexto.empresa_id
         )
 
         # Campos que SOMENTE Admin Chefe pode alterar
@@ -0,0 +1,15 @@
+"""
+Signals que removem o usuário do cache da autenticação JWT quando ele é
+alterado ou excluído.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .autenticacao import invalidar_cache_usuarios
+from .models import Usuario
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_usuario(sender, instance, **kwargs):
+    invalidar_cache_usuarios([instance.pk])
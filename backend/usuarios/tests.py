@@ -0,0 +1,60 @@
+import tempfile
+
+from django.core.cache import caches
+from django.db.models.functions import Now
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from core.fabricas import cliente_jwt, criar_empresa, criar_usuario
+from .autenticacao import JWTAutenticacaoTenant, chave_versao
+from .models import Usuario
+from .serializers import CustomTokenObtainPairSerializer
+
+
+class AutenticacaoJWTTest(TestCase):
+    """Usuários desativados ou alterados em outro processo não passam com o token antigo"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.usuario = criar_usuario(criar_empresa(), first_name='Ana')
+        self.token = CustomTokenObtainPairSerializer.get_token(self.usuario).access_token
+        self.autenticacao = JWTAutenticacaoTenant()
+
+    def alterar_em_outro_processo(self, **campos):
+        """update() não dispara signals, como uma gravação feita por outro worker"""
+        Usuario.objects.filter(pk=self.usuario.pk).update(atualizado_em=Now(), **campos)
+
+    def test_cache_local_consulta_o_banco(self):
+        # Versão conferida: uma consulta, e o usuário vem das claims
+        with self.assertNumQueries(1):
+            usuario = self.autenticacao.get_user(self.token)
+        self.assertEqual((usuario.pk, usuario.first_name), (self.usuario.pk, 'Ana'))
+
+        self.alterar_em_outro_processo(first_name='Beatriz')
+        self.assertEqual(self.autenticacao.get_user(self.token).first_name, 'Beatriz')
+
+        self.alterar_em_outro_processo(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticacao.get_user(self.token)
+        self.assertIsNone(caches['default'].get(chave_versao(self.usuario.pk)))
+
+    def test_usuario_desativado_recebe_401(self):
+        api = cliente_jwt(self.usuario)
+        self.assertEqual(api.get('/api/usuarios/me/').status_code, 200)
+        self.alterar_em_outro_processo(is_active=False)
+        self.assertEqual(api.get('/api/usuarios/me/').status_code, 401)
+
+    def test_cache_compartilhado(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': diretorio}
+            with override_settings(CACHES={'default': cache}):
+                self.autenticacao.get_user(self.token)
+                self.assertIsNotNone(caches['default'].get(chave_versao(self.usuario.pk)))
+                with self.assertNumQueries(0):
+                    self.autenticacao.get_user(self.token)
+
+                # save() remove a versão do cache compartilhado
+                self.usuario.is_active = False
+                self.usuario.save()
+                with self.assertRaises(AuthenticationFailed):
+                    self.autenticacao.get_user(self.token)
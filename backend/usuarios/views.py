@@ -13,6 +13,7 @@ from .serializers import (
     UsuarioFotoSerializer,
     CustomTokenObtainPairSerializer
 )
+from .contexto import contexto_tenant
 from .permissions import IsAdminChefe, IsAdminEmpresa, MultiTenantPermission
 
 
@@ -40,18 +41,21 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         """
         Filtra usuários com base no tipo de usuário logado.
         """
-        user = self.request.user
+        contexto = contexto_tenant(self.request)
+
+        # empresa_nome é lido pelo UsuarioSerializer
+        queryset = Usuario.objects.select_related('empresa')
 
         # Admin Chefe vê todos os usuários
-        if user.tipo_usuario == 'ADMIN_CHEFE':
-            return Usuario.objects.all()
+        if contexto.admin_chefe:
+            return queryset
 
         # Admin Empresa vê usuários da própria empresa
-        if user.tipo_usuario == 'ADMIN_EMPRESA':
-            return Usuario.objects.filter(empresa=user.empresa)
+        if contexto.admin_empresa:
+            return queryset.filter(empresa_id=contexto.empresa_id)
 
         # Usuário comum vê apenas ele mesmo
-        return Usuario.objects.filter(id=user.id)
+        return queryset.filter(id=contexto.usuario.id)
 
     def get_serializer_class(self):
         """
@@ -65,11 +69,11 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         """
         Customiza a criação de usuários.
         """
-        user = self.request.user
+        contexto = contexto_tenant(self.request)
 
         # Se não for Admin Chefe, força empresa do usuário logado
-        if user.tipo_usuario != 'ADMIN_CHEFE':
-            serializer.save(empresa=user.empresa)
+        if not contexto.admin_chefe:
+            serializer.save(empresa=contexto.empresa)
         else:
             serializer.save()
 
@@ -78,7 +82,9 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         """
         Retorna informações do usuário logado.
         """
-        serializer = self.get_serializer(request.user)
+        # O request.user da autenticação JWT traz só os campos do token
+        usuario = Usuario.objects.select_related('empresa').get(pk=request.user.pk)
+        serializer = self.get_serializer(usuario)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -92,15 +98,16 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         - Admin Empresa trocando senha de usuário da MESMA empresa: não precisa da senha atual
         """
         usuario = self.get_object()
-        is_admin_chefe = request.user.tipo_usuario == 'ADMIN_CHEFE'
-        is_admin_empresa = request.user.tipo_usuario == 'ADMIN_EMPRESA'
+        contexto = contexto_tenant(request)
+        is_admin_chefe = contexto.admin_chefe
+        is_admin_empresa = contexto.admin_empresa
         is_own_password = request.user.id == usuario.id
 
         # Verifica se Admin Empresa está editando usuário da mesma empresa
         is_same_empresa = (
             is_admin_empresa and
-            request.user.empresa_id and
-            usuario.empresa_id == request.user.empresa_id
+            contexto.empresa_id and
+            usuario.empresa_id == contexto.empresa_id
         )
 
         # Verifica permissão - pode trocar senha se:
@@ -164,7 +171,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         usuario = self.get_object()
 
         # Verifica permissão - só pode alterar própria foto ou Admin Chefe
-        if request.user.id != usuario.id and request.user.tipo_usuario != 'ADMIN_CHEFE':
+        if request.user.id != usuario.id and not contexto_tenant(request).admin_chefe:
             return Response(
                 {'detail': 'Você não tem permissão para alterar a foto deste usuário.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -1,25 +1,42 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
 from django.utils.html import format_html
-from django.db.models import Sum, Count
-from .models import Cliente, Produto, Venda, ItemVenda
+from .models import Cliente, Produto, Venda, ItemVenda, MovimentoEstoque
+from core.totalizadores import TotalizadoresAdminMixin
+from relatorios.resumo import atualizar_resumo, buckets_do_queryset
+from .autocomplete import invalidar_autocomplete
+from .estoque import EstoqueInsuficiente, baixar_estoque_vendas, devolver_estoque
+from .totais import atualizar_totais_clientes
 
 
 @admin.register(Cliente)
 class ClienteAdmin(admin.ModelAdmin):
-    list_display = ['nome', 'empresa', 'email', 'telefone', 'cidade', 'total_compras', 'status_badge']
+    list_display = [
+        'nome', 'empresa', 'email', 'telefone', 'cidade',
+        'total_vendas', 'valor_total_formatado', 'ticket_medio_formatado', 'ultima_compra',
+        'status_badge'
+    ]
     list_filter = ['ativo', 'empresa', 'estado', 'criado_em']
     search_fields = ['nome', 'email', 'cpf_cnpj']
+    readonly_fields = ['total_vendas', 'valor_total_vendas', 'ticket_medio', 'ultima_compra']
+    list_select_related = ['empresa']
     list_per_page = 50
 
-    def total_compras(self, obj):
-        """Mostra total de compras do cliente"""
-        count = obj.vendas.count()
-        valor = obj.vendas.aggregate(total=Sum('valor_total'))['total'] or 0
+    def valor_total_formatado(self, obj):
+        """Valor total das compras do cliente"""
         return format_html(
-            '<span style="color: #1976d2;">{} vendas | R$ {:,.2f}</span>',
-            count, valor
+            '<span style="color: #1976d2;">R$ {}</span>',
+            f'{obj.valor_total_vendas:,.2f}'
         )
-    total_compras.short_description = 'Total de Compras'
+    valor_total_formatado.short_description = 'Valor Total'
+    valor_total_formatado.admin_order_field = 'valor_total_vendas'
+
+    def ticket_medio_formatado(self, obj):
+        """Ticket médio das compras do cliente"""
+        return format_html('R$ {}', f'{obj.ticket_medio:,.2f}')
+    ticket_medio_formatado.short_description = 'Ticket Médio'
+    ticket_medio_formatado.admin_order_field = 'ticket_medio'
 
     def status_badge(self, obj):
         """Badge de status ativo/inativo"""
@@ -39,12 +56,16 @@ class ClienteAdmin(admin.ModelAdmin):
     actions = ['ativar_clientes', 'desativar_clientes']
 
     def ativar_clientes(self, request, queryset):
+        empresas = set(queryset.values_list('empresa_id', flat=True).distinct())
         updated = queryset.update(ativo=True)
+        invalidar_autocomplete('CLIENTE', empresas)
         self.message_user(request, f'{updated} cliente(s) ativado(s).')
     ativar_clientes.short_description = 'Ativar clientes selecionados'
 
     def desativar_clientes(self, request, queryset):
+        empresas = set(queryset.values_list('empresa_id', flat=True).distinct())
         updated = queryset.update(ativo=False)
+        invalidar_autocomplete('CLIENTE', empresas)
         self.message_user(request, f'{updated} cliente(s) desativado(s).')
     desativar_clientes.short_description = 'Desativar clientes selecionados'
 
@@ -59,8 +80,8 @@ class ProdutoAdmin(admin.ModelAdmin):
     def preco_formatado(self, obj):
         """Formata o preço"""
         return format_html(
-            '<strong style="color: #1976d2;">R$ {:,.2f}</strong>',
-            obj.preco
+            '<strong style="color: #1976d2;">R$ {}</strong>',
+            f'{obj.preco:,.2f}'
         )
     preco_formatado.short_description = 'Preço'
     preco_formatado.admin_order_field = 'preco'
@@ -114,7 +135,7 @@ class ItemVendaInline(admin.TabularInline):
 
 
 @admin.register(Venda)
-class VendaAdmin(admin.ModelAdmin):
+class VendaAdmin(TotalizadoresAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'cliente', 'empresa', 'data_venda', 'qtd_itens',
                     'valor_total_formatado', 'status_badge']
     list_filter = ['status', 'forma_pagamento', 'empresa', 'data_venda', 'criado_em']
@@ -123,19 +144,27 @@ class VendaAdmin(admin.ModelAdmin):
     inlines = [ItemVendaInline]
     readonly_fields = ['criado_em', 'atualizado_em', 'valor_total']
     list_per_page = 50
+    totalizador_campo = 'valor_total'
+    totalizador_status = ['PENDENTE', 'PAGA', 'CANCELADA']
     list_select_related = ['cliente', 'empresa', 'usuario_cadastro']
 
+    def get_queryset(self, request):
+        # Quantidade de itens como subquery (sem GROUP BY na listagem)
+        itens = ItemVenda.objects.filter(venda=OuterRef('pk')).order_by().values('venda')
+        return super().get_queryset(request).annotate(
+            _qtd_itens=Subquery(itens.annotate(total=Count('pk')).values('total'))
+        )
+
     def qtd_itens(self, obj):
         """Mostra quantidade de itens na venda"""
-        total = obj.itens.count()
-        return format_html('<strong>{}</strong> itens', total)
+        return format_html('<strong>{}</strong> itens', obj._qtd_itens or 0)
     qtd_itens.short_description = 'Itens'
 
     def valor_total_formatado(self, obj):
         """Formata o valor total"""
         return format_html(
-            '<strong style="color: #388e3c; font-size: 13px;">R$ {:,.2f}</strong>',
-            obj.valor_total
+            '<strong style="color: #388e3c; font-size: 13px;">R$ {}</strong>',
+            f'{obj.valor_total:,.2f}'
         )
     valor_total_formatado.short_description = 'Valor Total'
     valor_total_formatado.admin_order_field = 'valor_total'
@@ -160,39 +189,62 @@ class VendaAdmin(admin.ModelAdmin):
 
     def marcar_como_paga(self, request, queryset):
         from django.utils import timezone
-        updated = queryset.filter(status='PENDENTE').update(
+        queryset = queryset.filter(status='PENDENTE')
+        buckets = buckets_do_queryset('VENDA', queryset)
+        updated = queryset.update(
             status='PAGA',
             data_pagamento=timezone.now().date()
         )
+        atualizar_resumo('VENDA', buckets)
         self.message_user(request, f'{updated} venda(s) marcada(s) como PAGA.')
     marcar_como_paga.short_description = 'Marcar como PAGA'
 
     def marcar_como_pendente(self, request, queryset):
-        updated = queryset.update(status='PENDENTE', data_pagamento=None)
+        buckets = buckets_do_queryset('VENDA', queryset)
+        clientes = set(queryset.values_list('cliente_id', flat=True))
+        # update() não dispara os signals: vendas canceladas reabertas baixam o estoque aqui
+        reabertas = list(queryset.filter(status='CANCELADA').values_list('pk', flat=True))
+        try:
+            with transaction.atomic():
+                updated = queryset.update(status='PENDENTE', data_pagamento=None)
+                baixar_estoque_vendas(reabertas)
+        except EstoqueInsuficiente as exc:
+            self.message_user(request, str(exc), level=messages.ERROR)
+            return
+        atualizar_resumo('VENDA', buckets)
+        atualizar_totais_clientes(clientes)
         self.message_user(request, f'{updated} venda(s) marcada(s) como PENDENTE.')
     marcar_como_pendente.short_description = 'Marcar como PENDENTE'
 
     def cancelar_vendas(self, request, queryset):
-        updated = queryset.update(status='CANCELADA')
+        buckets = buckets_do_queryset('VENDA', queryset)
+        clientes = set(queryset.values_list('cliente_id', flat=True))
+        canceladas = list(queryset.exclude(status='CANCELADA').values_list('pk', flat=True))
+        with transaction.atomic():
+            updated = queryset.update(status='CANCELADA')
+            devolver_estoque(canceladas)
+        atualizar_resumo('VENDA', buckets)
+        atualizar_totais_clientes(clientes)
         self.message_user(request, f'{updated} venda(s) CANCELADA(S).')
     cancelar_vendas.short_description = 'Cancelar vendas'
 
-    def changelist_view(self, request, extra_context=None):
-        """Adiciona totalizadores"""
-        extra_context = extra_context or {}
-
-        cl = self.get_changelist_instance(request)
-        queryset = cl.get_queryset(request)
 
-        total_geral = queryset.aggregate(total=Sum('valor_total'))['total'] or 0
-        total_pendente = queryset.filter(status='PENDENTE').aggregate(total=Sum('valor_total'))['total'] or 0
-        total_paga = queryset.filter(status='PAGA').aggregate(total=Sum('valor_total'))['total'] or 0
-        total_cancelada = queryset.filter(status='CANCELADA').aggregate(total=Sum('valor_total'))['total'] or 0
+@admin.register(MovimentoEstoque)
+class MovimentoEstoqueAdmin(admin.ModelAdmin):
+    """
+    Consulta do livro de movimentos de estoque. Os movimentos são gravados
+    pelas vendas e pelos ajustes do produto e não devem ser editados.
+    """
+    list_display = ['criado_em', 'produto', 'empresa', 'tipo', 'quantidade', 'venda']
+    list_filter = ['tipo', 'empresa', 'criado_em']
+    search_fields = ['produto__nome', 'produto__codigo']
+    date_hierarchy = 'criado_em'
+    list_select_related = ['produto', 'empresa']
+    raw_id_fields = ['produto', 'venda']
+    list_per_page = 50
 
-        extra_context['total_geral'] = f'R$ {total_geral:,.2f}'
-        extra_context['total_pendente'] = f'R$ {total_pendente:,.2f}'
-        extra_context['total_paga'] = f'R$ {total_paga:,.2f}'
-        extra_context['total_cancelada'] = f'R$ {total_cancelada:,.2f}'
-        extra_context['quantidade'] = queryset.count()
+    def has_add_permission(self, request):
+        return False
 
-        return super().changelist_view(request, extra_context=extra_context)
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,6 @@ class VendasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vendas'
     verbose_name = 'Vendas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,268 @@
+"""
+Autocomplete de clientes e produtos no lançamento de vendas
+(GET /api/vendas/clientes/autocomplete/ e /api/vendas/produtos/autocomplete/).
+
+Cada processo mantém, por empresa, um índice em memória com as palavras
+normalizadas (sem acentos, minúsculas) dos nomes e dos códigos dos
+produtos ativos, em uma lista ordenada. A busca por prefixo é uma busca
+binária seguida da leitura das entradas seguintes até completar o limite,
+então o tempo de resposta não depende do tamanho do cadastro.
+
+O índice de uma empresa é montado com uma consulta na primeira busca e
+atualizado no próprio processo a cada gravação de cliente ou produto (após
+o commit). A versão de cada índice fica no cache: os demais processos
+remontam o índice quando a versão muda; com cache local, ao fim de
+VENDAS_AUTOCOMPLETE_TIMEOUT segundos.
+
+A ETag das respostas é formada pela versão do índice, então só é enviada
+com o cache "default" compartilhado entre os processos: com cache local, um
+worker que não viu a gravação responderia 304 com o cadastro desatualizado.
+"""
+import bisect
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from busca.indice import palavras
+from core.cache import cache_compartilhado
+from usuarios.contexto import contexto_tenant
+from .models import Cliente, Produto
+
+
+# Campos indexados e campos retornados de cada origem
+FONTES_AUTOCOMPLETE = {
+    'CLIENTE': {'model': Cliente, 'campos': ['nome'], 'retorno': ['id', 'nome']},
+    'PRODUTO': {'model': Produto, 'campos': ['nome', 'codigo'], 'retorno': ['id', 'nome', 'codigo', 'preco']},
+}
+ORIGEM_POR_MODEL = {fonte['model']: origem for origem, fonte in FONTES_AUTOCOMPLETE.items()}
+
+_indices = OrderedDict()
+_trava = threading.Lock()
+
+
+def chave_versao(origem, empresa_id):
+    return f'vendas:autocomplete:versao:{origem}:{empresa_id}'
+
+
+def _palavras_registro(origem, valores):
+    resultado = set()
+    for campo in FONTES_AUTOCOMPLETE[origem]['campos']:
+        palavras_campo = palavras(valores[campo])
+        resultado.update(palavras_campo)
+        if campo == 'codigo' and len(palavras_campo) > 1:
+            resultado.add(''.join(palavras_campo))
+    return tuple(sorted(resultado))
+
+
+def _retorno(origem, valores):
+    return tuple(
+        str(valores[campo]) if campo == 'preco' else valores[campo]
+        for campo in FONTES_AUTOCOMPLETE[origem]['retorno']
+    )
+
+
+class IndicePrefixos:
+    """
+    Entradas (palavra, nome normalizado, id) ordenadas de uma empresa e os
+    dados retornados de cada registro.
+    """
+
+    def __init__(self, origem, registros, versao):
+        self.origem = origem
+        self.versao = versao
+        self.montado_em = time.monotonic()
+        self.trava = threading.Lock()
+        self.registros = {}
+        self.entradas = []
+        for valores in registros:
+            self.registros[valores['id']] = self._registro(valores)
+            self.entradas += self._entradas(valores['id'])
+        self.entradas.sort()
+
+    def _registro(self, valores):
+        return (
+            _palavras_registro(self.origem, valores),
+            ' '.join(palavras(valores['nome'])),
+            _retorno(self.origem, valores),
+        )
+
+    def _entradas(self, registro_id):
+        palavras_registro, nome, _ = self.registros[registro_id]
+        return [(palavra, nome, registro_id) for palavra in palavras_registro]
+
+    def atualizar(self, registro_id, valores):
+        """Substitui (ou remove, com valores=None) um registro"""
+        with self.trava:
+            if registro_id in self.registros:
+                for entrada in self._entradas(registro_id):
+                    posicao = bisect.bisect_left(self.entradas, entrada)
+                    if posicao < len(self.entradas) and self.entradas[posicao] == entrada:
+                        del self.entradas[posicao]
+                del self.registros[registro_id]
+            if valores is not None:
+                self.registros[registro_id] = self._registro(valores)
+                for entrada in self._entradas(registro_id):
+                    bisect.insort(self.entradas, entrada)
+
+    def buscar(self, texto, limite):
+        """
+        Registros em que cada palavra do texto é o início de alguma palavra
+        do nome (ou do código), ordenados pela palavra encontrada e pelo nome.
+        """
+        palavras_busca = palavras(texto)
+        if not palavras_busca:
+            return []
+        # A palavra mais longa é a mais seletiva
+        prefixo = max(palavras_busca, key=len)
+        resultado, vistos = [], set()
+        with self.trava:
+            posicao = bisect.bisect_left(self.entradas, (prefixo,))
+            while posicao < len(self.entradas) and len(resultado) < limite:
+                palavra, _, registro_id = self.entradas[posicao]
+                posicao += 1
+                if not palavra.startswith(prefixo):
+                    break
+                if registro_id in vistos:
+                    continue
+                vistos.add(registro_id)
+                palavras_registro, _, retorno = self.registros[registro_id]
+                if all(
+                    any(palavra_registro.startswith(palavra_busca) for palavra_registro in palavras_registro)
+                    for palavra_busca in palavras_busca
+                ):
+                    resultado.append(retorno)
+        return resultado
+
+
+def _versao_atual(origem, empresa_id):
+    versao = cache.get(chave_versao(origem, empresa_id))
+    if versao is None:
+        versao = time.time_ns()
+        cache.set(chave_versao(origem, empresa_id), versao, timeout=None)
+    return versao
+
+
+def obter_indice(origem, empresa_id):
+    """Índice da empresa, montado (ou remontado) se não estiver atualizado"""
+    versao = _versao_atual(origem, empresa_id)
+    chave = (origem, empresa_id)
+    with _trava:
+        indice = _indices.get(chave)
+        if (
+            indice is not None
+            and indice.versao == versao
+            and time.monotonic() - indice.montado_em < settings.VENDAS_AUTOCOMPLETE_TIMEOUT
+        ):
+            _indices.move_to_end(chave)
+            return indice
+
+    fonte = FONTES_AUTOCOMPLETE[origem]
+    registros = fonte['model'].objects.filter(
+        empresa_id=empresa_id, ativo=True
+    ).order_by().values(*{'id', *fonte['campos'], *fonte['retorno']})
+    indice = IndicePrefixos(origem, registros.iterator(chunk_size=5000), versao)
+
+    with _trava:
+        _indices[chave] = indice
+        _indices.move_to_end(chave)
+        while len(_indices) > settings.VENDAS_AUTOCOMPLETE_MAX_INDICES:
+            _indices.popitem(last=False)
+    return indice
+
+
+def registrar_alteracao(objeto, excluido=False):
+    """
+    Aplica a gravação (ou exclusão) de um cliente ou produto ao índice do
+    processo e troca a versão no cache, para os demais processos.
+    """
+    origem = ORIGEM_POR_MODEL[type(objeto)]
+    chave = chave_versao(origem, objeto.empresa_id)
+    nova_versao = time.time_ns()
+
+    with _trava:
+        indice = _indices.get((origem, objeto.empresa_id))
+    if indice is not None and indice.versao == cache.get(chave):
+        fonte = FONTES_AUTOCOMPLETE[origem]
+        valores = None
+        if not excluido and objeto.ativo:
+            valores = {campo: getattr(objeto, campo) for campo in {*fonte['campos'], *fonte['retorno']}}
+        indice.atualizar(objeto.pk, valores)
+        indice.versao = nova_versao
+    cache.set(chave, nova_versao, timeout=None)
+
+
+def invalidar_autocomplete(origem, empresa_ids):
+    """
+    Troca a versão dos índices das empresas. Usado após queryset.update(),
+    que não dispara signals.
+    """
+    nova_versao = time.time_ns()
+    cache.set_many(
+        {chave_versao(origem, empresa_id): nova_versao for empresa_id in empresa_ids}, timeout=None
+    )
+
+
+def autocomplete(origem, empresa_id, texto, limite):
+    """Lista de dicionários com os campos de retorno da origem"""
+    campos = FONTES_AUTOCOMPLETE[origem]['retorno']
+    return [
+        dict(zip(campos, retorno))
+        for retorno in obter_indice(origem, empresa_id).buscar(texto, limite)
+    ]
+
+
+class AutocompleteMixin:
+    """
+    Adiciona ao ViewSet GET .../autocomplete/?q=&limite= (e empresa, para o
+    Admin Chefe), com os registros ativos da empresa cujo nome começa com as
+    palavras buscadas. O ViewSet define `autocomplete_origem`.
+
+    Com cache compartilhado, a resposta traz uma ETag (versão do índice e
+    parâmetros): uma repetição da busca sem alterações no cadastro recebe 304.
+    """
+    autocomplete_origem = None
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        contexto = contexto_tenant(request)
+        empresa_id = contexto.empresa_id
+        if contexto.admin_chefe:
+            empresa_id = request.query_params.get('empresa') or empresa_id
+            if not empresa_id:
+                return Response({'error': 'empresa e obrigatorio'}, status=400)
+            try:
+                empresa_id = int(empresa_id)
+            except (TypeError, ValueError):
+                return Response({'error': 'empresa invalida'}, status=400)
+
+        try:
+            limite = int(request.query_params.get('limite', settings.VENDAS_AUTOCOMPLETE_LIMITE))
+        except ValueError:
+            return Response({'error': 'limite invalido'}, status=400)
+        if limite < 1:
+            return Response({'error': 'limite invalido'}, status=400)
+        limite = min(limite, settings.VENDAS_AUTOCOMPLETE_LIMITE_MAXIMO)
+        texto = request.query_params.get('q', '')
+
+        etag = resposta = None
+        if cache_compartilhado():
+            assinatura = repr((
+                self.autocomplete_origem, empresa_id, _versao_atual(self.autocomplete_origem, empresa_id),
+                texto, limite,
+            )).encode()
+            etag = f'"{hashlib.md5(assinatura).hexdigest()}"'
+            resposta = get_conditional_response(request, etag=etag)
+        if resposta is None:
+            resposta = Response(autocomplete(self.autocomplete_origem, empresa_id, texto, limite))
+        if etag:
+            resposta['ETag'] = etag
+        patch_cache_control(resposta, private=True, no_cache=True)
+        patch_vary_headers(resposta, ['Authorization'])
+        return resposta
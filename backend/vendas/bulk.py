@@ -0,0 +1,176 @@
+"""
+Criação de vendas em lote (POST /api/vendas/bulk/).
+
+Todas as linhas são validadas antes de qualquer gravação: campos pelo
+VendaBulkSerializer e empresa, cliente e produtos com duas consultas para o
+lote inteiro. Com alguma linha inválida nada é gravado e os erros são
+devolvidos por linha. Com o lote válido, vendas e itens são inseridos em
+uma única transação, o estoque é baixado com um único UPDATE para o lote e
+o resumo mensal é atualizado uma vez por mês afetado.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from busca.indice import indexar
+from relatorios.resumo import atualizar_resumo
+from .estoque import EstoqueInsuficiente, baixar_estoque
+from .models import Cliente, Produto, Venda, ItemVenda
+from .serializers import VendaBulkSerializer
+from .totais import atualizar_totais_clientes
+
+
+TAMANHO_LOTE = 1000
+
+# valor_total é DecimalField(max_digits=10, decimal_places=2)
+VALOR_TOTAL_MAXIMO = Decimal('99999999.99')
+
+
+def criar_vendas_em_lote(linhas, usuario):
+    """
+    Valida e grava as vendas. Retorna (vendas, erros): a lista das vendas
+    criadas ou a lista de erros no formato {'indice': n, 'erros': {...}}.
+    """
+    # Uma única instância do serializer valida todas as linhas, como o
+    # ListSerializer faz com o child, sem reconstruir os campos por linha
+    validador = VendaBulkSerializer()
+    dados_validos, erros = {}, {}
+    for indice, linha in enumerate(linhas):
+        try:
+            dados_validos[indice] = dict(validador.run_validation(linha))
+        except ValidationError as exc:
+            erros[indice] = exc.detail
+
+    erros_relacoes = _validar_relacoes(dados_validos, usuario)
+    for indice, erro in erros_relacoes.items():
+        erros.setdefault(indice, {}).update(erro)
+
+    if erros:
+        return [], [{'indice': indice, 'erros': erros[indice]} for indice in sorted(erros)]
+
+    vendas, itens = [], []
+    for indice in sorted(dados_validos):
+        dados = dict(dados_validos[indice])
+        itens_venda = dados.pop('itens')
+        dados['empresa_id'] = dados.pop('empresa')
+        dados['cliente_id'] = dados.pop('cliente')
+        venda = Venda(
+            usuario_cadastro=usuario,
+            valor_total=sum(item['quantidade'] * item['preco_unitario'] for item in itens_venda),
+            **dados
+        )
+        vendas.append(venda)
+        itens.append(itens_venda)
+
+    try:
+        with transaction.atomic():
+            _gravar(vendas, itens)
+    except EstoqueInsuficiente as exc:
+        # A baixa é feita para o lote inteiro: aponta as linhas com os produtos em falta
+        faltantes = {produto.pk: produto.nome for produto in exc.produtos}
+        erros = []
+        for indice in sorted(dados_validos):
+            nomes = sorted({
+                faltantes[item['produto']] for item in dados_validos[indice]['itens']
+                if item['produto'] in faltantes
+            })
+            if nomes:
+                erros.append({'indice': indice, 'erros': {'itens': [f"Estoque insuficiente: {', '.join(nomes)}"]}})
+        return [], erros
+
+    return vendas, []
+
+
+def _gravar(vendas, itens):
+    """
+    Insere vendas e itens, baixa o estoque e atualiza o resumo mensal, os
+    totais dos clientes e o índice de busca
+    """
+    _inserir_vendas(vendas)
+    itens_venda = ItemVenda.objects.bulk_create(
+        [
+            ItemVenda(
+                venda=venda,
+                produto_id=item['produto'],
+                quantidade=item['quantidade'],
+                preco_unitario=item['preco_unitario'],
+            )
+            for venda, itens_da_venda in zip(vendas, itens)
+            for item in itens_da_venda
+        ],
+        batch_size=TAMANHO_LOTE,
+    )
+    baixar_estoque([item for item in itens_venda if item.venda.status != 'CANCELADA'])
+    atualizar_resumo('VENDA', {(venda.empresa_id, venda.data_venda) for venda in vendas})
+    atualizar_totais_clientes({venda.cliente_id for venda in vendas})
+    indexar('VENDA', [venda for venda in vendas if venda.observacoes])
+
+
+def _validar_relacoes(dados_validos, usuario):
+    """
+    Confere empresa, cliente e produtos de todas as linhas com uma consulta
+    por model. Usuários que não são Admin Chefe só gravam na própria empresa.
+    """
+    chefe = usuario.tipo_usuario == 'ADMIN_CHEFE'
+    clientes = dict(Cliente.objects.filter(
+        id__in={dados['cliente'] for dados in dados_validos.values()}
+    ).values_list('id', 'empresa_id'))
+    produtos = dict(Produto.objects.filter(
+        id__in={item['produto'] for dados in dados_validos.values() for item in dados['itens']}
+    ).values_list('id', 'empresa_id'))
+
+    erros = {}
+    for indice, dados in dados_validos.items():
+        erro = {}
+        empresa_id = dados.get('empresa')
+        if empresa_id is None:
+            if chefe:
+                erro['empresa'] = ['Este campo é obrigatório.']
+            empresa_id = usuario.empresa_id
+        elif not chefe and empresa_id != usuario.empresa_id:
+            erro['empresa'] = ['Empresa inválida para o usuário.']
+        dados['empresa'] = empresa_id
+
+        if clientes.get(dados['cliente']) != empresa_id:
+            erro['cliente'] = ['Cliente não encontrado nesta empresa.']
+
+        erros_itens = [
+            {'produto': ['Produto não encontrado nesta empresa.']}
+            if produtos.get(item['produto']) != empresa_id else {}
+            for item in dados['itens']
+        ]
+        if any(erros_itens):
+            erro['itens'] = erros_itens
+
+        valor_total = sum(item['quantidade'] * item['preco_unitario'] for item in dados['itens'])
+        if valor_total > VALOR_TOTAL_MAXIMO:
+            erro['valor_total'] = ['Valor total da venda excede o limite.']
+
+        if erro:
+            erros[indice] = erro
+    return erros
+
+
+def _inserir_vendas(vendas):
+    """
+    Insere as vendas com INSERTs em lote preenchendo os ids, usados pelos
+    itens. Bancos que retornam as linhas de um INSERT em lote (PostgreSQL,
+    SQLite, MariaDB) preenchem os ids no próprio bulk_create. O MySQL não
+    retorna os ids de um INSERT com várias linhas: as vendas são gravadas
+    com um mesmo lote e os ids são lidos de volta em ordem crescente, que é
+    a ordem em que o auto incremento os atribui às linhas dos INSERTs (em
+    qualquer innodb_autoinc_lock_mode, os ids de uma mesma instrução são
+    crescentes, ainda que não consecutivos).
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        Venda.objects.bulk_create(vendas, batch_size=TAMANHO_LOTE)
+        return
+    lote = uuid.uuid4()
+    for venda in vendas:
+        venda.lote = lote
+    Venda.objects.bulk_create(vendas, batch_size=TAMANHO_LOTE)
+    ids = Venda.objects.filter(lote=lote).order_by('pk').values_list('pk', flat=True)
+    for venda, pk in zip(vendas, ids):
+        venda.pk = pk
@@ -0,0 +1,163 @@
+"""
+Baixa e devolução de estoque das vendas e compactação do livro de movimentos.
+
+A baixa de um lote de vendas é um único UPDATE com
+estoque = estoque - CASE id WHEN ... END sobre os produtos do lote: o banco
+aplica a subtração sobre o valor atual de cada linha, então vendas
+simultâneas nunca perdem baixas umas das outras, sem SELECT ... FOR UPDATE.
+Com VENDAS_BLOQUEAR_ESTOQUE_INSUFICIENTE, os produtos são travados com
+SELECT ... FOR UPDATE antes da conferência do saldo, que assim não muda até
+o UPDATE. Os produtos são lidos e atualizados na ordem da chave primária, o
+que evita deadlocks entre lotes com produtos em comum.
+
+O estoque fica baixado enquanto a venda não está cancelada: cancelar ou
+excluir uma venda devolve os itens (movimento ESTORNO) e reabrir uma venda
+cancelada baixa os itens de novo (ver vendas/signals.py).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from .models import ItemVenda, MovimentoEstoque, Produto
+
+
+class EstoqueInsuficiente(Exception):
+    """Lançada quando VENDAS_BLOQUEAR_ESTOQUE_INSUFICIENTE está ativo"""
+
+    def __init__(self, produtos):
+        self.produtos = produtos
+        nomes = ', '.join(produto.nome for produto in produtos)
+        super().__init__(f'Estoque insuficiente: {nomes}')
+
+
+def _somar_por_produto(itens):
+    quantidades = defaultdict(int)
+    for item in itens:
+        quantidades[item.produto_id] += item.quantidade
+    return quantidades
+
+
+def _quantidade_por_produto(quantidades):
+    """CASE id WHEN produto THEN quantidade ... END"""
+    return Case(
+        *[When(pk=produto_id, then=Value(quantidade)) for produto_id, quantidade in quantidades.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def baixar_estoque(itens):
+    """
+    Baixa o estoque dos itens (ItemVenda já gravados, com venda) e registra
+    uma saída por item no livro de movimentos. Deve ser chamada dentro da
+    transação que grava as vendas.
+    """
+    quantidades = _somar_por_produto(itens)
+    if not quantidades:
+        return
+    produtos = Produto.objects.filter(pk__in=quantidades)
+
+    with transaction.atomic():
+        if settings.VENDAS_BLOQUEAR_ESTOQUE_INSUFICIENTE:
+            travados = produtos.select_for_update().order_by('pk').only('pk', 'nome', 'estoque')
+            faltantes = [produto for produto in travados if produto.estoque < quantidades[produto.pk]]
+            if faltantes:
+                raise EstoqueInsuficiente(faltantes)
+
+        produtos.update(
+            estoque=F('estoque') - _quantidade_por_produto(quantidades),
+            atualizado_em=timezone.now(),
+        )
+        MovimentoEstoque.objects.bulk_create([
+            MovimentoEstoque(
+                empresa_id=item.venda.empresa_id,
+                produto_id=item.produto_id,
+                venda_id=item.venda_id,
+                tipo='VENDA',
+                quantidade=-item.quantidade,
+            )
+            for item in itens
+        ], batch_size=1000)
+
+
+def baixar_estoque_vendas(venda_ids):
+    """Baixa o estoque de todos os itens das vendas (venda cancelada reaberta)"""
+    baixar_estoque(list(ItemVenda.objects.filter(venda_id__in=venda_ids).select_related('venda')))
+
+
+def devolver_estoque(venda_ids):
+    """
+    Devolve ao estoque os itens das vendas (canceladas ou excluídas) com um
+    único UPDATE e registra uma entrada ESTORNO por item no livro de
+    movimentos.
+    """
+    itens = list(ItemVenda.objects.filter(venda_id__in=venda_ids).select_related('venda'))
+    quantidades = _somar_por_produto(itens)
+    if not quantidades:
+        return
+
+    with transaction.atomic():
+        Produto.objects.filter(pk__in=quantidades).update(
+            estoque=F('estoque') + _quantidade_por_produto(quantidades),
+            atualizado_em=timezone.now(),
+        )
+        MovimentoEstoque.objects.bulk_create([
+            MovimentoEstoque(
+                empresa_id=item.venda.empresa_id,
+                produto_id=item.produto_id,
+                venda_id=item.venda_id,
+                tipo='ESTORNO',
+                quantidade=item.quantidade,
+            )
+            for item in itens
+        ], batch_size=1000)
+
+
+def compactar_movimentos(data_corte, empresa_ids=None):
+    """
+    Substitui os movimentos anteriores a data_corte por um movimento SALDO
+    por produto, com a soma das quantidades e a data de corte. Os
+    movimentos posteriores não são tocados, então vendas gravadas durante a
+    compactação continuam no livro. Retorna (removidos, saldos gravados).
+    """
+    movimentos = MovimentoEstoque.objects.filter(criado_em__lt=data_corte)
+    if empresa_ids:
+        movimentos = movimentos.filter(empresa_id__in=empresa_ids)
+
+    with transaction.atomic():
+        saldos = list(
+            movimentos.values('empresa_id', 'produto_id')
+            .annotate(total=Sum('quantidade'))
+            .order_by('produto_id')
+        )
+        removidos, _ = movimentos.delete()
+        MovimentoEstoque.objects.bulk_create([
+            MovimentoEstoque(
+                empresa_id=saldo['empresa_id'],
+                produto_id=saldo['produto_id'],
+                tipo='SALDO',
+                quantidade=saldo['total'],
+                criado_em=data_corte,
+            )
+            for saldo in saldos
+        ], batch_size=1000)
+
+    return removidos, len(saldos)
+
+
+def divergencias_estoque(empresa_ids=None):
+    """
+    Produtos cujo estoque difere da soma do livro de movimentos:
+    lista de (produto, saldo do livro).
+    """
+    produtos = Produto.objects.annotate(saldo_livro=Sum('movimentos_estoque__quantidade'))
+    if empresa_ids:
+        produtos = produtos.filter(empresa_id__in=empresa_ids)
+    return [
+        (produto, produto.saldo_livro or 0)
+        for produto in produtos.order_by('pk')
+        if produto.estoque != (produto.saldo_livro or 0)
+    ]
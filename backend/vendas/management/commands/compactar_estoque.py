@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from vendas.estoque import compactar_movimentos, divergencias_estoque
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacta o livro de movimentos de estoque: os movimentos anteriores ao corte '
+        'sao substituidos por um movimento de saldo por produto. Execute periodicamente (ex.: cron diario)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=30,
+            help='Mantem os movimentos dos ultimos N dias sem compactar. Padrao: 30'
+        )
+        parser.add_argument(
+            '--empresa',
+            action='append',
+            type=int,
+            help='ID da empresa a compactar (pode ser repetido). Padrao: todas'
+        )
+
+    def handle(self, *args, **options):
+        data_corte = timezone.now() - timedelta(days=options['dias'])
+        self.stdout.write(f'Compactando movimentos anteriores a {data_corte:%Y-%m-%d %H:%M}...')
+
+        removidos, saldos = compactar_movimentos(data_corte, empresa_ids=options['empresa'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{removidos} movimentos substituidos por {saldos} saldos.'
+        ))
+
+        divergencias = divergencias_estoque(empresa_ids=options['empresa'])
+        for produto, saldo_livro in divergencias:
+            self.stdout.write(self.style.WARNING(
+                f'Produto {produto.pk} ({produto.nome}): estoque {produto.estoque}, livro {saldo_livro}'
+            ))
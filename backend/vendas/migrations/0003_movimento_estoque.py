@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 05:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('vendas', '0002_add_chargeback_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimentoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('SALDO', 'Saldo'), ('VENDA', 'Venda'), ('AJUSTE', 'Ajuste')], max_length=10, verbose_name='Tipo')),
+                ('quantidade', models.IntegerField(help_text='Positiva para entradas, negativa para saídas', verbose_name='Quantidade')),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos_estoque', to='empresas.empresa', verbose_name='Empresa')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos_estoque', to='vendas.produto', verbose_name='Produto')),
+                ('venda', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos_estoque', to='vendas.venda', verbose_name='Venda')),
+            ],
+            options={
+                'verbose_name': 'Movimento de Estoque',
+                'verbose_name_plural': 'Movimentos de Estoque',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['produto', 'criado_em'], name='vendas_movi_produto_a8b4a3_idx'), models.Index(fields=['criado_em'], name='vendas_movi_criado__1dfffd_idx')],
+            },
+        ),
+    ]
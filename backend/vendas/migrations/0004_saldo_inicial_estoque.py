@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def registrar_saldo_inicial(apps, schema_editor):
+    """Abre o livro de movimentos com o estoque atual de cada produto"""
+    Produto = apps.get_model('vendas', 'Produto')
+    MovimentoEstoque = apps.get_model('vendas', 'MovimentoEstoque')
+
+    MovimentoEstoque.objects.bulk_create(
+        (
+            MovimentoEstoque(
+                empresa_id=empresa_id,
+                produto_id=produto_id,
+                tipo='SALDO',
+                quantidade=estoque,
+            )
+            for produto_id, empresa_id, estoque in Produto.objects.exclude(
+                estoque=0
+            ).values_list('id', 'empresa_id', 'estoque').iterator()
+        ),
+        batch_size=1000
+    )
+
+
+def remover_movimentos(apps, schema_editor):
+    apps.get_model('vendas', 'MovimentoEstoque').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas', '0003_movimento_estoque'),
+    ]
+
+    operations = [
+        migrations.RunPython(registrar_saldo_inicial, remover_movimentos),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 05:56
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas', '0004_saldo_inicial_estoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='ticket_medio',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Ticket Médio'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_vendas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Vendas'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='ultima_compra',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Última Compra'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='valor_total_vendas',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='Valor Total de Vendas'),
+        ),
+    ]
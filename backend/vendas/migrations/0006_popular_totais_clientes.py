@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import (
+    Avg, Count, DateField, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce
+
+
+def popular_totais(apps, schema_editor):
+    """Calcula os totais de compras dos clientes já existentes"""
+    Cliente = apps.get_model('vendas', 'Cliente')
+    Venda = apps.get_model('vendas', 'Venda')
+
+    vendas = Venda.objects.filter(
+        cliente=OuterRef('pk')
+    ).exclude(status='CANCELADA').order_by().values('cliente')
+    valor_final = F('valor_total') - F('desconto')
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+
+    def agregado(expressao, output_field):
+        return Subquery(vendas.annotate(valor=expressao).values('valor'), output_field=output_field)
+
+    Cliente.objects.update(
+        total_vendas=Coalesce(agregado(Count('pk'), IntegerField()), Value(0)),
+        valor_total_vendas=Coalesce(
+            agregado(Sum(valor_final, output_field=decimal), decimal), Value(Decimal('0.00'))
+        ),
+        ticket_medio=Coalesce(
+            agregado(Avg(valor_final, output_field=decimal), decimal), Value(Decimal('0.00'))
+        ),
+        ultima_compra=agregado(Max('data_venda'), DateField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas', '0005_totais_clientes'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_totais, migrations.RunPython.noop),
+    ]
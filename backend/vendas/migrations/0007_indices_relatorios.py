@@ -0,0 +1,24 @@
+# Generated by Django 5.0 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('vendas', '0006_popular_totais_clientes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venda',
+            index=models.Index(fields=['empresa', 'status', 'data_venda', 'valor_total', 'desconto'], name='vendas_vend_empresa_c13d2c_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='venda',
+            name='vendas_vend_empresa_79a57e_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas', '0007_indices_relatorios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venda',
+            name='lote',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True, verbose_name='Lote'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas', '0008_venda_lote'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimentoestoque',
+            name='tipo',
+            field=models.CharField(choices=[('SALDO', 'Saldo'), ('VENDA', 'Venda'), ('ESTORNO', 'Estorno de venda'), ('AJUSTE', 'Ajuste')], max_length=10, verbose_name='Tipo'),
+        ),
+    ]
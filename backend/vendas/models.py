@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
 
@@ -26,9 +27,30 @@ class Cliente(models.Model):
     observacoes = models.TextField(blank=True, verbose_name='Observações')
     ativo = models.BooleanField(default=True, verbose_name='Ativo')
 
+    # Totais das compras (vendas não canceladas), mantidos a cada gravação
+    # de venda por vendas.totais.atualizar_totais_clientes
+    total_vendas = models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Vendas')
+    valor_total_vendas = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name='Valor Total de Vendas'
+    )
+    ticket_medio = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name='Ticket Médio'
+    )
+    ultima_compra = models.DateField(null=True, blank=True, editable=False, verbose_name='Última Compra')
+
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    CAMPOS_TOTAIS = ['total_vendas', 'valor_total_vendas', 'ticket_medio', 'ultima_compra']
+
     class Meta:
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
@@ -40,6 +62,19 @@ class Cliente(models.Model):
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        """
+        Os totais de compras não são regravados ao salvar o cliente: são
+        atualizados apenas pelas vendas, e um save() com valores lidos antes
+        de uma venda simultânea desfaria a atualização.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_TOTAIS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Produto(models.Model):
     """
@@ -85,6 +120,47 @@ class Produto(models.Model):
     def __str__(self):
         return f"{self.nome} - R$ {self.preco}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        produto = super().from_db(db, field_names, values)
+        produto._estoque_carregado = produto.__dict__.get('estoque')
+        return produto
+
+    def save(self, *args, **kwargs):
+        """
+        O estoque é baixado pelas vendas com UPDATE atômico (ver
+        vendas/estoque.py). Ao salvar um produto já existente, o estoque não
+        é regravado com o valor lido: uma alteração é aplicada como ajuste
+        relativo (estoque + diferença) e registrada no livro de movimentos,
+        sem desfazer baixas feitas por vendas simultâneas.
+        """
+        carregado = getattr(self, '_estoque_carregado', None)
+        if self._state.adding or carregado is None or kwargs.get('update_fields') is not None:
+            novo = self._state.adding
+            super().save(*args, **kwargs)
+            if novo and self.estoque:
+                MovimentoEstoque.objects.create(
+                    produto=self, empresa_id=self.empresa_id,
+                    tipo='SALDO', quantidade=self.estoque
+                )
+            self._estoque_carregado = self.estoque
+            return
+
+        diferenca = self.estoque - carregado
+        kwargs['update_fields'] = [
+            campo.name for campo in self._meta.concrete_fields
+            if not campo.primary_key and campo.name != 'estoque'
+        ]
+        super().save(*args, **kwargs)
+        if diferenca:
+            Produto.objects.filter(pk=self.pk).update(estoque=models.F('estoque') + diferenca)
+            MovimentoEstoque.objects.create(
+                produto=self, empresa_id=self.empresa_id,
+                tipo='AJUSTE', quantidade=diferenca
+            )
+            self.estoque = Produto.objects.values_list('estoque', flat=True).get(pk=self.pk)
+        self._estoque_carregado = self.estoque
+
 
 class Venda(models.Model):
     """
@@ -178,6 +254,10 @@ class Venda(models.Model):
         verbose_name='Usuário Cadastro'
     )
 
+    # Lote de POST /api/vendas/bulk/: no MySQL, que não retorna os ids de
+    # um INSERT com várias linhas, os ids são lidos de volta pelo lote
+    lote = models.UUIDField(null=True, blank=True, editable=False, db_index=True, verbose_name='Lote')
+
     criado_em = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
     atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
 
@@ -187,7 +267,10 @@ class Venda(models.Model):
         ordering = ['-data_venda']
         indexes = [
             models.Index(fields=['empresa', 'data_venda']),
-            models.Index(fields=['empresa', 'status']),
+            # Relatórios: empresa + status + período, somando valor_total e
+            # desconto sem ler as linhas da tabela (índice de cobertura). Começa
+            # por (empresa, status), então também atende os filtros só por eles
+            models.Index(fields=['empresa', 'status', 'data_venda', 'valor_total', 'desconto']),
         ]
 
     def __str__(self):
@@ -245,3 +328,62 @@ class ItemVenda(models.Model):
     def subtotal(self):
         """Calcula o subtotal do item"""
         return self.quantidade * self.preco_unitario
+
+
+class MovimentoEstoque(models.Model):
+    """
+    Livro de movimentos de estoque (somente inclusão). Cada venda registra
+    uma saída por item, o cancelamento ou a exclusão da venda um estorno por
+    item e cada alteração manual do estoque um ajuste. O saldo
+    de um produto é a soma das quantidades; o comando compactar_estoque
+    substitui os movimentos antigos por um movimento SALDO por produto.
+    """
+    TIPO_CHOICES = [
+        ('SALDO', 'Saldo'),
+        ('VENDA', 'Venda'),
+        ('ESTORNO', 'Estorno de venda'),
+        ('AJUSTE', 'Ajuste'),
+    ]
+
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='movimentos_estoque',
+        verbose_name='Empresa'
+    )
+
+    produto = models.ForeignKey(
+        Produto,
+        on_delete=models.CASCADE,
+        related_name='movimentos_estoque',
+        verbose_name='Produto'
+    )
+
+    venda = models.ForeignKey(
+        Venda,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimentos_estoque',
+        verbose_name='Venda'
+    )
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, verbose_name='Tipo')
+    quantidade = models.IntegerField(
+        verbose_name='Quantidade',
+        help_text='Positiva para entradas, negativa para saídas'
+    )
+    # Não usa auto_now_add: a compactação grava o saldo com a data de corte
+    criado_em = models.DateTimeField(default=timezone.now, verbose_name='Criado em')
+
+    class Meta:
+        verbose_name = 'Movimento de Estoque'
+        verbose_name_plural = 'Movimentos de Estoque'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['produto', 'criado_em']),
+            models.Index(fields=['criado_em']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.quantidade:+d} - {self.produto_id}"
@@ -1,21 +1,45 @@
+from django.db import transaction
 from rest_framework import serializers
+from core.campos import CamposDinamicosMixin
+from .estoque import EstoqueInsuficiente, baixar_estoque
 from .models import Cliente, Produto, Venda, ItemVenda
 
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Cliente
         fields = '__all__'
         read_only_fields = ['criado_em', 'atualizado_em']
 
 
-class ProdutoSerializer(serializers.ModelSerializer):
+class ClienteListSerializer(serializers.ModelSerializer):
+    """
+    Serializer compacto para a listagem de clientes.
+    """
+    class Meta:
+        model = Cliente
+        fields = [
+            'id', 'empresa', 'nome', 'email', 'telefone', 'cidade', 'estado', 'ativo',
+            'total_vendas', 'valor_total_vendas', 'ticket_medio', 'ultima_compra'
+        ]
+
+
+class ProdutoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Produto
         fields = '__all__'
         read_only_fields = ['criado_em', 'atualizado_em']
 
 
+class ProdutoListSerializer(serializers.ModelSerializer):
+    """
+    Serializer compacto para a listagem de produtos.
+    """
+    class Meta:
+        model = Produto
+        fields = ['id', 'empresa', 'nome', 'codigo', 'descricao', 'preco', 'estoque', 'ativo']
+
+
 class ItemVendaSerializer(serializers.ModelSerializer):
     produto_nome = serializers.CharField(source='produto.nome', read_only=True)
     subtotal = serializers.ReadOnlyField()
@@ -25,7 +49,7 @@ class ItemVendaSerializer(serializers.ModelSerializer):
         fields = ['id', 'produto', 'produto_nome', 'quantidade', 'preco_unitario', 'subtotal']
 
 
-class VendaSerializer(serializers.ModelSerializer):
+class VendaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
     usuario_cadastro_nome = serializers.CharField(source='usuario_cadastro.get_full_name', read_only=True)
     valor_final = serializers.ReadOnlyField()
@@ -34,13 +58,43 @@ class VendaSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Venda
-        fields = '__all__'
+        exclude = ['lote']
         read_only_fields = ['usuario_cadastro', 'criado_em', 'atualizado_em']
+        campos_dependentes = {
+            'valor_final': ['valor_total', 'desconto'],
+            'receita_liquida': ['valor_total', 'desconto', 'chargeback', 'reversao_chargeback'],
+        }
 
     def create(self, validated_data):
         validated_data['usuario_cadastro'] = self.context['request'].user
         return super().create(validated_data)
 
+    def update(self, instance, validated_data):
+        # Reabrir uma venda cancelada baixa o estoque de novo (vendas/signals.py)
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except EstoqueInsuficiente as exc:
+            raise serializers.ValidationError({'status': [str(exc)]})
+
+
+class VendaListSerializer(serializers.ModelSerializer):
+    """
+    Serializer compacto para a listagem de vendas (sem itens e observações).
+    """
+    cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
+    valor_final = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Venda
+        fields = [
+            'id', 'empresa', 'cliente', 'cliente_nome', 'data_venda', 'data_pagamento',
+            'valor_total', 'desconto', 'valor_final', 'forma_pagamento', 'status'
+        ]
+        campos_dependentes = {
+            'valor_final': ['valor_total', 'desconto'],
+        }
+
 
 class VendaCreateSerializer(serializers.ModelSerializer):
     itens = ItemVendaSerializer(many=True)
@@ -57,10 +111,43 @@ class VendaCreateSerializer(serializers.ModelSerializer):
         valor_total = sum(item['quantidade'] * item['preco_unitario'] for item in itens_data)
         validated_data['valor_total'] = valor_total
 
-        venda = Venda.objects.create(**validated_data)
+        with transaction.atomic():
+            venda = Venda.objects.create(**validated_data)
 
-        # Cria itens
-        for item_data in itens_data:
-            ItemVenda.objects.create(venda=venda, **item_data)
+            # Cria itens e baixa o estoque (venda cancelada não baixa)
+            itens = ItemVenda.objects.bulk_create([
+                ItemVenda(venda=venda, **item_data) for item_data in itens_data
+            ])
+            if venda.status != 'CANCELADA':
+                try:
+                    baixar_estoque(itens)
+                except EstoqueInsuficiente as exc:
+                    raise serializers.ValidationError({'itens': [str(exc)]})
 
         return venda
+
+
+class ItemVendaBulkSerializer(serializers.ModelSerializer):
+    # O produto é validado em lote (ver vendas/bulk.py), sem uma consulta por item
+    produto = serializers.IntegerField()
+
+    class Meta:
+        model = ItemVenda
+        fields = ['produto', 'quantidade', 'preco_unitario']
+
+
+class VendaBulkSerializer(serializers.ModelSerializer):
+    """
+    Validação de cada linha de /api/vendas/bulk/. Empresa, cliente e
+    produtos são conferidos em lote por vendas.bulk.criar_vendas_em_lote.
+    """
+    empresa = serializers.IntegerField(required=False)
+    cliente = serializers.IntegerField()
+    itens = ItemVendaBulkSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = Venda
+        fields = [
+            'empresa', 'cliente', 'data_venda', 'data_pagamento', 'desconto', 'chargeback',
+            'reversao_chargeback', 'forma_pagamento', 'status', 'observacoes', 'itens'
+        ]
@@ -0,0 +1,88 @@
+"""
+Signals que mantêm os totais de compras dos clientes, o estoque dos
+produtos e o autocomplete de clientes e produtos atualizados.
+
+A cada gravação ou exclusão de Venda, apenas o cliente da venda (e, em uma
+troca de cliente, o anterior) é recalculado. Cancelar ou excluir uma venda
+devolve os itens ao estoque, e reabrir uma venda cancelada os baixa de novo
+(ver vendas/estoque.py). A cada gravação ou exclusão de Cliente ou Produto,
+o registro é atualizado no índice do autocomplete depois do commit.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from relatorios.signals import sinais_suspensos
+from .autocomplete import registrar_alteracao
+from .estoque import baixar_estoque_vendas, devolver_estoque
+from .models import Cliente, Produto, Venda
+from .totais import atualizar_totais_clientes
+
+
+# Campos que alteram o autocomplete (além dos campos indexados e retornados)
+CAMPOS_AUTOCOMPLETE = {'empresa', 'empresa_id', 'nome', 'codigo', 'preco', 'ativo'}
+
+
+@receiver(pre_save, sender=Venda)
+def guardar_cliente_anterior(sender, instance, **kwargs):
+    """Guarda o cliente e o status gravados antes da alteração"""
+    instance._cliente_anterior = instance._status_anterior = None
+    if instance.pk:
+        instance._cliente_anterior, instance._status_anterior = Venda.objects.filter(
+            pk=instance.pk
+        ).values_list('cliente_id', 'status').first() or (None, None)
+
+
+@receiver(post_save, sender=Venda)
+def movimentar_estoque_apos_salvar(sender, instance, created=False, raw=False, **kwargs):
+    """Cancelamento devolve os itens ao estoque; reabertura de venda cancelada os baixa"""
+    anterior = getattr(instance, '_status_anterior', None)
+    if raw or created or anterior is None or anterior == instance.status:
+        return
+    if instance.status == 'CANCELADA':
+        devolver_estoque([instance.pk])
+    elif anterior == 'CANCELADA':
+        baixar_estoque_vendas([instance.pk])
+
+
+@receiver(pre_delete, sender=Venda)
+def devolver_estoque_antes_de_excluir(sender, instance, **kwargs):
+    """Os itens ainda existem antes da exclusão em cascata"""
+    if instance.status != 'CANCELADA':
+        devolver_estoque([instance.pk])
+
+
+@receiver(post_save, sender=Venda)
+def atualizar_totais_apos_salvar(sender, instance, raw=False, **kwargs):
+    if raw or sinais_suspensos():
+        return
+    clientes = {instance.cliente_id}
+    anterior = getattr(instance, '_cliente_anterior', None)
+    if anterior:
+        clientes.add(anterior)
+    atualizar_totais_clientes(clientes)
+
+
+@receiver(post_delete, sender=Venda)
+def atualizar_totais_apos_excluir(sender, instance, **kwargs):
+    if sinais_suspensos():
+        return
+    atualizar_totais_clientes({instance.cliente_id})
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Produto)
+def atualizar_autocomplete_apos_salvar(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields and not set(update_fields) & CAMPOS_AUTOCOMPLETE:
+        return
+    transaction.on_commit(partial(registrar_alteracao, instance))
+
+
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Produto)
+def atualizar_autocomplete_apos_excluir(sender, instance, **kwargs):
+    transaction.on_commit(partial(registrar_alteracao, instance, excluido=True))
@@ -0,0 +1,450 @@
+import csv
+import io
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.fabricas import (
+    cliente_api, criar_chefe, criar_cliente, criar_empresa, criar_produto, criar_usuario, criar_venda,
+)
+from .estoque import divergencias_estoque
+from .models import ItemVenda, MovimentoEstoque, Venda
+from .views import VendaViewSet
+
+
+class ListagemVendasConsultasTest(TestCase):
+    """A página da listagem de vendas custa o mesmo número de consultas com poucas ou muitas vendas"""
+
+    URL_COMPLETA = '/api/vendas/?fields=id,cliente_nome,usuario_cadastro_nome,itens'
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        self.produtos = [criar_produto(self.empresa, nome=f'Produto {n}') for n in range(3)]
+
+    def criar_vendas(self, quantidade):
+        for numero in range(quantidade):
+            cliente = criar_cliente(self.empresa, nome=f'Cliente {numero}')
+            criar_venda(self.empresa, cliente, self.usuario, itens=[(produto, 1) for produto in self.produtos])
+
+    def test_listagem_compacta(self):
+        self.criar_vendas(2)
+        # COUNT da paginação + página com cliente (select_related)
+        with self.assertNumQueries(2):
+            resposta = self.api.get('/api/vendas/')
+        self.assertEqual(resposta.status_code, 200)
+
+        self.criar_vendas(20)
+        with self.assertNumQueries(2):
+            resposta = self.api.get('/api/vendas/')
+        self.assertEqual(resposta.data['count'], 22)
+
+    def test_listagem_com_itens(self):
+        self.criar_vendas(2)
+        # COUNT + página (cliente e usuário) + itens com produto (prefetch)
+        with self.assertNumQueries(3):
+            resposta = self.api.get(self.URL_COMPLETA)
+        self.assertEqual(len(resposta.data['results'][0]['itens']), 3)
+
+        self.criar_vendas(20)
+        with self.assertNumQueries(3):
+            resposta = self.api.get(self.URL_COMPLETA)
+        self.assertEqual(len(resposta.data['results']), 22)
+
+
+class ExportacaoVendasTest(TestCase):
+    """A exportação lida em páginas keyset traz todas as vendas, na ordenação da listagem"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        cliente = criar_cliente(self.empresa)
+        # Datas repetidas: o pk desempata entre as páginas
+        for dia, valor in [(3, '10'), (1, '50'), (3, '30'), (2, '20'), (3, '40'), (1, '60'), (2, '70')]:
+            criar_venda(self.empresa, cliente, self.usuario, valor_total=valor, data_venda=date(2026, 6, dia))
+        outra = criar_empresa()
+        criar_venda(outra, criar_cliente(outra), criar_usuario(outra), data_venda=date(2026, 6, 2))
+
+    def exportar(self, parametros=''):
+        with mock.patch.object(VendaViewSet, 'export_chunk_size', 2):
+            resposta = self.api.get(f'/api/vendas/export/?formato=csv{parametros}')
+        self.assertEqual(resposta.status_code, 200)
+        conteudo = b''.join(resposta.streaming_content).decode('utf-8-sig')
+        return [int(linha[0]) for linha in list(csv.reader(io.StringIO(conteudo)))[1:]]
+
+    def test_ordenacao_padrao(self):
+        vendas = Venda.objects.filter(empresa=self.empresa)
+        esperado = [venda.pk for venda in sorted(vendas, key=lambda venda: (-venda.data_venda.toordinal(), venda.pk))]
+        self.assertEqual(self.exportar(), esperado)
+
+    def test_ordenacao_da_listagem(self):
+        vendas = list(Venda.objects.filter(empresa=self.empresa))
+        por_valor = [venda.pk for venda in sorted(vendas, key=lambda venda: (venda.valor_total, venda.pk))]
+        self.assertEqual(self.exportar('&ordering=valor_total'), por_valor)
+
+        por_valor_decrescente = [venda.pk for venda in sorted(vendas, key=lambda venda: (-venda.valor_total, venda.pk))]
+        self.assertEqual(self.exportar('&ordering=-valor_total'), por_valor_decrescente)
+
+
+class VendasEmLoteTest(TestCase):
+    """POST /api/vendas/bulk/ grava vendas e itens em lote e baixa o estoque"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        self.cliente = criar_cliente(self.empresa)
+        self.caneta = criar_produto(self.empresa, nome='Caneta', preco='2.00', estoque=50)
+        self.caderno = criar_produto(self.empresa, nome='Caderno', preco='15.00', estoque=20)
+
+    def linha(self, *itens, observacoes=''):
+        return {
+            'cliente': self.cliente.pk,
+            'data_venda': '2026-06-10',
+            'forma_pagamento': 'PIX',
+            'status': 'PAGA',
+            'observacoes': observacoes,
+            'itens': [
+                {'produto': produto.pk, 'quantidade': quantidade, 'preco_unitario': str(produto.preco)}
+                for produto, quantidade in itens
+            ],
+        }
+
+    def enviar_lote(self):
+        linhas = [
+            self.linha((self.caneta, 3), (self.caderno, 1)),
+            self.linha((self.caneta, 2), observacoes='Entrega urgente'),
+            self.linha((self.caderno, 4)),
+        ]
+        resposta = self.api.post('/api/vendas/bulk/', linhas, format='json')
+        self.assertEqual(resposta.status_code, 201, resposta.data)
+        return resposta.data['ids']
+
+    def conferir_lote(self, ids):
+        self.assertEqual(len(set(ids)), 3)
+        vendas = Venda.objects.in_bulk(ids)
+        # Cada venda recebeu os próprios itens, na ordem das linhas
+        self.assertEqual(
+            [sorted(vendas[pk].itens.values_list('produto__nome', 'quantidade')) for pk in ids],
+            [[('Caderno', 1), ('Caneta', 3)], [('Caneta', 2)], [('Caderno', 4)]],
+        )
+        self.assertEqual([vendas[pk].valor_total for pk in ids], [Decimal('21.00'), Decimal('4.00'), Decimal('60.00')])
+
+        self.caneta.refresh_from_db()
+        self.caderno.refresh_from_db()
+        self.assertEqual((self.caneta.estoque, self.caderno.estoque), (45, 15))
+        self.assertEqual(MovimentoEstoque.objects.filter(venda_id__in=ids, tipo='VENDA').count(), 4)
+        self.assertEqual(ItemVenda.objects.filter(venda_id__in=ids).count(), 4)
+
+    def test_lote_com_retorno_dos_ids(self):
+        self.conferir_lote(self.enviar_lote())
+
+    def test_lote_sem_retorno_dos_ids(self):
+        # Como no MySQL: os ids são lidos de volta pelo lote
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            ids = self.enviar_lote()
+        self.conferir_lote(ids)
+        lotes = set(Venda.objects.filter(pk__in=ids).values_list('lote', flat=True))
+        self.assertEqual(len(lotes), 1)
+        self.assertNotIn(None, lotes)
+
+    def test_linha_invalida_nao_grava_nada(self):
+        outra = criar_empresa()
+        linhas = [self.linha((self.caneta, 1)), self.linha((criar_produto(outra), 1))]
+        resposta = self.api.post('/api/vendas/bulk/', linhas, format='json')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual([erro['indice'] for erro in resposta.data['erros']], [1])
+        self.assertFalse(Venda.objects.exists())
+        self.caneta.refresh_from_db()
+        self.assertEqual(self.caneta.estoque, 50)
+
+
+class EstoqueVendasTest(TestCase):
+    """O estoque fica baixado enquanto a venda não está cancelada, com o livro de movimentos em dia"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.api = cliente_api(self.usuario)
+        self.cliente = criar_cliente(self.empresa)
+        self.produto = criar_produto(self.empresa, preco='5.00', estoque=10)
+
+    def criar(self, quantidade=4, status='PAGA'):
+        """Resposta do POST; a venda criada fica em self.venda_id"""
+        resposta = self.api.post('/api/vendas/', {
+            'empresa': self.empresa.pk,
+            'cliente': self.cliente.pk,
+            'data_venda': '2026-06-10',
+            'forma_pagamento': 'PIX',
+            'status': status,
+            'itens': [{'produto': self.produto.pk, 'quantidade': quantidade, 'preco_unitario': '5.00'}],
+        }, format='json')
+        self.venda_id = Venda.objects.order_by('pk').values_list('pk', flat=True).last()
+        return resposta
+
+    def alterar_status(self, venda_id, status):
+        return self.api.patch(f'/api/vendas/{venda_id}/', {'status': status}, format='json')
+
+    def estoque(self):
+        self.produto.refresh_from_db()
+        return self.produto.estoque
+
+    def test_cancelar_reabrir_e_excluir(self):
+        self.assertEqual(self.criar().status_code, 201)
+        venda_id = self.venda_id
+        self.assertEqual(self.estoque(), 6)
+
+        self.assertEqual(self.alterar_status(venda_id, 'CANCELADA').status_code, 200)
+        self.assertEqual(self.estoque(), 10)
+        estorno = MovimentoEstoque.objects.get(tipo='ESTORNO')
+        self.assertEqual((estorno.quantidade, estorno.venda_id), (4, venda_id))
+
+        # Sem mudança de status, nada é devolvido de novo
+        self.alterar_status(venda_id, 'CANCELADA')
+        self.assertEqual(self.estoque(), 10)
+
+        self.alterar_status(venda_id, 'PENDENTE')
+        self.assertEqual(self.estoque(), 6)
+
+        self.assertEqual(self.api.delete(f'/api/vendas/{venda_id}/').status_code, 204)
+        self.assertEqual(self.estoque(), 10)
+        self.assertEqual(MovimentoEstoque.objects.filter(tipo='ESTORNO').count(), 2)
+        self.assertEqual(divergencias_estoque([self.empresa.pk]), [])
+
+    def test_venda_cancelada_nao_baixa(self):
+        self.criar(status='CANCELADA')
+        venda_id = self.venda_id
+        self.assertEqual(self.estoque(), 10)
+        self.api.delete(f'/api/vendas/{venda_id}/')
+        self.assertEqual(self.estoque(), 10)
+        self.assertFalse(MovimentoEstoque.objects.filter(tipo__in=['VENDA', 'ESTORNO']).exists())
+
+    @override_settings(VENDAS_BLOQUEAR_ESTOQUE_INSUFICIENTE=True)
+    def test_bloqueio_de_estoque_insuficiente(self):
+        resposta = self.criar(quantidade=11)
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(self.estoque(), 10)
+
+        self.criar(quantidade=8)
+        cancelada = self.venda_id
+        self.alterar_status(cancelada, 'CANCELADA')
+        self.criar(quantidade=5)
+        # Reabrir a venda cancelada precisaria de 8 unidades; restam 5
+        resposta = self.alterar_status(cancelada, 'PAGA')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('status', resposta.data)
+        self.assertEqual(Venda.objects.get(pk=cancelada).status, 'CANCELADA')
+        self.assertEqual(self.estoque(), 5)
+
+
+class BuscaVendasTest(TestCase):
+    """?search= usa o índice sem diferenciar acentos e só encontra registros da empresa do usuário"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.outra = criar_empresa()
+        self.api = cliente_api(criar_usuario(self.empresa))
+        self.joao = criar_cliente(self.empresa, nome='João Conceição')
+        criar_cliente(self.empresa, nome='Maria Souza')
+        self.joao_outra = criar_cliente(self.outra, nome='Joao Conceicao')
+        self.cafe = criar_produto(self.empresa, nome='Café Torrado', codigo='CF-10')
+        criar_produto(self.outra, nome='Cafe torrado', codigo='CF-10')
+
+        usuario = criar_usuario(self.empresa)
+        self.venda = criar_venda(self.empresa, self.joao, usuario, observacoes='Entrega na portaria')
+        criar_venda(self.outra, self.joao_outra, criar_usuario(self.outra), observacoes='Entrega na portaria')
+
+    def ids(self, url, api=None):
+        resposta = (api or self.api).get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return [registro['id'] for registro in resposta.data['results']]
+
+    def test_busca_sem_acentos_na_empresa(self):
+        self.assertEqual(self.ids('/api/vendas/clientes/?search=joao conc'), [self.joao.pk])
+        self.assertEqual(self.ids('/api/vendas/clientes/?search=CONCEIÇÃO'), [self.joao.pk])
+        self.assertEqual(self.ids('/api/vendas/produtos/?search=cafe'), [self.cafe.pk])
+        self.assertEqual(self.ids('/api/vendas/produtos/?search=cf-10'), [self.cafe.pk])
+        # Pelo cliente ou pelas observações da venda
+        self.assertEqual(self.ids('/api/vendas/?search=joao'), [self.venda.pk])
+        self.assertEqual(self.ids('/api/vendas/?search=portaria'), [self.venda.pk])
+        self.assertEqual(self.ids('/api/vendas/clientes/?search=ana'), [])
+
+    def test_indice_acompanha_as_gravacoes(self):
+        self.joao.nome = 'Pedro Alves'
+        self.joao.save()
+        self.assertEqual(self.ids('/api/vendas/clientes/?search=joao'), [])
+        self.assertEqual(self.ids('/api/vendas/clientes/?search=alv'), [self.joao.pk])
+
+    def test_admin_chefe_busca_em_todas_as_empresas(self):
+        chefe = cliente_api(criar_chefe())
+        self.assertEqual(
+            sorted(self.ids('/api/vendas/clientes/?search=joao', chefe)), sorted([self.joao.pk, self.joao_outra.pk])
+        )
+
+
+class AutocompleteVendasTest(TestCase):
+    """Autocomplete só da empresa do usuário; ETag apenas com o cache de versões compartilhado"""
+
+    URL_CLIENTES = '/api/vendas/clientes/autocomplete/'
+
+    def setUp(self):
+        caches['default'].clear()
+        self.empresa = criar_empresa()
+        self.outra = criar_empresa()
+        self.api = cliente_api(criar_usuario(self.empresa))
+        self.ana = criar_cliente(self.empresa, nome='Ana Lúcia')
+        criar_cliente(self.outra, nome='Ana Paula')
+        criar_cliente(self.empresa, nome='Bruno Ananias', ativo=False)
+        criar_produto(self.empresa, nome='Parafuso sextavado', codigo='PS 08')
+
+    def nomes(self, url, api=None):
+        resposta = (api or self.api).get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return [registro['nome'] for registro in resposta.data]
+
+    def test_somente_a_empresa_do_usuario(self):
+        self.assertEqual(self.nomes(f'{self.URL_CLIENTES}?q=ana'), ['Ana Lúcia'])
+        # O parâmetro empresa só vale para o Admin Chefe
+        self.assertEqual(self.nomes(f'{self.URL_CLIENTES}?q=ana&empresa={self.outra.pk}'), ['Ana Lúcia'])
+        self.assertEqual(self.nomes('/api/vendas/produtos/autocomplete/?q=ps08'), ['Parafuso sextavado'])
+
+        chefe = cliente_api(criar_chefe())
+        self.assertEqual(chefe.get(f'{self.URL_CLIENTES}?q=ana').status_code, 400)
+        self.assertEqual(self.nomes(f'{self.URL_CLIENTES}?q=ana&empresa={self.outra.pk}', chefe), ['Ana Paula'])
+
+    def test_sem_etag_com_cache_local(self):
+        resposta = self.api.get(f'{self.URL_CLIENTES}?q=ana')
+        self.assertNotIn('ETag', resposta)
+        self.assertEqual(self.api.get(f'{self.URL_CLIENTES}?q=ana', HTTP_IF_NONE_MATCH='"x"').status_code, 200)
+
+    def test_etag_com_cache_compartilhado(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': diretorio}
+            with override_settings(CACHES={'default': cache}):
+                resposta = self.api.get(f'{self.URL_CLIENTES}?q=ana')
+                etag = resposta['ETag']
+                condicional = self.api.get(f'{self.URL_CLIENTES}?q=ana', HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(condicional.status_code, 304)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    criar_cliente(self.empresa, nome='Anabela')
+                resposta = self.api.get(f'{self.URL_CLIENTES}?q=ana', HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(resposta.status_code, 200)
+                self.assertEqual([cliente['nome'] for cliente in resposta.data], ['Ana Lúcia', 'Anabela'])
+
+
+class TotaisClientesTest(TestCase):
+    """Os totais gravados no cliente contam as vendas não canceladas, com o desconto abatido"""
+
+    def setUp(self):
+        self.empresa = criar_empresa()
+        self.usuario = criar_usuario(self.empresa)
+        self.ana = criar_cliente(self.empresa, nome='Ana')
+        self.bruno = criar_cliente(self.empresa, nome='Bruno')
+
+    def venda(self, valor_total, dia, desconto='0.00', **campos):
+        return criar_venda(
+            self.empresa, self.ana, self.usuario, valor_total=valor_total, desconto=Decimal(desconto),
+            data_venda=date(2026, 6, dia), **campos
+        )
+
+    def assertTotais(self, cliente, total_vendas, valor_total_vendas, ticket_medio, ultima_compra):
+        cliente.refresh_from_db()
+        self.assertEqual(
+            (cliente.total_vendas, cliente.valor_total_vendas, cliente.ticket_medio, cliente.ultima_compra),
+            (total_vendas, Decimal(valor_total_vendas), Decimal(ticket_medio), ultima_compra),
+        )
+
+    def test_criar_cancelar_trocar_cliente_e_excluir(self):
+        primeira = self.venda('100.00', 5, desconto='10.00')
+        segunda = self.venda('50.00', 12)
+        self.assertTotais(self.ana, 2, '140.00', '70.00', date(2026, 6, 12))
+
+        # Venda cancelada sai dos totais
+        segunda.status = 'CANCELADA'
+        segunda.save()
+        self.assertTotais(self.ana, 1, '90.00', '90.00', date(2026, 6, 5))
+
+        # Troca de cliente recalcula o anterior e o novo
+        primeira.cliente = self.bruno
+        primeira.save()
+        self.assertTotais(self.ana, 0, '0.00', '0.00', None)
+        self.assertTotais(self.bruno, 1, '90.00', '90.00', date(2026, 6, 5))
+
+        segunda.status = 'PAGA'
+        segunda.save()
+        self.assertTotais(self.ana, 1, '50.00', '50.00', date(2026, 6, 12))
+
+        primeira.delete()
+        self.assertTotais(self.bruno, 0, '0.00', '0.00', None)
+        self.assertTotais(self.ana, 1, '50.00', '50.00', date(2026, 6, 12))
+
+
+class TotalizadoresAdminVendasTest(TestCase):
+    """Totais da listagem do admin: um aggregate, reaproveitado do cache até uma alteração pelo admin"""
+
+    URL = reverse('admin:vendas_venda_changelist')
+
+    def setUp(self):
+        caches['default'].clear()
+        empresa = criar_empresa()
+        usuario = criar_usuario(empresa)
+        cliente = criar_cliente(empresa)
+        self.pendente = criar_venda(empresa, cliente, usuario, valor_total='100.00', status='PENDENTE')
+        self.paga = criar_venda(empresa, cliente, usuario, valor_total='250.00')
+        self.client.force_login(criar_chefe(is_staff=True, is_superuser=True))
+
+    def listagem(self, url=None):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url or self.URL)
+        self.assertEqual(resposta.status_code, 200)
+        somas = [consulta['sql'] for consulta in consultas.captured_queries if 'SUM(' in consulta['sql']]
+        totais = {
+            nome: resposta.context[nome]
+            for nome in ('total_geral', 'total_pendente', 'total_paga', 'total_cancelada', 'quantidade')
+        }
+        return totais, len(somas), len(consultas)
+
+    def test_um_aggregate_e_cache_por_querystring(self):
+        totais, somas, consultas = self.listagem()
+        self.assertEqual(somas, 1)
+        self.assertEqual(totais, {
+            'total_geral': 'R$ 350.00', 'total_pendente': 'R$ 100.00', 'total_paga': 'R$ 250.00',
+            'total_cancelada': 'R$ 0.00', 'quantidade': 2,
+        })
+
+        # Mesma querystring: sessão, usuário, filtro de empresa, os dois COUNTs
+        # da ChangeList, a página e o date_hierarchy; os totais vêm do cache
+        with self.assertNumQueries(8):
+            repetida = self.client.get(self.URL)
+        self.assertLess(8, consultas)
+        self.assertEqual(repetida.context['total_geral'], 'R$ 350.00')
+
+        # Outro filtro: outros totais
+        filtrados, somas, _ = self.listagem(f'{self.URL}?status__exact=PAGA')
+        self.assertEqual(somas, 1)
+        self.assertEqual((filtrados['total_geral'], filtrados['quantidade']), ('R$ 250.00', 1))
+
+    def test_acoes_e_exclusao_trocam_a_versao(self):
+        self.listagem()
+        resposta = self.client.post(self.URL, {
+            'action': 'cancelar_vendas', '_selected_action': [self.pendente.pk],
+        })
+        self.assertEqual(resposta.status_code, 302)
+        totais, somas, _ = self.listagem()
+        self.assertEqual(somas, 1)
+        self.assertEqual((totais['total_pendente'], totais['total_cancelada']), ('R$ 0.00', 'R$ 100.00'))
+
+        resposta = self.client.post(reverse('admin:vendas_venda_delete', args=[self.paga.pk]), {'post': 'yes'})
+        self.assertEqual(resposta.status_code, 302)
+        totais, _, _ = self.listagem()
+        self.assertEqual((totais['total_geral'], totais['quantidade']), ('R$ 100.00', 1))
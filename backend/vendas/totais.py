@@ -0,0 +1,47 @@
+"""
+Totais de compras por cliente (total de vendas, valor total, ticket médio e
+última compra), gravados no próprio Cliente para que listagens e o admin os
+leiam sem agregar as vendas a cada linha.
+
+Os totais consideram as vendas não canceladas, com o valor já descontado,
+como o ranking de clientes do dashboard. A cada gravação de venda só os
+clientes afetados são recalculados, com um único UPDATE.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Avg, Count, DateField, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce
+
+from .models import Cliente, Venda
+
+
+def atualizar_totais_clientes(cliente_ids=None):
+    """
+    Recalcula os totais dos clientes informados (ou de todos, com None) a
+    partir das vendas. Retorna a quantidade de clientes atualizados.
+    """
+    vendas = Venda.objects.filter(
+        cliente=OuterRef('pk')
+    ).exclude(status='CANCELADA').order_by().values('cliente')
+    valor_final = F('valor_total') - F('desconto')
+
+    def agregado(expressao, output_field):
+        return Subquery(vendas.annotate(valor=expressao).values('valor'), output_field=output_field)
+
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+    clientes = Cliente.objects.all()
+    if cliente_ids is not None:
+        clientes = clientes.filter(pk__in=set(cliente_ids))
+
+    return clientes.update(
+        total_vendas=Coalesce(agregado(Count('pk'), IntegerField()), Value(0)),
+        valor_total_vendas=Coalesce(
+            agregado(Sum(valor_final, output_field=decimal), decimal), Value(Decimal('0.00'))
+        ),
+        ticket_medio=Coalesce(
+            agregado(Avg(valor_final, output_field=decimal), decimal), Value(Decimal('0.00'))
+        ),
+        ultima_compra=agregado(Max('data_venda'), DateField()),
+    )
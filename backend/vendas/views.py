@@ -1,61 +1,132 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db.models import Prefetch
 
-from .models import Cliente, Produto, Venda
+from .autocomplete import AutocompleteMixin
+from .bulk import criar_vendas_em_lote
+from .models import Cliente, Produto, Venda, ItemVenda
 from .serializers import (
-    ClienteSerializer, ProdutoSerializer, VendaSerializer, VendaCreateSerializer
+    ClienteSerializer, ClienteListSerializer, ProdutoSerializer, ProdutoListSerializer,
+    VendaSerializer, VendaListSerializer, VendaCreateSerializer
 )
+from busca.filtros import BuscaIndexadaFilter
+from usuarios.contexto import contexto_tenant
 from usuarios.permissions import MultiTenantPermission
+from core.campos import CamposEsparsosMixin
+from core.paginacao import PaginacaoCursorMixin
+from core.exportacao import ExportacaoMixin
 
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(AutocompleteMixin, CamposEsparsosMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    list_serializer_class = ClienteListSerializer
     permission_classes = [IsAuthenticated, MultiTenantPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BuscaIndexadaFilter, filters.OrderingFilter]
     filterset_fields = ['empresa', 'ativo']
     search_fields = ['nome', 'email', 'cpf_cnpj']
+    busca_fontes = [('CLIENTE', 'pk')]
+    autocomplete_origem = 'CLIENTE'
+    ordering_fields = ['nome', 'total_vendas', 'valor_total_vendas', 'ticket_medio', 'ultima_compra']
 
     def get_queryset(self):
-        user = self.request.user
-        if user.tipo_usuario == 'ADMIN_CHEFE':
+        contexto = contexto_tenant(self.request)
+        if contexto.admin_chefe:
             return Cliente.objects.all()
-        return Cliente.objects.filter(empresa=user.empresa)
+        return Cliente.objects.filter(empresa_id=contexto.empresa_id)
 
 
-class ProdutoViewSet(viewsets.ModelViewSet):
+class ProdutoViewSet(AutocompleteMixin, CamposEsparsosMixin, viewsets.ModelViewSet):
     queryset = Produto.objects.all()
     serializer_class = ProdutoSerializer
+    list_serializer_class = ProdutoListSerializer
     permission_classes = [IsAuthenticated, MultiTenantPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BuscaIndexadaFilter]
     filterset_fields = ['empresa', 'ativo']
     search_fields = ['nome', 'codigo', 'descricao']
+    busca_fontes = [('PRODUTO', 'pk')]
+    autocomplete_origem = 'PRODUTO'
 
     def get_queryset(self):
-        user = self.request.user
-        if user.tipo_usuario == 'ADMIN_CHEFE':
+        contexto = contexto_tenant(self.request)
+        if contexto.admin_chefe:
             return Produto.objects.all()
-        return Produto.objects.filter(empresa=user.empresa)
+        return Produto.objects.filter(empresa_id=contexto.empresa_id)
 
 
-class VendaViewSet(viewsets.ModelViewSet):
+class VendaViewSet(ExportacaoMixin, CamposEsparsosMixin, PaginacaoCursorMixin, viewsets.ModelViewSet):
     queryset = Venda.objects.all()
     serializer_class = VendaSerializer
+    list_serializer_class = VendaListSerializer
     permission_classes = [IsAuthenticated, MultiTenantPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BuscaIndexadaFilter, filters.OrderingFilter]
     filterset_fields = ['empresa', 'cliente', 'status', 'forma_pagamento', 'data_venda']
     search_fields = ['cliente__nome', 'observacoes']
+    busca_fontes = [('CLIENTE', 'cliente_id'), ('VENDA', 'pk')]
     ordering_fields = ['data_venda', 'valor_total', 'criado_em']
     ordering = ['-data_venda']
+    cursor_campo = 'data_venda'
+    export_nome = 'vendas'
+    export_campos = [
+        ('id', 'ID'),
+        ('empresa__nome', 'Empresa'),
+        ('cliente__nome', 'Cliente'),
+        ('data_venda', 'Data da Venda'),
+        ('data_pagamento', 'Data de Pagamento'),
+        ('valor_total', 'Valor Total'),
+        ('desconto', 'Desconto'),
+        ('chargeback', 'Chargeback'),
+        ('reversao_chargeback', 'Reversao de Chargeback'),
+        ('forma_pagamento', 'Forma de Pagamento'),
+        ('status', 'Status'),
+        ('observacoes', 'Observações'),
+    ]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.tipo_usuario == 'ADMIN_CHEFE':
-            return Venda.objects.all()
-        return Venda.objects.filter(empresa=user.empresa)
+        contexto = contexto_tenant(self.request)
+        if contexto.admin_chefe:
+            queryset = Venda.objects.all()
+        else:
+            queryset = Venda.objects.filter(empresa_id=contexto.empresa_id)
+
+        # Carrega cliente, usuário e itens (com produto) junto da página,
+        # evitando uma consulta por venda na serialização
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.select_related('cliente', 'usuario_cadastro').prefetch_related(
+                Prefetch('itens', queryset=ItemVenda.objects.select_related('produto'))
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
             return VendaCreateSerializer
-        return VendaSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Cria várias vendas (com itens) em uma única transação. Recebe uma
+        lista no formato do POST /api/vendas/; se alguma linha for inválida,
+        nada é gravado e os erros são retornados por linha.
+        """
+        linhas = request.data
+        if not isinstance(linhas, list) or not linhas:
+            return Response({'error': 'Envie uma lista de vendas'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(linhas) > settings.VENDAS_BULK_MAX_LINHAS:
+            return Response(
+                {'error': f'Maximo de {settings.VENDAS_BULK_MAX_LINHAS} vendas por requisicao'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        vendas, erros = criar_vendas_em_lote(linhas, request.user)
+        if erros:
+            return Response({'criadas': 0, 'erros': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {'criadas': len(vendas), 'ids': [venda.id for venda in vendas]},
+            status=status.HTTP_201_CREATED
+        )
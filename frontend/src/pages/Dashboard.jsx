@@ -34,12 +34,7 @@ import AdminFilters from '../components/AdminFilters';
 import AnaliseReceita from '../components/AnaliseReceita';
 import DRE from '../components/DRE';
 import GraficoEvolucao from '../components/GraficoEvolucao';
-import {
-  getDespesas,
-  getVendas,
-  getReceitas,
-  getEmpresas,
-} from '../services/api';
+import { getDashboard } from '../services/api';
 import { toast } from 'react-toastify';
 
 const StatCard = ({ title, value, subtitle, icon: Icon, color }) => (
@@ -230,64 +225,25 @@ const Dashboard = () => {
   const loadDashboard = async () => {
     try {
       setLoading(true);
-      const params = getFilterParams(true);
-
-      // Buscar dados em paralelo
-      const requests = [
-        getDespesas(params).catch(() => ({ data: [] })),
-        getVendas(params).catch(() => ({ data: [] })),
-        getReceitas(params).catch(() => ({ data: [] })),
-      ];
-
-      // Admin Chefe também busca empresas
-      if (isAdminChefe()) {
-        requests.push(getEmpresas().catch(() => ({ data: [] })));
-      }
-
-      const results = await Promise.all(requests);
-
-      const despesas = results[0].data.results || results[0].data || [];
-      const vendas = results[1].data.results || results[1].data || [];
-      const receitas = results[2].data.results || results[2].data || [];
-      const empresas = isAdminChefe() ? (results[3]?.data.results || results[3]?.data || []) : [];
-
-      // Filtrar por período selecionado
-      const dataInicioDate = new Date(dataInicio + 'T00:00:00');
-      const dataFimDate = new Date(dataFim + 'T23:59:59');
-
-      const despesasPeriodo = despesas.filter(d => {
-        const data = new Date(d.data_vencimento);
-        return data >= dataInicioDate && data <= dataFimDate;
-      });
-
-      const vendasPeriodo = vendas.filter(v => {
-        const data = new Date(v.data_venda);
-        return data >= dataInicioDate && data <= dataFimDate;
-      });
-
-      const receitasPeriodo = receitas.filter(r => {
-        const data = new Date(r.data_prevista);
-        return data >= dataInicioDate && data <= dataFimDate;
-      });
-
-      // Calcular totais do período
-      const totalDespesas = despesasPeriodo.reduce((sum, d) => sum + parseFloat(d.valor || 0), 0);
-      const totalVendas = vendasPeriodo.reduce((sum, v) => sum + parseFloat(v.valor_final || 0), 0);
-      const totalReceitas = receitasPeriodo.reduce((sum, r) => sum + parseFloat(r.valor || 0), 0);
+      const params = {
+        ...getFilterParams(true),
+        data_inicio: dataInicio,
+        data_fim: dataFim,
+      };
 
-      // Contar pendentes (em todo o sistema, não só no período)
-      const despesasPendentes = despesas.filter(d => d.status === 'PENDENTE' || d.status === 'VENCIDA').length;
-      const receitasPendentes = receitas.filter(r => r.status === 'PENDENTE').length;
+      // Totais calculados no backend (todos os registros do período)
+      const { data } = await getDashboard(params);
+      const { kpis } = data;
 
       setStats({
-        total_receitas: totalReceitas,
-        total_vendas: totalVendas,
-        total_despesas: totalDespesas,
-        saldo: totalReceitas + totalVendas - totalDespesas,
-        total_empresas: empresas.length,
-        despesas_pendentes: despesasPendentes,
-        vendas_periodo: vendasPeriodo.length,
-        receitas_pendentes: receitasPendentes,
+        total_receitas: kpis.total_receitas,
+        total_vendas: kpis.total_vendas,
+        total_despesas: kpis.total_despesas,
+        saldo: kpis.saldo,
+        total_empresas: kpis.total_empresas || 0,
+        despesas_pendentes: kpis.despesas_pendentes,
+        vendas_periodo: kpis.vendas_periodo,
+        receitas_pendentes: kpis.receitas_pendentes,
       });
     } catch (error) {
       console.error('Erro ao carregar dashboard:', error);
@@ -23,6 +23,7 @@ import {
   Divider,
   Grow,
   Fade,
+  Autocomplete,
 } from '@mui/material';
 import {
   Save as SaveIcon,
@@ -36,17 +37,53 @@ import {
   getVenda,
   createVenda,
   updateVenda,
-  getClientes,
-  getProdutos,
+  autocompleteClientes,
+  autocompleteProdutos,
 } from '../services/api';
 
+// Opções do autocomplete para o texto digitado. A busca é feita no servidor
+// (cadastros de qualquer tamanho) e espera uma pausa na digitação
+const useOpcoesAutocomplete = (buscar, empresaId) => {
+  const [texto, setTexto] = useState('');
+  const [opcoes, setOpcoes] = useState([]);
+  const [carregando, setCarregando] = useState(false);
+
+  useEffect(() => {
+    if (!texto.trim()) {
+      setOpcoes([]);
+      return undefined;
+    }
+    let ativo = true;
+    const timer = setTimeout(async () => {
+      try {
+        setCarregando(true);
+        const params = empresaId ? { q: texto, empresa: empresaId } : { q: texto };
+        const response = await buscar(params);
+        if (ativo) setOpcoes(response.data);
+      } catch (error) {
+        console.error('Erro ao buscar opções:', error);
+      } finally {
+        if (ativo) setCarregando(false);
+      }
+    }, 250);
+    return () => {
+      ativo = false;
+      clearTimeout(timer);
+    };
+  }, [texto, empresaId, buscar]);
+
+  return { opcoes, carregando, setTexto };
+};
+
 const VendaForm = () => {
   const navigate = useNavigate();
   const { id } = useParams();
   const { user } = useAuth();
   const [loading, setLoading] = useState(false);
-  const [clientes, setClientes] = useState([]);
-  const [produtos, setProdutos] = useState([]);
+  const [clienteSelecionado, setClienteSelecionado] = useState(null);
+  const [produtoSelecionado, setProdutoSelecionado] = useState(null);
+  const buscaClientes = useOpcoesAutocomplete(autocompleteClientes, user?.empresa_id);
+  const buscaProdutos = useOpcoesAutocomplete(autocompleteProdutos, user?.empresa_id);
   const [mounted, setMounted] = useState(false);
   const [formData, setFormData] = useState({
     cliente: '',
@@ -72,35 +109,11 @@ const VendaForm = () => {
   }, []);
 
   useEffect(() => {
-    loadClientes();
-    loadProdutos();
     if (id) {
       loadVenda();
     }
   }, [id]);
 
-  const loadClientes = async () => {
-    try {
-      const params = user?.empresa_id ? { empresa: user.empresa_id } : {};
-      const response = await getClientes(params);
-      setClientes(response.data.results || response.data);
-    } catch (error) {
-      console.error('Erro ao carregar clientes:', error);
-      toast.error('Erro ao carregar clientes: ' + (error.response?.data?.message || error.message));
-    }
-  };
-
-  const loadProdutos = async () => {
-    try {
-      const params = user?.empresa_id ? { empresa: user.empresa_id } : {};
-      const response = await getProdutos(params);
-      setProdutos(response.data.results || response.data);
-    } catch (error) {
-      console.error('Erro ao carregar produtos:', error);
-      toast.error('Erro ao carregar produtos: ' + (error.response?.data?.message || error.message));
-    }
-  };
-
   const loadVenda = async () => {
     try {
       setLoading(true);
@@ -116,6 +129,9 @@ const VendaForm = () => {
         forma_pagamento: venda.forma_pagamento || 'DINHEIRO',
         observacoes: venda.observacoes || '',
       });
+      setClienteSelecionado(
+        venda.cliente ? { id: venda.cliente, nome: venda.cliente_nome } : null
+      );
       setItens(venda.itens || []);
     } catch (error) {
       toast.error('Erro ao carregar venda');
@@ -133,23 +149,30 @@ const VendaForm = () => {
     }));
   };
 
+  const handleClienteChange = (event, cliente) => {
+    setClienteSelecionado(cliente);
+    setFormData((prev) => ({
+      ...prev,
+      cliente: cliente ? cliente.id : '',
+    }));
+  };
+
   const handleNovoItemChange = (e) => {
     const { name, value } = e.target;
     setNovoItem((prev) => ({
       ...prev,
       [name]: value,
     }));
+  };
 
-    // Se selecionar produto, preencher preço automaticamente
-    if (name === 'produto') {
-      const produto = produtos.find((p) => p.id === parseInt(value));
-      if (produto) {
-        setNovoItem((prev) => ({
-          ...prev,
-          preco_unitario: produto.preco_venda || '',
-        }));
-      }
-    }
+  // Ao selecionar o produto, preenche o preço automaticamente
+  const handleProdutoChange = (event, produto) => {
+    setProdutoSelecionado(produto);
+    setNovoItem((prev) => ({
+      ...prev,
+      produto: produto ? produto.id : '',
+      preco_unitario: produto ? produto.preco : '',
+    }));
   };
 
   const adicionarItem = () => {
@@ -166,10 +189,9 @@ const VendaForm = () => {
       return;
     }
 
-    const produto = produtos.find((p) => p.id === parseInt(novoItem.produto));
     const item = {
       produto: novoItem.produto,
-      produto_nome: produto.nome,
+      produto_nome: produtoSelecionado.nome,
       quantidade: parseFloat(novoItem.quantidade),
       preco_unitario: parseFloat(novoItem.preco_unitario),
       subtotal:
@@ -177,6 +199,7 @@ const VendaForm = () => {
     };
 
     setItens((prev) => [...prev, item]);
+    setProdutoSelecionado(null);
     setNovoItem({
       produto: '',
       quantidade: '1',
@@ -305,21 +328,21 @@ const VendaForm = () => {
               <Grid container spacing={2}>
                 {/* Cliente */}
                 <Grid item xs={12} md={6}>
-                  <FormControl fullWidth required>
-                    <InputLabel>Cliente</InputLabel>
-                    <Select
-                      name="cliente"
-                      value={formData.cliente}
-                      onChange={handleChange}
-                      label="Cliente"
-                    >
-                      {clientes.map((cliente) => (
-                        <MenuItem key={cliente.id} value={cliente.id}>
-                          {cliente.nome}
-                        </MenuItem>
-                      ))}
-                    </Select>
-                  </FormControl>
+                  <Autocomplete
+                    options={buscaClientes.opcoes}
+                    value={clienteSelecionado}
+                    loading={buscaClientes.carregando}
+                    filterOptions={(opcoes) => opcoes}
+                    getOptionLabel={(cliente) => cliente.nome}
+                    isOptionEqualToValue={(opcao, valor) => opcao.id === valor.id}
+                    onInputChange={(event, texto) => buscaClientes.setTexto(texto)}
+                    onChange={handleClienteChange}
+                    noOptionsText="Digite o nome do cliente"
+                    loadingText="Buscando..."
+                    renderInput={(params) => (
+                      <TextField {...params} label="Cliente" required />
+                    )}
+                  />
                 </Grid>
 
                 {/* Data Venda */}
@@ -477,21 +500,21 @@ const VendaForm = () => {
               </Typography>
               <Grid container spacing={2} alignItems="center">
                 <Grid item xs={12} md={5}>
-                  <FormControl fullWidth>
-                    <InputLabel>Produto</InputLabel>
-                    <Select
-                      name="produto"
-                      value={novoItem.produto}
-                      onChange={handleNovoItemChange}
-                      label="Produto"
-                    >
-                      {produtos.map((produto) => (
-                        <MenuItem key={produto.id} value={produto.id}>
-                          {produto.nome}
-                        </MenuItem>
-                      ))}
-                    </Select>
-                  </FormControl>
+                  <Autocomplete
+                    options={buscaProdutos.opcoes}
+                    value={produtoSelecionado}
+                    loading={buscaProdutos.carregando}
+                    filterOptions={(opcoes) => opcoes}
+                    getOptionLabel={(produto) =>
+                      produto.codigo ? `${produto.nome} (${produto.codigo})` : produto.nome
+                    }
+                    isOptionEqualToValue={(opcao, valor) => opcao.id === valor.id}
+                    onInputChange={(event, texto) => buscaProdutos.setTexto(texto)}
+                    onChange={handleProdutoChange}
+                    noOptionsText="Digite o nome ou código do produto"
+                    loadingText="Buscando..."
+                    renderInput={(params) => <TextField {...params} label="Produto" />}
+                  />
                 </Grid>
 
                 <Grid item xs={12} md={2}>
@@ -151,6 +151,9 @@ export const createCliente = (data) =>
 export const getClientes = (params) =>
   api.get('/vendas/clientes/',  params );
 
+export const autocompleteClientes = (params) =>
+  api.get('/vendas/clientes/autocomplete/', { params });
+
 export const getCliente = (id) =>
   api.get(`/vendas/clientes/${id}/`);
 
@@ -163,6 +166,9 @@ export const deleteCliente = (id) =>
 export const getProdutos = (params) =>
   api.get('/vendas/produtos/', { params });
 
+export const autocompleteProdutos = (params) =>
+  api.get('/vendas/produtos/autocomplete/', { params });
+
 export const getProduto = (id) =>
   api.get(`/vendas/produtos/${id}/`);
 
@@ -204,6 +210,9 @@ export const getAnaliseReceita = (params) =>
 export const getDRE = (params) =>
   api.get('/relatorios/dre/', { params });
 
+export const getDashboard = (params) =>
+  api.get('/relatorios/dashboard/', { params });
+
 // Categorias Globais (gerenciadas pelo Admin Chefe)
 export const getCategorias = (params) =>
   api.get('/categorias/', { params });